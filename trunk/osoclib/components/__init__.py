@@ -1,5 +1,7 @@
 #! /usr/bin/python
 # -*- coding: utf-8 -*-
 
-from components import Component, ComponentError, find_component
+from components import Component, ComponentError
+from library import ComponentLibrary, get_library, find_component
+from library import read_top_sources, parse_top_entity
 from cli import ComponentsCli
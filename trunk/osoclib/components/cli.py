@@ -27,11 +27,11 @@ __version__ = "1.0.0"
 __versionTime__ = "xx/xx/xxxx"
 __author__ = "Fabrice MOUSSET <fabrice.mousset@laposte.net>"
 
-import os
 import os.path as path
 
 from core import BaseCli, ArgsSet, Settings, format_table
 from components import Component, ComponentError
+from library import get_library
 
 CREATION_ARGS = ArgsSet(name="New Component", version="1.0", category="User Component", description=None)
 EDITION_ARGS = ArgsSet(name=None, version=None, category=None, description=None)
@@ -261,12 +261,9 @@ class ComponentsCli(BaseCli):
         # pylint: disable-msg=W0613
         titles = ["name", "version", "category"]
         rows = []
-        comp_dir = settings.components_dir
-        for cp_file in os.listdir(comp_dir):
-            name = path.join(comp_dir, cp_file)
-            if(path.isfile(name)):
-                cp = Component(name)
-                rows.append([cp.name, cp.version, cp.category])
+        library = get_library(settings.components_dir)
+        for cp in library.components():
+            rows.append([cp["name"], cp["version"], cp["category"]])
         self.write("\n".join(format_table(titles, rows)))
         self.write("\n")
 
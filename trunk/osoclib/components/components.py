@@ -92,22 +92,6 @@ def check_xml_entity(entity, interfaces, ports):
     
     return errors
 
-def find_component(basedir, name):
-    """Find component based on his name.
-    
-    @param basedir: components directory
-    @param name: component to find
-    """
-    if isinstance(basedir, basestring) and isinstance(name, basestring):
-        for cp_file in os.listdir(basedir):
-            filename = path.join(basedir, cp_file)
-            if(path.isfile(filename)):
-                cp = Component(filename)
-                if cp.name.lower() == name.lower():
-                    return cp
-    
-    return None
-
 def split_signal(signal):
     """Extract signal informations. The signal name must match following naming
     convention:
@@ -593,11 +577,13 @@ class Component(XmlFileBase):
             if hdl_file.order >= order:
                 hdl_file.order -= 1
 
-    def extractHDL(self, base_dir, context=None):
+    def extractHDL(self, base_dir, context=None, manifest=None):
         """Copy components HDL files to a given directory.
         
             @param base_dir: destination directory
             @param context: used to define type of project (xilinx, altera, etc.)
+            @param manifest: build manifest (core.BuildManifest), if defined
+                             files already extracted are not copied again.
             @return:  list containing file names
         """
         #TODO: Extract file base on context value
@@ -605,13 +591,29 @@ class Component(XmlFileBase):
         for hdl_file in self.hdl_files.iteritems():
             files.append(hdl_file.name)
             filename = path.join(base_dir, hdl_file.name)
+            if manifest is None:
+                try:
+                    vhdl_fd = open(filename, "wb")
+                except IOError:
+                    raise ComponentError("Can't create %s file." % hdl_file.name)
+                
+                vhdl_fd.write(self.zfp.read(hdl_file.name))
+                vhdl_fd.close()
+                continue
+
+            # Archive member is identified by its checksum and size
+            info = self.zfp.getinfo(hdl_file.name)
+            inputs = "%s:%08x:%d" % (hdl_file.name, info.CRC & 0xffffffff,
+                                     info.file_size)
+            if manifest.is_current(filename, inputs):
+                manifest.skipped.append(filename)
+                continue
+
             try:
-                vhdl_fd = open(filename, "wb")
+                manifest.write(filename, self.zfp.read(hdl_file.name), inputs,
+                               "wb")
             except IOError:
                 raise ComponentError("Can't create %s file." % hdl_file.name)
-            
-            vhdl_fd.write(self.zfp.read(hdl_file.name))
-            vhdl_fd.close()
         return files
         
     def check(self):
@@ -0,0 +1,287 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     library.py
+# Purpose:  Components directory index
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Last commit info:
+#
+# $LastChangedDate:: xxxx/xx/xx xx:xx:xx $
+# $Rev::                                 $
+# $Author::                              $
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"Orchestra components directory index."
+
+__version__     = "1.0"
+
+import os, sys
+import os.path as path
+import cPickle
+import zlib
+
+if __name__ == "__main__":
+    # Add base library to load path
+    dirname, base = path.split(path.dirname(path.realpath(__file__)))
+    sys.path.append(dirname)
+
+from core import XmlFileBase, ZipFile, is_zipfile, to_boolean
+from core.zipfile import BadZipfile
+from vhdl import EntityError
+from vhdl.entity import parse_entity
+from thirdparty.PyDbLite import Base
+from components import Component, COMPONENTS_NODES, COMPONENTS_ATTRIBS
+
+# INDEX_FILENAME is the index database name, stored in components directory
+INDEX_FILENAME = "components.idx"
+
+# INDEX_FIELDS define index record fields
+INDEX_FIELDS = ("key", "name", "filename", "mtime", "size", "version",
+                "category", "interfaces")
+
+# INDEX_ERRORS are raised when index file is unreadable or obsolete
+INDEX_ERRORS = (IOError, OSError, EOFError, ValueError, IndexError, KeyError,
+                cPickle.UnpicklingError)
+
+def read_description(filename):
+    """Read component XML descriptor without loading HDL files.
+
+    @param filename: component archive
+    @return: XmlFileBase object or None if file is not a component archive.
+    """
+    if not is_zipfile(filename):
+        return None
+
+    zfp = ZipFile(filename, "r")
+    xml_data = ""
+    try:
+        for name in zfp.namelist():
+            if name.lower().endswith('.xml'):
+                xml_data = zfp.read(name)
+                break
+    finally:
+        zfp.close()
+
+    if not xml_data:
+        return None
+
+    return XmlFileBase(COMPONENTS_NODES, COMPONENTS_ATTRIBS, None, xml_data)
+
+def read_top_sources(filename):
+    """Read top HDL files of a component archive.
+
+    @param filename: component archive
+    @return: list of (name, source), unreadable archives are not reported.
+    """
+    try:
+        descr = read_description(filename)
+        if descr is None:
+            return []
+
+        sources = []
+        zfp = ZipFile(filename, "r")
+        try:
+            names = zfp.namelist()
+            for hdl_file in descr.hdl_files.iteritems():
+                if to_boolean(hdl_file.istop) and hdl_file.name in names:
+                    sources.append((hdl_file.name, zfp.read(hdl_file.name)))
+        finally:
+            zfp.close()
+    except (IOError, OSError, BadZipfile, zlib.error):
+        return []
+
+    return sources
+
+def parse_top_entity(hdl_file):
+    """Parse top entity declaration of a component HDL file.
+
+    Used by project checking worker processes, so only picklable data is
+    returned and entity cache is not used.
+
+    @param hdl_file: tuple (name, source) from read_top_sources()
+    @return: tuple (source, entity tuple), or None if file can't be parsed.
+    """
+    (name, source) = hdl_file
+    try:
+        return (source, parse_entity(source, name))
+    except EntityError:
+        return None
+
+class ComponentLibrary(object):
+    """Components directory index.
+
+    Each archive of the directory is described by one record (component name,
+    archive name, modification time, size, version, category and interfaces).
+    The index is saved in the components directory and only archives added or
+    modified since last scan are opened to update it.
+
+    @param basedir: components directory
+    """
+
+    def __init__(self, basedir):
+        self.basedir = basedir
+        self._db = Base(path.join(basedir, INDEX_FILENAME))
+        try:
+            self._db.create(*INDEX_FIELDS, **{"mode" : "open"})
+            if self._db.fields != list(INDEX_FIELDS):
+                raise ValueError("Index fields mismatch")
+        except INDEX_ERRORS:
+            # Index is unreadable or obsolete, build a new one.
+            try:
+                self._db.create(*INDEX_FIELDS, **{"mode" : "override"})
+            except (IOError, OSError):
+                pass
+        self._db.create_index("key")
+
+    def _commit(self):
+        """Save index to disk, read-only directories only use memory copy."""
+        try:
+            self._db.commit()
+        except (IOError, OSError):
+            pass
+
+    def _is_current(self, record):
+        """Return True if archive has not been modified since indexed."""
+        try:
+            stat = os.stat(path.join(self.basedir, record["filename"]))
+        except OSError:
+            return False
+        return (record["mtime"], record["size"]) == (stat.st_mtime,
+                                                     stat.st_size)
+
+    def _insert(self, filename, stat):
+        """Add archive description to index."""
+        try:
+            descr = read_description(path.join(self.basedir, filename))
+        except (IOError, OSError, BadZipfile, zlib.error):
+            descr = None
+
+        # Unknown files are also indexed, so they are not opened again
+        if descr is None or not descr.name:
+            self._db.insert(filename=filename, mtime=stat.st_mtime,
+                            size=stat.st_size)
+            return
+
+        interfaces = [(str(iface.name).lower(), str(iface.type).upper())
+                        for iface in descr.interfaces.iteritems()
+                     ]
+        self._db.insert(key=str(descr.name).lower(), name=descr.name,
+                        filename=filename, mtime=stat.st_mtime,
+                        size=stat.st_size, version=descr.version,
+                        category=descr.category, interfaces=interfaces)
+
+    def refresh(self):
+        """Synchronize index with components directory content.
+
+        @return: True if index has been modified.
+        """
+        known = dict([record["filename"], record] for record in self._db)
+        changed = False
+        filenames = os.listdir(self.basedir)
+        filenames.sort()
+        for filename in filenames:
+            if filename == INDEX_FILENAME:
+                continue
+
+            fullname = path.join(self.basedir, filename)
+            if not path.isfile(fullname):
+                continue
+
+            stat = os.stat(fullname)
+            record = known.pop(filename, None)
+            if record is not None:
+                if (record["mtime"], record["size"]) == (stat.st_mtime,
+                                                         stat.st_size):
+                    continue
+                self._db.delete(record)
+
+            self._insert(filename, stat)
+            changed = True
+
+        # Remove deleted archives
+        if known:
+            self._db.delete(known.values())
+            changed = True
+
+        if changed:
+            self._commit()
+        return changed
+
+    def _select(self, key):
+        """Get index records matching component name."""
+        records = self._db(key=key)
+        records.sort(key=lambda record: record["__id__"])
+        return records
+
+    def find(self, name):
+        """Search component index record based on his name.
+
+        @param name: component name
+        @return: index record or None if component doesn't exist.
+        """
+        key = str(name).lower()
+        for record in self._select(key):
+            if self._is_current(record):
+                return record
+
+        # Component not found or modified, update index and retry
+        if self.refresh():
+            records = self._select(key)
+            if records:
+                return records[0]
+
+        return None
+
+    def load(self, name):
+        """Load component based on his name.
+
+        @param name: component name
+        @return: Component object or None if component doesn't exist.
+        """
+        record = self.find(name)
+        if record is None:
+            return None
+
+        return Component(path.join(self.basedir, record["filename"]))
+
+    def components(self):
+        """Return index records of all available components, sorted by
+        archive name.
+        """
+        self.refresh()
+        records = [record for record in self._db if record["key"]]
+        records.sort(key=lambda record: record["filename"])
+        return records
+
+# Libraries already opened, indexed by directory
+_LIBRARIES = {}
+
+def get_library(basedir):
+    """Get components library attached to a directory.
+
+    @param basedir: components directory
+    @return: ComponentLibrary object
+    """
+    key = path.normcase(path.realpath(basedir))
+    if not _LIBRARIES.has_key(key):
+        _LIBRARIES[key] = ComponentLibrary(basedir)
+
+    return _LIBRARIES[key]
+
+def find_component(basedir, name):
+    """Find component based on his name.
+
+    @param basedir: components directory
+    @param name: component to find
+    """
+    if isinstance(basedir, basestring) and isinstance(name, basestring):
+        return get_library(basedir).load(name)
+
+    return None
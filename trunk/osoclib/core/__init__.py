@@ -10,4 +10,6 @@ from zipfile        import is_zipfile, ZIP_DEFLATED, ZIP_STORED
 from exception      import Error, ERROR_CRITICAL, ERROR_INFO, ERROR_WARNING
 from utils          import to_boolean, purge_dir, format_table, cmp_stri
 from utils          import full_property
-from wishbone       import WB_SIGNALS, WB_INTERFACES
\ No newline at end of file
+from wishbone       import WB_SIGNALS, WB_INTERFACES
+from manifest       import BuildManifest
+from parallel       import run_parallel
@@ -0,0 +1,241 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     manifest.py
+# Purpose:  Build manifest for incremental output files generation
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Last commit info:
+#
+# $LastChangedDate:: xxxx/xx/xx xx:xx:xx $
+# $Rev::                                 $
+# $Author::                              $
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"Build manifest for incremental output files generation."
+
+__version__     = "1.0"
+
+import os, sys
+import os.path as path
+import threading
+import cPickle
+
+if __name__ == "__main__":
+    # Add base library to load path
+    dirname, base = path.split(path.dirname(path.realpath(__file__)))
+    sys.path.append(dirname)
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
+from StringIO import StringIO
+from thirdparty.PyDbLite import Base
+
+# Increment MANIFEST_VERSION each time generated files format changes.
+MANIFEST_VERSION = "1"
+
+# MANIFEST_FILENAME is the manifest database name, stored in output directory
+MANIFEST_FILENAME = "build.manifest"
+
+# MANIFEST_FIELDS define manifest record fields
+MANIFEST_FIELDS = ("filename", "key", "mtime", "size")
+
+class ManifestFile(StringIO):
+    """Output file buffer, written through build manifest when closed."""
+
+    def __init__(self, manifest, filename, mode):
+        StringIO.__init__(self)
+        self._manifest = manifest
+        self._filename = filename
+        self._mode = mode
+
+    def close(self):
+        if not self.closed:
+            self._manifest.write(self._filename, self.getvalue(),
+                                 mode=self._mode)
+        StringIO.close(self)
+
+class BuildManifest(object):
+    """Output directory build manifest.
+
+    For each generated file, the manifest stores a hash of its inputs
+    (generated content, archive member checksum, etc.) with the file
+    modification time and size. A file is only written again if its inputs
+    changed or if it has been modified since last generation, untouched files
+    keep their modification time.
+
+    Files can be written by several threads at once. Files generated before
+    but neither written nor skipped since manifest creation are removed by
+    purge().
+
+    @param basedir: output directory
+
+    Attributes:
+        written -- names of files written since manifest creation
+        skipped -- names of files left untouched since manifest creation
+        removed -- names of obsolete files removed by purge()
+    """
+
+    def __init__(self, basedir):
+        self.basedir = basedir
+        self.written = []
+        self.skipped = []
+        self.removed = []
+        self._records = {}
+        self._modified = False
+        self._lock = threading.Lock()
+        self._db = Base(path.join(basedir, MANIFEST_FILENAME))
+        try:
+            self._db.create(*MANIFEST_FIELDS, **{"mode" : "open"})
+            if self._db.fields != list(MANIFEST_FIELDS):
+                raise ValueError("Manifest fields mismatch")
+        except (IOError, OSError, EOFError, ValueError, IndexError, KeyError,
+                AttributeError, cPickle.UnpicklingError):
+            # Manifest is unreadable or obsolete, build a new one.
+            try:
+                self._db.create(*MANIFEST_FIELDS, **{"mode" : "override"})
+            except (IOError, OSError):
+                pass
+
+        for record in self._db:
+            self._records[record["filename"]] = record
+
+    def _name(self, filename):
+        """Get manifest record name of a file."""
+        return path.normcase(path.abspath(filename))
+
+    @staticmethod
+    def key(inputs):
+        """Compute manifest key of file inputs."""
+        return md5(MANIFEST_VERSION + inputs).hexdigest()
+
+    def is_current(self, filename, inputs):
+        """Return True if file has been generated from the same inputs and
+        not modified since.
+
+        @param filename: generated file name
+        @param inputs: string identifying file inputs
+        """
+        record = self._records.get(self._name(filename))
+        if record is None or record["key"] != self.key(inputs):
+            return False
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        return (record["mtime"], record["size"]) == (stat.st_mtime,
+                                                     stat.st_size)
+
+    def write(self, filename, data, inputs=None, mode="w"):
+        """Write generated file if its inputs changed.
+
+        @param filename: generated file name
+        @param data: file content
+        @param inputs: string identifying file inputs, file content by default
+        @param mode: file open mode
+        @return: True if file has been written.
+        @raise IOError: if file can't be written
+        """
+        if inputs is None:
+            inputs = data
+
+        if self.is_current(filename, inputs):
+            self._lock.acquire()
+            try:
+                self.skipped.append(filename)
+            finally:
+                self._lock.release()
+            return False
+
+        fd = open(filename, mode)
+        try:
+            fd.write(data)
+        finally:
+            fd.close()
+
+        stat = os.stat(filename)
+        name = self._name(filename)
+        self._lock.acquire()
+        try:
+            record = self._records.get(name)
+            if record is None:
+                _id = self._db.insert(filename=name, key=self.key(inputs),
+                                      mtime=stat.st_mtime, size=stat.st_size)
+                self._records[name] = self._db[_id]
+            else:
+                self._db.update(record, key=self.key(inputs),
+                                mtime=stat.st_mtime, size=stat.st_size)
+            self._modified = True
+            self.written.append(filename)
+        finally:
+            self._lock.release()
+        return True
+
+    def open(self, filename, mode="w"):
+        """Open generated file, file is written by manifest when closed.
+
+        @param filename: generated file name
+        @param mode: file open mode
+        @return: file like object
+        @raise IOError: if file can't be written
+        """
+        # Report write errors now, like open() does
+        fd = open(filename, "ab")
+        fd.close()
+        return ManifestFile(self, filename, mode)
+
+    def purge(self):
+        """Remove files generated before but neither written nor skipped
+        since manifest creation, e.g. files of a component removed from the
+        project. Files modified since their generation are kept, only their
+        record is removed.
+
+        @return: names of removed files
+        """
+        current = dict([(self._name(f), True)
+                        for f in self.written + self.skipped])
+        for (name, record) in self._records.items():
+            if current.has_key(name):
+                continue
+            try:
+                stat = os.stat(name)
+            except OSError:
+                pass
+            else:
+                if (record["mtime"], record["size"]) == (stat.st_mtime,
+                                                         stat.st_size):
+                    try:
+                        os.remove(name)
+                        self.removed.append(name)
+                    except OSError:
+                        pass
+            self._db.delete(record)
+            del self._records[name]
+            self._modified = True
+        return self.removed
+
+    def clear(self):
+        """Forget all generated files, so they will all be written again."""
+        self._db.delete(self._records.values())
+        self._records = {}
+        self._modified = True
+
+    def commit(self):
+        """Save manifest to disk if modified, errors are silently ignored."""
+        if not self._modified:
+            return
+        try:
+            self._db.commit()
+            self._modified = False
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,82 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     parallel.py
+# Purpose:  Run independent tasks with a pool of threads
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Last commit info:
+#
+# $LastChangedDate:: xxxx/xx/xx xx:xx:xx $
+# $Rev::                                 $
+# $Author::                              $
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"Run independent tasks with a pool of threads."
+
+__version__     = "1.0"
+
+import sys
+import threading
+from Queue import Queue, Empty
+
+# DEFAULT_WORKERS is the number of threads used when none is given
+DEFAULT_WORKERS = 4
+
+def run_parallel(tasks, workers=None):
+    """Run tasks with a pool of threads.
+
+    Tasks must be independent, their results are returned in tasks order.
+    When tasks fail, all tasks are completed anyway and exception raised by
+    the first failing task (in tasks order) is raised again.
+
+    @param tasks: list of (function, args) tuples
+    @param workers: number of threads, DEFAULT_WORKERS by default, 1 to run
+                    tasks sequentially in calling thread
+    @return: list of tasks results
+    """
+    tasks = list(tasks)
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    workers = min(workers, len(tasks))
+
+    if workers < 2:
+        return [func(*args) for (func, args) in tasks]
+
+    results = [None] * len(tasks)
+    errors = [None] * len(tasks)
+    queue = Queue()
+    for index in xrange(len(tasks)):
+        queue.put(index)
+
+    def worker():
+        """Run tasks until queue is empty."""
+        while True:
+            try:
+                index = queue.get_nowait()
+            except Empty:
+                return
+
+            (func, args) = tasks[index]
+            try:
+                results[index] = func(*args)
+            except:
+                errors[index] = sys.exc_info()
+
+    threads = [threading.Thread(target=worker) for _ in xrange(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if not error is None:
+            raise error[0], error[1], error[2]
+
+    return results
@@ -85,3 +85,8 @@ class Settings(object):
     def project_dir(self):
         """Return Orchestra Projects default directory."""
         return self._getDir("projects")
+
+    @property
+    def cache_dir(self):
+        """Return Orchestra cache directory."""
+        return self._getDir("cache")
@@ -138,6 +138,7 @@ class ItemBase(object):
 
     def setAttributs(self, attribs):
         keys = self.__dict__["__valid_keys"]
+        old_key = self.itemKey()
         for (key,value) in attribs.items():
             # Remove unused keys
             if value is None:
@@ -149,6 +150,7 @@ class ItemBase(object):
                 self.__dict__[key] = value
             else:
                 pass
+        self.__keyChanged(old_key)
 
     # __getattribute__ is called for each class attribute access.
     def __getattribute__(self, name):
@@ -176,6 +178,7 @@ class ItemBase(object):
         # No direct access to private members ;-)
         if name.startswith('_'):
             return
+        old_key = self.itemKey()
         # Don't add undefined keys
         if value is None:
             # Remove undefined keys if they exist
@@ -185,6 +188,7 @@ class ItemBase(object):
             self.__dict__[name] = value
         elif name in keys:
             self.__dict__[name] = value
+        self.__keyChanged(old_key)
 
     # We don't want to remove attributes
     def __delattr__(self, name):
@@ -194,7 +198,26 @@ class ItemBase(object):
         return self.__dict__["__text"]
 
     def setText(self, value):
+        old_key = self.itemKey()
         self.__dict__["__text"] = value
+        self.__keyChanged(old_key)
+
+    def itemKey(self):
+        """Get caseless key used to find item: name attribute or text."""
+        if self.__dict__.has_key("name"):
+            key = self.__dict__["name"]
+        else:
+            key = self.__dict__["__text"]
+
+        if isinstance(key, basestring):
+            return key.lower()
+        return None
+
+    def __keyChanged(self, old_key):
+        """Update owner node index if item has been renamed."""
+        owner = self.__dict__.get("__owner")
+        if not owner is None and old_key != self.itemKey():
+            owner._rename(self, old_key)
 
     def isItem(self, item):
         if isinstance(item, basestring):
@@ -232,11 +255,16 @@ class NodeBase(object):
         self._valid_keys = valid_keys
         self._default_key = default_key
         self._data = []
+        self._index = {}
         self._node_name = node_name
         self._sub_nodes = None
 
     def __getitem__(self, idx):
-        index = self.__getIndexOf(idx)
+        element = self.__findElement(idx)
+        if not element is None:
+            return element
+
+        index = self.__toIndex(idx)
         if index < 0:
             return ItemBase()
         return self._data[index]
@@ -245,6 +273,7 @@ class NodeBase(object):
         index = self.__getIndexOf(idx)
         if index >= 0:
             self._data[index] = value
+            self.__reindex()
 
     def __delitem__(self, key):
         pass
@@ -253,14 +282,11 @@ class NodeBase(object):
         return len(self._data)
 
     def __contains__(self, item):
-        if self._default_key is None:
-            return item in self._data
-        else:
-            retval = False
-            for element in self._data:
-                data = element[0]
-                retval = retval or (item == data[self._default_key])
-            return retval
+        """Search element by caseless name, by item object or element."""
+        if isinstance(item, tuple) and item:
+            element = self.__findElement(item[0])
+            return not element is None and element == item
+        return not self.__findElement(item) is None
 
     def __iter__(self):
         for data in self._data:
@@ -273,18 +299,71 @@ class NodeBase(object):
     def __str__(self):
         return self._node_name
 
-    def __getIndexOf(self, item):
-        # Scan _data collection and search match with element name
-        for data in self._data:
-            if data[0].isItem(item):
-                return self._data.index(data)
+    def __findElement(self, item):
+        """Search element by caseless name or by item object."""
+        if isinstance(item, basestring):
+            elements = self._index.get(item.lower())
+            if elements:
+                return elements[0]
+        elif isinstance(item, ItemBase):
+            for element in self._index.get(item.itemKey(), ()):
+                if element[0] is item:
+                    return element
+            # Item may have been renamed while owned by another node
+            for element in self._data:
+                if element[0] is item:
+                    return element
+        return None
 
-        # Verify if item is an integer
+    def __toIndex(self, item):
+        """Verify if item is an integer."""
         try:
             return int(item)
         except:
             return -1
 
+    def __getIndexOf(self, item):
+        element = self.__findElement(item)
+        if element is None:
+            return self.__toIndex(item)
+
+        for (index, data) in enumerate(self._data):
+            if data is element:
+                return index
+        return -1
+
+    def __reindex(self):
+        """Rebuild names index from elements list."""
+        self._index = {}
+        for element in self._data:
+            if isinstance(element[0], ItemBase):
+                element[0].__dict__["__owner"] = self
+                key = element[0].itemKey()
+            else:
+                key = None
+            self._index.setdefault(key, []).append(element)
+
+    def _rename(self, item, old_key):
+        """Move item to its new key in names index."""
+        elements = self._index.get(old_key, [])
+        for element in elements:
+            if element[0] is item:
+                break
+        else:
+            # Item is no more in this node
+            return
+
+        elements.remove(element)
+        if not elements:
+            del self._index[old_key]
+
+        key = item.itemKey()
+        if self._index.has_key(key):
+            # Keep elements with the same name in declaration order
+            self.__reindex()
+        else:
+            self._index[key] = [element]
+
     def add(self, text=None, attrib={}, **extra):
         attrib = attrib.copy()
         attrib.update(extra)
@@ -310,6 +389,8 @@ class NodeBase(object):
         
         element = item, sub_nodes        
         self._data.append(element)
+        item.__dict__["__owner"] = self
+        self._index.setdefault(item.itemKey(), []).append(element)
         
         return element
 
@@ -319,20 +400,36 @@ class NodeBase(object):
         if idx >= 0:
             item = self._data[idx]
             del self._data[idx]
+            if isinstance(item[0], ItemBase):
+                key = item[0].itemKey()
+            else:
+                key = None
+            elements = self._index.get(key, [])
+            for (index, element) in enumerate(elements):
+                if element is item:
+                    del elements[index]
+                    break
+            if not elements:
+                self._index.pop(key, None)
         
         return item
 
     def hasElement(self, item):
-        return self.__getIndexOf(item) >= 0
+        if not self.__findElement(item) is None:
+            return True
+        return self.__toIndex(item) >= 0
     
     def getElement(self, item):
-        idx = self.__getIndexOf(item)
-        if idx >= 0:
-            return self._data[idx]    
-        return None
+        element = self.__findElement(item)
+        if element is None:
+            idx = self.__toIndex(item)
+            if idx >= 0:
+                element = self._data[idx]    
+        return element
     
     def clear(self):
         self._data = []
+        self._index = {}
 
     def setSubNobes(self, sub_nodes):
         self._sub_nodes = sub_nodes
@@ -472,3 +569,72 @@ class XmlFileBase(object):
 
     def __str__(self):
         return self.asXML()
+
+def _linear_find(node, item):
+    """Reference linear search, like NodeBase did before names index."""
+    for data in node:
+        if data[0].isItem(item):
+            return data
+    return None
+
+def main():
+    """Benchmark NodeBase lookups on a synthetic project.
+
+    Project.check() like lookups (interface links in wires and clocks) are
+    done with names index and with reference linear search. Components
+    count can be given as argument, 1000 is used by default.
+    """
+    import sys, time
+
+    count = 1000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    nodes = {
+        "wires"      : ("name", "type"),
+        "clocks"     : ("name", "frequency", "type"),
+        "components" : {"subnodes" : {"interfaces" : ("name", "link")},
+                        "attribs" : ("name", "base")}
+    }
+    project = XmlFileBase(nodes, {"name" : ""})
+
+    start = time.time()
+    for idx in range(count):
+        project.wires.add(name="Wire%d" % idx, type="wb")
+        project.clocks.add(name="Clk%d" % idx, type="static")
+        (_, subnodes) = project.components.add(name="cp%d" % idx, base="pwm")
+        subnodes["interfaces"].add(name="s1", link="wire%d" % idx)
+        subnodes["interfaces"].add(name="c1", link="CLK%d" % idx)
+    print "%d components, %d wires, %d clocks built in %.3fs" % (count,
+                                count, count, time.time() - start)
+
+    links = [iface.link for (_, subnodes) in project.components
+                        for iface in subnodes["interfaces"].iteritems()
+            ]
+
+    start = time.time()
+    indexed = [project.wires.getElement(link) or 
+               project.clocks.getElement(link) for link in links]
+    print "Indexed lookups: %.3fs" % (time.time() - start)
+
+    start = time.time()
+    linear = [_linear_find(project.wires, link) or 
+              _linear_find(project.clocks, link) for link in links]
+    print "Linear lookups:  %.3fs" % (time.time() - start)
+
+    # Renamed items must be found with their new name only
+    start = time.time()
+    for item in project.wires.iteritems():
+        item.name = "bus_" + item.name
+    renamed = [project.wires.hasElement("BUS_" + link) and 
+               not project.wires.hasElement(link) 
+                 for link in links if link.startswith("wire")]
+    print "Renaming:        %.3fs" % (time.time() - start)
+
+    if indexed != linear or None in indexed or False in renamed:
+        print "*** Indexed and linear lookups mismatch!"
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
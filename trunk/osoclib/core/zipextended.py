@@ -26,12 +26,16 @@ __version__ = "1.0.0"
 __versionTime__ = "xx/xx/xxxx"
 __author__ = "Fabrice MOUSSET <fabrice.mousset@laposte.net>"
 
-from zipfile import ZipFile, is_zipfile, ZipInfo, ZIP_DEFLATED
+from zipfile import ZipFile, is_zipfile, ZipInfo, ZIP_DEFLATED, BadZipfile
+from zipfile import structFileHeader, stringFileHeader
 import os.path as ospath
 import os
 import glob
 import time
 import re
+import struct
+import mmap
+import tempfile
 
 # Try to include cStringIO if avialable, is quiet faster than StringIO
 try:
@@ -77,22 +81,136 @@ def filter(items, patterns):
     antiresult.sort()
     return(result,antiresult)
 
-class _ZipString(ZipFile):
-    def __init__(self, zip_string):
-        buffer = StringIO()
-        if zip_string:
-            if is_zipfile(zip_string):
-                fp = open(zip_string, "rb")
-                while 1:
-                    data = fp.read(1024 * 8)
-                    if not data:
-                        break
-                    buffer.write(data)
-                fp.close()
-            else:
-                buffer.write(zip_string)
+# Data descriptor signature, optional after compressed data
+_DATA_DESCRIPTOR = "PK\007\010"
+
+def raw_entry(fp, zinfo):
+    """Read archive member local header and compressed data, as stored.
+
+    @param fp: archive file object
+    @param zinfo: member ZipInfo object
+    @return: member bytes string
+    """
+    fp.seek(zinfo.header_offset, 0)
+    data = fp.read(30)
+    if data[0:4] != stringFileHeader:
+        raise BadZipfile, "Bad magic number for file header"
+
+    # Skip file name and extra field to compressed data
+    fheader = struct.unpack(structFileHeader, data)
+    data += fp.read(fheader[10] + fheader[11] + zinfo.compress_size)
+    if zinfo.flag_bits & 0x08:
+        # Data descriptor follows compressed data
+        descriptor = fp.read(4)
+        if descriptor == _DATA_DESCRIPTOR:
+            descriptor += fp.read(12)
+        else:
+            descriptor += fp.read(8)
+        data += descriptor
+    return data
 
-        ZipFile.__init__(self, buffer, 'a', compression=ZIP_DEFLATED)
+class ZipBatch(object):
+    """Batch of changes to an ExtendedZipFile archive.
+
+    New members are compressed when added to the batch, archive is only
+    modified by commit(): members stored before the first removed or
+    replaced one are left in place, following members are moved with their
+    compressed data copied verbatim, then new members and central directory
+    are written.
+
+    @param zfile: ExtendedZipFile object, opened in append mode
+    """
+
+    def __init__(self, zfile):
+        self._zfile = zfile
+        self.rollback()
+
+    def rollback(self):
+        """Discard all pending changes."""
+        self._staging = ZipFile(StringIO(), "w", 
+                                compression=self._zfile.compression)
+        self._added = {}
+        self._order = []
+        self._removed = set()
+
+    def _stage(self, zinfo):
+        """Register new member, replacing previous one with same name."""
+        if zinfo.filename in self._added:
+            self._order.remove(zinfo.filename)
+        self._added[zinfo.filename] = zinfo
+        self._order.append(zinfo.filename)
+
+    def write(self, filename, arcname=None, compress_type=None):
+        """Add file to archive, replacing existing member."""
+        self._staging.write(filename, arcname, compress_type)
+        self._stage(self._staging.filelist[-1])
+
+    def writestr(self, zinfo_or_arcname, bytes):
+        """Add string to archive, replacing existing member."""
+        self._staging.writestr(zinfo_or_arcname, bytes)
+        self._stage(self._staging.filelist[-1])
+
+    def remove(self, name):
+        """Remove member from archive."""
+        name = name.replace("\\", '/')
+        if name in self._added:
+            del self._added[name]
+            self._order.remove(name)
+        self._removed.add(name)
+
+    def commit(self):
+        """Apply all pending changes to archive."""
+        zfile = self._zfile
+        if not zfile.mode in ("w", "a"):
+            return
+
+        names = self._removed.union(self._added)
+        zfile.flush()
+        try:
+            zfile._reload()
+            cut = zfile.start_dir
+        except BadZipfile:
+            # Nothing written yet in archive
+            zfile.fp.seek(0, 2)
+            cut = zfile.fp.tell()
+
+        # Members are kept in place up to the first modified one
+        members = zfile.filelist[:]
+        members.sort(key=lambda zinfo: zinfo.header_offset)
+        for zinfo in members:
+            if zinfo.filename in names:
+                cut = zinfo.header_offset
+                break
+
+        kept = [zinfo for zinfo in members if zinfo.header_offset < cut]
+        moved = [zinfo for zinfo in members if zinfo.header_offset >= cut 
+                                           and not zinfo.filename in names]
+        if not moved and not self._added and len(kept) == len(members):
+            self.rollback()
+            return
+
+        # Build archive tail before any modification
+        tail = StringIO()
+        entries = []
+        for zinfo in moved:
+            entries.append((zinfo, raw_entry(zfile.fp, zinfo)))
+        for name in self._order:
+            zinfo = self._added[name]
+            entries.append((zinfo, raw_entry(self._staging.fp, zinfo)))
+        for (zinfo, data) in entries:
+            zinfo.header_offset = cut + tail.tell()
+            tail.write(data)
+
+        zfile.fp.seek(cut, 0)
+        zfile.fp.write(tail.getvalue())
+        zfile.filelist = kept + [zinfo for (zinfo, _) in entries]
+        zfile.NameToInfo = dict((zinfo.filename, zinfo) 
+                                for zinfo in zfile.filelist)
+        zfile._didModify = True
+        zfile.flush()
+        zfile.fp.truncate()
+        zfile._reload()
+        self.rollback()
 
 class ExtendedZipFile(ZipFile):
     def createDirectory(self, dirname):
@@ -154,6 +272,10 @@ class ExtendedZipFile(ZipFile):
 
         self.removeFile(patterns)
 
+    def batch(self):
+        """Start a batch of changes, applied by ZipBatch.commit()."""
+        return ZipBatch(self)
+
     def removeFile(self, filepatterns):
         if not self.mode in ("w", "a"):
             return
@@ -167,56 +289,90 @@ class ExtendedZipFile(ZipFile):
         if not lst:
             return
 
-        zramfile = _ZipString("")
-        self.flush()
-        for item in antilst:
-            item = item.replace("\\", '/')
-            info = self.getinfo(item)
-            data = self.read(item)
-            zramfile.writestr(info, data)
-
-        zramfile.flush()
-
-        if isinstance(self.fp, file):
-            self.fp.close()
-            self.fp = open(self.filename, "wb")
-            zramfile.fp.seek(0,0)
-            while 1:
-                data = zramfile.fp.read(1024 * 8)
-                if not data:
-                    break
-                self.fp.write(data)
-
-            self.fp.close()
-            modeDict = {'r' : 'rb', 'w': 'wb', 'a' : 'r+b'}
-            self.fp = open(self.filename, modeDict[self.mode])
-            zramfile.close()
-        else:
-            self.fp.close()
-            self.fp = zramfile.fp
-            zramfile.fp = None
-
-        self._reload()
+        batch = self.batch()
+        for item in lst:
+            batch.remove(item)
+        batch.commit()
 
     def update(self, filename, file):
         if not self.mode in ("w", "a"):
             return
 
-        if filename in self.namelist():
-            self.removeFile(filename)
-        self.write(file, filename, ZIP_DEFLATED)
+        batch = self.batch()
+        batch.write(file, filename, ZIP_DEFLATED)
+        batch.commit()
 
     def updatestr(self, filename, bytes):
         if not self.mode in ("w", "a"):
             return
 
-        if filename in self.namelist():
-            self.removeFile(filename)
+        batch = self.batch()
         zinfo = ZipInfo(filename, time.localtime()[0:6])
-        self.writestr(zinfo, bytes)
+        batch.writestr(zinfo, bytes)
+        batch.commit()
+
+class _MappedFile(object):
+    """Read-only file object over a memory mapped file."""
+
+    def __init__(self, fp):
+        self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self._map) - self._map.tell()
+        return self._map.read(size)
+
+    def seek(self, offset, whence=0):
+        self._map.seek(offset, whence)
+
+    def tell(self):
+        return self._map.tell()
+
+    def getvalue(self):
+        return self._map[:]
+
+    def close(self):
+        self._map.close()
+
+def _writable(method):
+    """Method decorator, read-only ZipString is copied in memory before
+    being modified.
+    """
+    def promote(zfile, *args, **kwargs):
+        zfile.promote()
+        # pylint: disable-msg=W0142
+        return method(zfile, *args, **kwargs)
+    
+    promote.__doc__ = method.__doc__
+    return promote
 
 class ZipString(ExtendedZipFile):
+    """ZIP archive kept in memory, so it can be modified without changing
+    the original file.
+
+    Archive file is first mapped read-only: only central directory is read
+    and members are decompressed on demand. Archive is copied into a memory
+    buffer by the first modification. Archive files are never rewritten in
+    place but replaced by saveAs(), so other ZipString objects mapping the
+    same file keep reading the previous content.
+    """
+
+    _mapping = None
+
     def __init__(self, zip_string):
+        if zip_string and is_zipfile(zip_string):
+            fp = open(zip_string, "rb")
+            try:
+                self._mapping = _MappedFile(fp)
+            except (EnvironmentError, ValueError):
+                self._mapping = None
+            fp.close()
+
+            if not self._mapping is None:
+                ExtendedZipFile.__init__(self, self._mapping, 'r', 
+                                         compression=ZIP_DEFLATED)
+                return
+
         iobuffer = StringIO()
         if zip_string:
             if is_zipfile(zip_string):
@@ -232,19 +388,73 @@ class ZipString(ExtendedZipFile):
 
         ExtendedZipFile.__init__(self, iobuffer, 'a', compression=ZIP_DEFLATED)
 
+    def promote(self):
+        """Copy read-only mapped archive into a writable memory buffer."""
+        if self._mapping is None:
+            return
+
+        iobuffer = StringIO()
+        iobuffer.write(self._mapping.getvalue())
+        self._unmap()
+        ExtendedZipFile.__init__(self, iobuffer, 'a', compression=ZIP_DEFLATED)
+
+    def _unmap(self):
+        """Release archive file mapping."""
+        if not self._mapping is None:
+            self._mapping.close()
+            self._mapping = None
+
+    def close(self):
+        ExtendedZipFile.close(self)
+        self._unmap()
+
+    write = _writable(ExtendedZipFile.write)
+    writestr = _writable(ExtendedZipFile.writestr)
+    removeDirectory = _writable(ExtendedZipFile.removeDirectory)
+    removeFile = _writable(ExtendedZipFile.removeFile)
+    update = _writable(ExtendedZipFile.update)
+    updatestr = _writable(ExtendedZipFile.updatestr)
+    batch = _writable(ExtendedZipFile.batch)
+
+    @_writable
     def saveAs(self, filename):
+        """Write archive to a temporary file, then replace filename by it."""
         self.flush()
         if self.fp is None:
             return
 
-        fp = open(filename, "w+b")
-        self.fp.seek(0,0)
-        while 1:
-            buf = self.fp.read(1024 * 8)
-            if not buf:
-                break
-            fp.write(buf)
-        fp.close()
+        dirname, basename = ospath.split(ospath.abspath(filename))
+        (handle, tmpname) = tempfile.mkstemp(prefix=basename + ".", 
+                                             dir=dirname)
+        try:
+            fp = os.fdopen(handle, "w+b")
+            try:
+                self.fp.seek(0,0)
+                while 1:
+                    buf = self.fp.read(1024 * 8)
+                    if not buf:
+                        break
+                    fp.write(buf)
+            finally:
+                fp.close()
+
+            # mkstemp() creates a private file, keep archive permissions
+            if ospath.exists(filename):
+                os.chmod(tmpname, os.stat(filename).st_mode & 07777)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmpname, 0666 & ~umask)
+
+            try:
+                os.rename(tmpname, filename)
+            except OSError:
+                # Windows can't rename over an existing file
+                os.remove(filename)
+                os.rename(tmpname, filename)
+        finally:
+            if ospath.exists(tmpname):
+                os.remove(tmpname)
         self._reload()
 
 
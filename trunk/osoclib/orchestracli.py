@@ -33,16 +33,51 @@ if __name__ == "__main__":
     dirname, base = dir.split(dir.dirname(dir.realpath(__file__)))
     sys.path.append(dirname)
 
-from core import BaseCli
+import os
+import os.path as path
+
+from core import BaseCli, Settings
 from components import ComponentsCli
 from projects import ProjectsCli
 from targets import TargetsCli
+from vhdl import ENTITY_CACHE
+
+# Getting access to application settings
+settings = Settings()
 
 class OrchestraCli(BaseCli):
     intro = """
         Orchestra command line interpreter.
         Type ? for help.\n"""
 
+    def __init__(self, *args, **kwargs):
+        BaseCli.__init__(self, *args, **kwargs)
+
+        # Keep parsed VHDL entities between sessions
+        cache_dir = settings.cache_dir
+        try:
+            if not path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+        except OSError:
+            pass
+        else:
+            ENTITY_CACHE.attach(path.join(cache_dir, "entities.db"))
+
+    def postloop(self):
+        """Save entities cache before exiting."""
+        BaseCli.postloop(self)
+        ENTITY_CACHE.commit()
+
+    def do_cache(self, arg):
+        """cache [clear] : Display VHDL entities cache statistics.
+
+        no arg -> display number of entities, hits and misses.
+        clear  -> remove all entities from cache.
+        """
+        if str(arg).strip().lower() == "clear":
+            ENTITY_CACHE.clear()
+        self.write("Entities cache: %s.\n" % ENTITY_CACHE)
+
     def do_components(self, arg):
         """components [arg] : Orchestra Ready Components management commands.
 
@@ -32,7 +32,7 @@ import os.path as path
 
 from core import BaseCli, ArgsSet, Settings, purge_dir, format_table
 from projects import Project, ProjectError
-from components import Component, find_component
+from components import Component, find_component, get_library
 
 NAME_ARGS = ArgsSet(name=None)
 FILE_ARGS = ArgsSet(name=None, force=False)
@@ -213,12 +213,9 @@ class ProjectsComponentCli(BaseCli):
         # pylint: disable-msg=W0613
         titles = ["name", "version", "category"]
         rows = []
-        comp_dir = settings.components_dir
-        for fname in os.listdir(comp_dir):
-            name = path.join(comp_dir, fname)
-            if(path.isfile(name)):
-                cp = Component(name)
-                rows.append([cp.name, cp.version, cp.category])
+        library = get_library(settings.components_dir)
+        for cp in library.components():
+            rows.append([cp["name"], cp["version"], cp["category"]])
         self.write("\n".join(format_table(titles, rows)))
         self.write("\n")
 
@@ -684,13 +681,26 @@ only a point.
 
     def do_check(self, arg):
         """\nCheck current project for errors.
+        
+        check [workers]
+        
+            no arg  -> base IP are parsed by one process per processor.
+            workers -> number of processes used to parse base IP.
         """
-        # pylint: disable-msg=W0613
         if not settings.active_project:
             self.write('*** No open project, action canceled.\n')
             return
         
-        errors = settings.active_project.check(settings.components_dir)
+        workers = None
+        if str(arg).strip():
+            try:
+                workers = int(str(arg).strip())
+            except ValueError:
+                self.write("*** Parameters error, operation canceled.\n")
+                return
+        
+        errors = settings.active_project.check(settings.components_dir,
+                                               workers)
         if len(errors) == 0:
             self.write("No errors.\n")
             return
@@ -703,10 +713,10 @@ only a point.
     def do_compile(self, arg):
         """\nGenerate System on Chip.
         
-        compile [arg]
+        compile [all]
         
-            no arg -> compile project in default directory.
-            arg    -> compile in specified directory. 
+            no arg -> compile project, only modified files are written.
+            all    -> purge output directory and write all files. 
         """
         # pylint: disable-msg=W0613
         if not settings.active_project:
@@ -729,13 +739,18 @@ only a point.
         
         # 2. Create/purge project directory
         out_dir = path.join(path.dirname(settings.active_project.filename), "output")
-        if path.exists(out_dir):
-            purge_dir(out_dir)
-        else:        
+        rebuild = str(arg).strip().lower() == "all"
+        if not path.exists(out_dir):
             os.makedirs(out_dir)
+        elif rebuild:
+            purge_dir(out_dir)
         
         # 3. Call compilation routine
-        settings.active_project.compile(settings.components_dir, out_dir)
+        manifest = settings.active_project.compile(settings.components_dir,
+                                                   out_dir, rebuild)
+        self.write("INFO: %d file(s) written, %d file(s) unchanged, "
+                   "%d file(s) removed.\n" % (len(manifest.written),
+                   len(manifest.skipped), len(manifest.removed)))
     
     def do_wires(self, arg):
         """\nSystem on Chip wires manipulation commands.
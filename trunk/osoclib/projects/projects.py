@@ -28,18 +28,29 @@ __versionTime__ = "13/06/2008"
 __author__      = "Fabrice MOUSSET <fabrice.mousset@laposte.net>"
 
 import sys
+import os.path as path
+import pickle
+import cPickle
 
 if __name__ == "__main__":
-    import os.path as path
-
     # Add base library to load path
     dirname, _ = path.split(path.dirname(path.realpath(__file__)))
     sys.path.append(dirname)
 
-from core import XmlFileBase
-from components import find_component
+from core import XmlFileBase, BuildManifest, run_parallel
+from components import find_component, get_library
+from components import read_top_sources, parse_top_entity
 from vhdl import make_top, TopError, make_testbench, TestbenchError
-from vhdl import make_simulation
+from vhdl import make_simulation, ENTITY_CACHE
+
+try:
+    import multiprocessing
+except ImportError:
+    # Python < 2.6, components are checked sequentially
+    multiprocessing = None
+
+# Errors of the pool of processes parsing base IP, see Project._preload
+POOL_ERRORS = (OSError, pickle.PicklingError, cPickle.PicklingError)
 
 # PROJECTS_COMPONENTS_NODES define Project XML file sub-sections and attributes
 # for component section.
@@ -88,7 +99,7 @@ class ProjectError(Exception):
 class ProjectData(object):
     __slots__ = ("name", "path", "components", "wires", "clocks", "externals",
                  "instances", "port_list", "entity", "hdl_files", "soc",
-                 "clock_list")
+                 "clock_list", "manifest", "workers")
     
     def __init__(self, project):
         self.name = project.name
@@ -103,6 +114,8 @@ class ProjectData(object):
         self.port_list = {}
         self.clock_list = {}
         self.entity = None
+        self.manifest = None
+        self.workers = None
 
 class Project(XmlFileBase):
     """Projects management class.
@@ -280,12 +293,82 @@ class Project(XmlFileBase):
         name = str(name).lower()
         return self.components.getElement(name)
     
+    def _preload(self, component_dir, workers=None):
+        """Parse base IP top entities with a pool of worker processes.
+        
+        Only top entities not found in entity cache are parsed, the pool is
+        not started if there are less than two of them. Parsed entities are
+        stored in entity cache, components are then loaded and checked in
+        project order by check().
+        
+        Attributes
+            component_dir - Orchestra IP directory
+            workers - number of processes, processor count by default
+        
+        Returns a warning message if the pool failed, None otherwise.
+        """
+        if multiprocessing is None or not isinstance(component_dir, 
+                                                     basestring):
+            return None
+        
+        if workers is None:
+            try:
+                workers = multiprocessing.cpu_count()
+            except NotImplementedError:
+                workers = 1
+        if workers < 2:
+            return None
+        
+        library = get_library(component_dir)
+        filenames = []
+        for (cp, _) in self.components:
+            record = library.find(cp.base)
+            if record is None:
+                continue
+            filename = path.join(component_dir, record["filename"])
+            if not filename in filenames:
+                filenames.append(filename)
+        if len(filenames) < 2:
+            return None
+        
+        # Only sources missing from entity cache are sent to workers
+        hdl_files = []
+        keys = {}
+        for filename in filenames:
+            for (name, source) in read_top_sources(filename):
+                key = ENTITY_CACHE.key(source)
+                if not keys.has_key(key) and not source in ENTITY_CACHE:
+                    keys[key] = True
+                    hdl_files.append((name, source))
+        
+        workers = min(workers, len(hdl_files))
+        if workers < 2:
+            return None
+        
+        # Entities are then parsed by sequential check
+        try:
+            pool = multiprocessing.Pool(workers)
+            try:
+                results = pool.map(parse_top_entity, hdl_files)
+            finally:
+                pool.close()
+                pool.join()
+        except POOL_ERRORS, error:
+            return "Parallel parsing of base IP failed (%s)." % error
+        
+        for result in results:
+            if not result is None:
+                ENTITY_CACHE.put(*result)
+        return None
+    
     @need_cleanup
-    def check(self, component_dir):
+    def check(self, component_dir, workers=None):
         """Verify project integrity.
         
         Attributes
             component_dir - Orchestra IP directory
+            workers - number of processes used to parse base IP, processor
+                      count by default, 1 to disable parallel parsing
         """
         
         # Clean all caches
@@ -331,6 +414,9 @@ class Project(XmlFileBase):
         #       ??????
         chk_errors = []
         chk_warns = []
+        warning = self._preload(component_dir, workers)
+        if warning:
+            chk_warns.append(warning)
         for (cp, cp_attr) in self.components:
             if project.components.has_key(cp.base):
                 cp_data = project.components[cp.base]
@@ -458,13 +544,25 @@ class Project(XmlFileBase):
             
         self._errors = errors
         self._settings = project
+
+        # Save entities parsed during check
+        ENTITY_CACHE.commit()
         return errors
 
-    def compile(self, component_dir, output_dir):
+    def compile(self, component_dir, output_dir, rebuild=False, workers=None):
         """Generate project output files.
 
+        Output directory contains a build manifest, so only files whose
+        content changed since last compilation are written, and files no
+        longer generated are removed. Components HDL files, syscon and
+        intercons are written by a pool of threads, project.hdl_files order
+        doesn't depend on it.
+
         @param component_dir: Orchestra IP directory
         @param output_dir: Destination directory  
+        @param rebuild: if True, all files are written
+        @param workers: number of threads, 1 to write files sequentially
+        @return: build manifest (core.BuildManifest)
         @raise ProjectError: if any error detected during process 
         """
                 
@@ -480,23 +578,38 @@ class Project(XmlFileBase):
         project = self._settings
         project.path = output_dir
         project.hdl_files = []
-        # pylint: disable-msg=W0621
-        for _, cp in project.components.iteritems():
-            project.hdl_files.extend(cp.extractHDL(output_dir))
-        
-        # 4. Create top module for system on chip
+        project.manifest = BuildManifest(output_dir)
+        project.workers = workers
+        if rebuild:
+            project.manifest.clear()
         try:
-            make_top(project)
-        except TopError, e:
-            raise ProjectError(e.message)
-        
-        # 4: Create compilation project
-        
-        # 5: Create simulation skeleton module
-        try:
-            tb_file = make_testbench(project)
-        except TestbenchError, e:
-            raise ProjectError(e.message)
-        project.hdl_files.append(tb_file)
-        make_simulation(project)
+            # pylint: disable-msg=W0621
+            tasks = [(cp.extractHDL, (output_dir, None, project.manifest))
+                        for _, cp in project.components.iteritems()
+                    ]
+            for hdl_files in run_parallel(tasks, workers):
+                project.hdl_files.extend(hdl_files)
+            
+            # 4. Create top module for system on chip
+            try:
+                make_top(project)
+            except TopError, e:
+                raise ProjectError(e.message)
+            
+            # 4: Create compilation project
+            
+            # 5: Create simulation skeleton module
+            try:
+                tb_file = make_testbench(project)
+            except TestbenchError, e:
+                raise ProjectError(e.message)
+            project.hdl_files.append(tb_file)
+            make_simulation(project)
+
+            # 6: Remove files of previous compilation no longer generated
+            if not rebuild:
+                project.manifest.purge()
+        finally:
+            project.manifest.commit()
+        return project.manifest
         
\ No newline at end of file
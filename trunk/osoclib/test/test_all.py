@@ -0,0 +1,40 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_all.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""Run all Orchestra unit tests."""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import unittest
+
+import test_scanner, test_projects, test_components, test_xmlbase
+import test_cache
+
+modules = (test_scanner, test_projects, test_components, test_xmlbase,
+           test_cache,
+          )
+
+tl = unittest.defaultTestLoader
+def suite():
+    alltests = unittest.TestSuite()
+    for m in modules:
+        alltests.addTest(tl.loadTestsFromModule(m))
+    return alltests
+
+def main():
+    unittest.main(defaultTest='suite',
+                  testRunner=unittest.TextTestRunner(verbosity=2))
+
+if __name__ == '__main__':
+    main()
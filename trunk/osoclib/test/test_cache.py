@@ -0,0 +1,68 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_cache.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""VHDL entity cache unit tests."""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import os.path as path
+import sys
+import shutil
+import tempfile
+
+OSOCLIB_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.insert(0, OSOCLIB_DIR)
+
+import unittest
+from unittest import TestCase
+
+from vhdl.cache import EntityCache
+
+SOURCE = "entity pwm is end entity pwm;"
+ENTITY = ("pwm", [], [], [])
+
+class TestEntityCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = path.join(self.tmpdir, "entities.db")
+        self.cache = EntityCache()
+        self.cache.attach(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testPutTwice(self):
+        """Source stored twice has a single record"""
+        self.cache.put(SOURCE, ENTITY)
+        self.cache.commit()
+        self.cache.put(SOURCE, ENTITY)
+        self.failIf(self.cache._dirty)
+        self.assertEqual(len(self.cache._db), 1)
+
+    def testUpdate(self):
+        """Source stored with a new entity updates its record"""
+        self.cache.put(SOURCE, ENTITY)
+        entity = ("pwm", [], [("clk", "in", "std_logic")], [])
+        self.cache.put(SOURCE, entity)
+        self.cache.commit()
+        self.assertEqual(len(self.cache._db), 1)
+
+        cache = EntityCache()
+        cache.attach(self.filename)
+        self.assertEqual(len(cache._db), 1)
+        self.assertEqual(cache.get(SOURCE), entity)
+
+if __name__ == '__main__':
+    unittest.main()
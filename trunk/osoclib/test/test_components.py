@@ -0,0 +1,68 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_components.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""Component archives unit tests."""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import os
+import os.path as path
+import sys
+import shutil
+import tempfile
+
+OSOCLIB_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+COMPONENTS_DIR = path.join(path.dirname(OSOCLIB_DIR), "components")
+sys.path.insert(0, OSOCLIB_DIR)
+
+import unittest
+from unittest import TestCase
+
+from components import Component
+
+class TestComponent(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = path.join(self.tmpdir, "pwm.zip")
+        shutil.copy(path.join(COMPONENTS_DIR, "pwm.zip"), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testSaveShared(self):
+        """Archive saved while opened by another component"""
+        first = Component(self.filename)
+        second = Component(self.filename)
+        source = second.zfp.read("pwm.vhd")
+
+        # Archive gets shorter than the mapped one
+        first.zfp.updatestr("pwm.vhd", "")
+        first.version = "2.0"
+        first.save(self.filename)
+
+        self.assertEqual(second.zfp.testzip(), None)
+        self.assertEqual(second.zfp.read("pwm.vhd"), source)
+        self.assertEqual(second.version, "1.0")
+
+        third = Component(self.filename)
+        self.assertEqual(third.zfp.read("pwm.vhd"), "")
+        self.assertEqual(third.version, "2.0")
+        self.assertEqual(os.listdir(self.tmpdir), ["pwm.zip"])
+
+        for component in (first, second, third):
+            component.zfp.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_projects.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""Project compilation unit tests."""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import os
+import os.path as path
+import sys
+import shutil
+import tempfile
+import zipfile
+
+OSOCLIB_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+COMPONENTS_DIR = path.join(path.dirname(OSOCLIB_DIR), "components")
+sys.path.insert(0, OSOCLIB_DIR)
+
+import unittest
+from unittest import TestCase
+
+from components import find_component
+from projects import projects
+from projects.projects import Project
+from vhdl import ENTITY_CACHE
+
+def copy_component(src, dst, name):
+    """Copy pwm component archive as a new component called name."""
+    zin = zipfile.ZipFile(src, "r")
+    zout = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
+    for member in zin.namelist():
+        data = zin.read(member)
+        if member == "description.xml":
+            data = data.replace('name="pwm"', 'name="%s"' % name)
+            data = data.replace('name="pwm.vhd"', 'name="%s.vhd"' % name)
+        else:
+            member = "%s.vhd" % name
+            data = data.replace("simple_pwm", "simple_%s" % name)
+        zout.writestr(member, data)
+    zout.close()
+    zin.close()
+
+class TestCompile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.component_dir = path.join(self.tmpdir, "components")
+        self.output_dir = path.join(self.tmpdir, "output")
+        os.mkdir(self.component_dir)
+        os.mkdir(self.output_dir)
+        for name in ("apf9328.zip", "pwm.zip"):
+            shutil.copy(path.join(COMPONENTS_DIR, name), self.component_dir)
+        copy_component(path.join(COMPONENTS_DIR, "pwm.zip"),
+                       path.join(self.component_dir, "pwm2.zip"), "pwm2")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def project(self):
+        """Bridge with two slaves of different base IP."""
+        project = Project()
+        project.addClock("clk", 100000000, "static")
+        project.addWire("bus", "wishbone")
+        for (name, base) in (("imx", "apf9328"), ("pwm0", "pwm"),
+                             ("pwm1", "pwm2")):
+            project.addComponent(name,
+                                 find_component(self.component_dir, base))
+        offsets = {"pwm0" : "16", "pwm1" : "32"}
+        for (cp, attr) in project.components:
+            for iface in attr["interfaces"].iteritems():
+                if iface.name == "c1":
+                    iface.link = "clk"
+                elif iface.name in ("m1", "s1"):
+                    iface.link = "bus"
+                if iface.name == "s1":
+                    iface.offset = offsets[cp.name]
+        return project
+
+    def compile(self, project, rebuild=False):
+        self.assertEqual(project.check(self.component_dir), {})
+        return project.compile(self.component_dir, self.output_dir, rebuild)
+
+    def testRecompile(self):
+        """Unchanged files are not written again"""
+        project = self.project()
+        manifest = self.compile(project)
+        self.assertNotEqual(manifest.written, [])
+        manifest = self.compile(project)
+        self.assertEqual(manifest.written, [])
+        self.assertEqual(manifest.removed, [])
+
+    def testRemoveComponent(self):
+        """Files of removed component are deleted"""
+        project = self.project()
+        self.compile(project)
+        filename = path.join(self.output_dir, "pwm2.vhd")
+        self.failUnless(path.isfile(filename))
+
+        project.removeComponent("pwm1")
+        manifest = self.compile(project)
+        self.failIf(path.exists(filename))
+        self.assertEqual(len(manifest.removed), 1)
+        self.assertEqual(path.basename(manifest.removed[0]), "pwm2.vhd")
+        self.failUnless(path.isfile(path.join(self.output_dir, "pwm.vhd")))
+
+        # Removed file is forgotten by saved manifest
+        manifest = self.compile(project)
+        self.assertEqual(manifest.written, [])
+        self.assertEqual(manifest.removed, [])
+
+    def testPreload(self):
+        """Entities found in cache are not parsed again"""
+        pools = []
+        Pool = projects.multiprocessing.Pool
+        def pool(processes, *args, **kwargs):
+            pools.append(processes)
+            return Pool(processes, *args, **kwargs)
+
+        project = self.project()
+        projects.multiprocessing.Pool = pool
+        try:
+            # Each base IP is parsed once
+            ENTITY_CACHE.clear()
+            project.check(self.component_dir, 4)
+            self.assertEqual(pools, [3])
+            self.assertEqual(ENTITY_CACHE.misses, 0)
+
+            # Nothing left to parse, no pool
+            project.check(self.component_dir, 4)
+            self.assertEqual(pools, [3])
+        finally:
+            projects.multiprocessing.Pool = Pool
+
+    def testPreloadSkipped(self):
+        """Sources are not read for a single process"""
+        reads = []
+        read_top_sources = projects.read_top_sources
+        def read(filename):
+            reads.append(filename)
+            return read_top_sources(filename)
+
+        projects.read_top_sources = read
+        try:
+            self.assertEqual(self.project().check(self.component_dir, 1), {})
+        finally:
+            projects.read_top_sources = read_top_sources
+        self.assertEqual(reads, [])
+
+    def testPreloadError(self):
+        """Pool errors are reported as warnings"""
+        Pool = projects.multiprocessing.Pool
+        def pool(processes, *args, **kwargs):
+            raise OSError(12, "Cannot allocate memory")
+
+        project = self.project()
+        projects.multiprocessing.Pool = pool
+        try:
+            ENTITY_CACHE.clear()
+            errors = project.check(self.component_dir, 4)
+        finally:
+            projects.multiprocessing.Pool = Pool
+        self.assertEqual(errors.keys(), ["Components"])
+        self.assertEqual(len(errors["Components"]), 1)
+        self.failUnless(errors["Components"][0].startswith(
+            "WARN: Parallel parsing of base IP failed"))
+
+    def testModifiedFileKept(self):
+        """Files modified since generation are not deleted"""
+        project = self.project()
+        self.compile(project)
+        filename = path.join(self.output_dir, "pwm2.vhd")
+        fd = open(filename, "a")
+        fd.write("-- user change\n")
+        fd.close()
+
+        project.removeComponent("pwm1")
+        manifest = self.compile(project)
+        self.assertEqual(manifest.removed, [])
+        self.failUnless(path.isfile(filename))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_scanner.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""Compare VHDL entity scanner and pyparsing grammar results.
+
+Entities of bundled components and of MyHDL conversion outputs must be the
+same, or the scanner must give up on them.
+"""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import os.path as path
+import sys
+
+OSOCLIB_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+COMPONENTS_DIR = path.join(path.dirname(OSOCLIB_DIR), "components")
+sys.path.insert(0, OSOCLIB_DIR)
+sys.path.insert(0, path.join(OSOCLIB_DIR, "thirdparty"))
+
+import unittest
+from unittest import TestCase
+
+from myhdl import Signal, intbv, enum, always, always_comb, toVHDL
+from myhdl.conversion._toVHDL import _version
+
+from vhdl.scanner import scan_entity, _sources
+from vhdl.entity import grammar_entity, EntityError
+
+def bin2gray(B, G, width):
+    """Gray encoder, ports are unsigned vectors."""
+    @always_comb
+    def logic():
+        for i in range(width):
+            G.next[i] = B[i+1] ^ B[i]
+    return logic
+
+def neg(a, b):
+    """Negation, ports are signed vectors."""
+    @always_comb
+    def logic():
+        b.next = -a
+    return logic
+
+def Framer(SOF, state, clk, t_State):
+    """State machine, mixed case name and enum type port."""
+    @always(clk.posedge)
+    def logic():
+        SOF.next = 0
+        if state == t_State.SEARCH:
+            state.next = t_State.CONFIRM
+        elif state == t_State.CONFIRM:
+            state.next = t_State.SYNC
+        else:
+            SOF.next = 1
+            state.next = t_State.SEARCH
+    return logic
+
+# MyHDL package file, it has no entity
+PACKAGE = "pck_myhdl_%s.vhd" % _version
+
+def convert(func, *args):
+    """Convert a MyHDL design, return list of (name, source)."""
+    files = {}
+    toVHDL.files = files
+    try:
+        toVHDL(func, *args)
+    finally:
+        toVHDL.files = None
+    return sorted(files.items())
+
+class TestScanner(TestCase):
+
+    def compare(self, sources):
+        """Compare scanner and grammar, return names of scanner fallbacks."""
+        fallbacks = []
+        for (name, source) in sources:
+            try:
+                expected = grammar_entity(source, name)
+            except EntityError:
+                expected = None
+
+            result = scan_entity(source)
+            if result is None:
+                fallbacks.append(path.basename(name.split(":")[-1]))
+                continue
+            self.assertNotEqual(expected, None, name)
+            (identifier, generics, ports, env) = result
+            self.assertEqual(identifier, expected[0], name)
+            self.assertEqual(generics, expected[1], name)
+            self.assertEqual(ports, expected[2], name)
+            self.assertEqual(env, expected[3], name)
+        return fallbacks
+
+    def testComponents(self):
+        """Bundled components entities"""
+        names = [path.join(COMPONENTS_DIR, "apf9328.zip"),
+                 path.join(COMPONENTS_DIR, "pwm.zip")]
+        sources = _sources(names)
+        self.assertEqual(len(sources), 3)
+        fallbacks = self.compare(sources)
+        # testbench package has no entity
+        self.assertEqual(fallbacks, ["apf9328_tb_pkg.vhd"])
+
+    def testMyHDL(self):
+        """MyHDL conversion outputs entities"""
+        t_State = enum("SEARCH", "CONFIRM", "SYNC")
+        B = Signal(intbv(0)[8:])
+        G = Signal(intbv(0)[8:])
+        a = Signal(intbv(0, min=-8, max=8))
+        b = Signal(intbv(0, min=-8, max=8))
+        SOF = Signal(bool(0))
+        state = Signal(t_State.SEARCH)
+        clk = Signal(bool(0))
+
+        sources = convert(bin2gray, B, G, 8)
+        sources.extend(convert(neg, a, b))
+        fallbacks = self.compare(sources)
+        self.assertEqual(fallbacks, [PACKAGE, PACKAGE])
+
+        # Grammar doesn't match mixed case name in END clause
+        sources = convert(Framer, SOF, state, clk, t_State)
+        self.assertEqual([n for (n, s) in sources],
+                         ["Framer.vhd", PACKAGE])
+        (name, source) = sources[0]
+        self.assertEqual(scan_entity(source), None)
+        self.assertRaises(EntityError, grammar_entity, source, name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     test_xmlbase.py
+# Purpose:  Unit tests for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""XML nodes names index unit tests."""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+import os.path as path
+import sys
+
+OSOCLIB_DIR = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.insert(0, OSOCLIB_DIR)
+
+import unittest
+from unittest import TestCase
+
+from core import XmlFileBase
+
+class TestNodeIndex(TestCase):
+
+    def setUp(self):
+        nodes = {"wires" : ("name", "type")}
+        self.project = XmlFileBase(nodes, {"name" : ""})
+        self.wires = self.project.wires
+        for name in ("Bus", "irq", "clk"):
+            self.wires.add(name=name, type="wb")
+
+    def testLookup(self):
+        """Elements are found by caseless name"""
+        self.failUnless("BUS" in self.wires)
+        self.failUnless("bus" in self.wires)
+        self.failIf("reset" in self.wires)
+        (item, _) = self.wires.getElement("IRQ")
+        self.assertEqual(item.name, "irq")
+        self.failUnless(item in self.wires)
+        self.failUnless(self.wires.getElement(item) in self.wires)
+
+    def testRename(self):
+        """Renamed elements are found by their new name only"""
+        (item, _) = self.wires.getElement("bus")
+        item.name = "Wishbone"
+        self.failIf("bus" in self.wires)
+        self.failIf(self.wires.hasElement("bus"))
+        self.failUnless("WISHBONE" in self.wires)
+        self.failUnless(self.wires.getElement("wishbone")[0] is item)
+        self.failUnless(item in self.wires)
+
+    def testRenameDuplicate(self):
+        """Elements with the same name are found in declaration order"""
+        (item, _) = self.wires.getElement("clk")
+        item.name = "BUS"
+        self.assertEqual(self.wires.getElement("bus")[0].name, "Bus")
+        self.wires.remove("bus")
+        self.failUnless(self.wires.getElement("bus")[0] is item)
+
+    def testRemove(self):
+        """Removed elements are not found"""
+        element = self.wires.getElement("irq")
+        self.assertEqual(self.wires.remove("IRQ"), element)
+        self.failIf("irq" in self.wires)
+        self.failIf(element in self.wires)
+        self.failIf(element[0] in self.wires)
+        self.assertEqual(self.wires.getElement("irq"), None)
+        self.assertEqual(len(self.wires), 2)
+
+        # Renaming a removed item doesn't change the node
+        element[0].name = "clk"
+        self.assertEqual(self.wires.getElement("clk")[0].name, "clk")
+        self.failIf(element[0] in self.wires)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,17 +17,61 @@
 #  License along with this library; if not, write to the Free Software
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 
-""" Module that provides the Cosimulation class """
+""" Module that provides the Cosimulation class
+
+Signals are declared by the HDL simulator with text commands, then values
+are exchanged in text messages or, when the simulator ends the declarations
+with "START BINARY" instead of "START", in binary frames.
+
+A binary frame is a header followed by one entry per changed signal. The
+entry is the signal index in its declaration list (2 bytes) followed by the
+value (the signal declared width rounded up to bytes). All numbers are
+little endian.
+  MyHDL to simulator header: time (8 bytes), number of entries (2 bytes)
+  simulator to MyHDL header: time (8 bytes), number of entries (2 bytes)
+In simulator frames, an index with the _UNDEFINED bit set has no value
+bytes, the signal value is undefined.
+
+In binary mode, time steps without a change of the signals sent to the
+simulator are not sent while no MyHDL process waits on a signal driven by
+the simulator: as the simulator has no timing of its own, it can't change
+its outputs. They are batched in the next frame, which holds the current
+time.
+
+"""
 
 
 import sys
 import os
 import exceptions
+import struct
+from binascii import hexlify, unhexlify
 
 from myhdl._intbv import intbv
 from myhdl import _simulator, CosimulationError
 
 _MAXLINE = 4096
+_MAXREAD = 65536
+
+_HEADER = "<QH"
+_HEADERSIZE = struct.calcsize(_HEADER)
+_INDEX = "<H"
+_INDEXSIZE = struct.calcsize(_INDEX)
+_UNDEFINED = 0x8000
+_PADS = ["\0" * i for i in range(9)]
+
+def _packValue(v, n):
+    """ Return natural integer v as n little endian bytes """
+    if n <= 8:
+        return struct.pack("<Q", v)[:n]
+    return unhexlify("%0*x" % (2 * n, v))[::-1]
+
+def _unpackValue(data):
+    """ Return natural integer of little endian bytes """
+    n = len(data)
+    if n <= 8:
+        return struct.unpack("<Q", data + _PADS[8 - n])[0]
+    return long(hexlify(data[::-1]), 16)
 
 class _error:
     pass
@@ -64,6 +108,8 @@ class Cosimulation(object):
 
         self._hasChange = 0
         self._getMode = 1
+        self._binary = False
+        self._frames = 0
 
         child_pid = self._child_pid = os.fork()
 
@@ -117,10 +163,23 @@ class Cosimulation(object):
                 elif e[0] == "START":
                     if not toSignames:
                         raise CosimulationError(_error.NoCommunication)
+                    self._binary = e[1:] == ["BINARY"]
                     os.write(wf, "OK")
                     break
                 else:
                     raise CosimulationError("Unexpected cosim input")
+            if self._binary:
+                self._initBinary()
+
+    def _initBinary(self):
+        self._fromBytes = [(w + 7) // 8 for w in self._fromSizes]
+        self._fromMasks = [(1L << w) - 1 for w in self._fromSizes]
+        self._fromVals = [None] * len(self._fromSigs)
+        self._toBytes = [(w + 7) // 8 for w in self._toSizes]
+        self._buf = ""
+        self._pos = 0
+        self._get = self._getBinary
+        self._put = self._putBinary
 
     def _get(self):
         if not self._getMode:
@@ -160,6 +219,67 @@ class Cosimulation(object):
                     buf = buf[:-1] # strip trailing L
                 buflist.append(buf)
         os.write(self._wf, " ".join(buflist))
+        self._frames += 1
+        self._getMode = 1
+
+    def _recv(self, n):
+        """ Return the next n bytes sent by the simulator """
+        buf, pos = self._buf, self._pos
+        while len(buf) - pos < n:
+            data = os.read(self._rt, _MAXREAD)
+            if not data:
+                raise CosimulationError(_error.SimulationEnd)
+            buf = buf[pos:] + data
+            pos = 0
+        self._buf, self._pos = buf, pos + n
+        return buf[pos:pos+n]
+
+    def _getBinary(self):
+        if not self._getMode:
+            return
+        t, n = struct.unpack(_HEADER, self._recv(_HEADERSIZE))
+        for i in range(n):
+            index, = struct.unpack(_INDEX, self._recv(_INDEXSIZE))
+            if index & _UNDEFINED:
+                s = self._toSigs[index & ~_UNDEFINED]
+                next = intbv(None)
+            else:
+                s = self._toSigs[index]
+                next = _unpackValue(self._recv(self._toBytes[index]))
+                if s._nrbits and s._min is not None and s._min < 0:
+                    if next >= (1 << (s._nrbits-1)):
+                        next |= (-1 << s._nrbits)
+            s.next = next
+        self._getMode = 0
+
+    def _sensitive(self):
+        """ Check if a MyHDL process waits on a signal driven by the
+        simulator.
+        """
+        for s in self._toSigs:
+            if s._eventWaiters or s._posedgeWaiters or s._negedgeWaiters or \
+               s._staticWaiters:
+                return True
+        return False
+
+    def _putBinary(self, time):
+        if not self._hasChange and not self._sensitive():
+            return # batched in next frame
+        entries = []
+        if self._hasChange:
+            self._hasChange = 0
+            vals = self._fromVals
+            for i, s in enumerate(self._fromSigs):
+                v = int(s._val)
+                if v != vals[i]:
+                    vals[i] = v
+                    entries.append(struct.pack(_INDEX, i) +
+                                   _packValue(v & self._fromMasks[i],
+                                              self._fromBytes[i]))
+        data = struct.pack(_HEADER, time, len(entries)) + "".join(entries)
+        while data:
+            data = data[os.write(self._wf, data):]
+        self._frames += 1
         self._getMode = 1
 
     def _waiter(self):
@@ -31,11 +31,10 @@ from inspect import currentframe, getouterframes
 from copy import deepcopy as copy
 
 from myhdl import _simulator as sim
-from myhdl._simulator import _signals, _siglist, _futureEvents, now
+from myhdl._simulator import _signals, _siglist, _schedule, now
 from myhdl._intbv import intbv
 from myhdl._bin import bin
 
-_schedule = _futureEvents.append
 
    
 def _isListOfSigs(obj):
@@ -94,7 +93,8 @@ class Signal(object):
     __slots__ = ('_next', '_val', '_min', '_max', '_type', '_init',
                  '_eventWaiters', '_posedgeWaiters', '_negedgeWaiters',
                  '_code', '_tracing', '_nrbits', '_checkVal', '_setNextVal',
-                 '_printVcd', '_driven' ,'_read', '_name', '_used', '_inList'
+                 '_printVcd', '_driven' ,'_read', '_name', '_used', '_inList',
+                 '_vcdFmt', '_staticWaiters'
                 )
 
     def __new__(cls, val=None, delay=None):
@@ -132,7 +132,11 @@ class Signal(object):
             self._min = val._min
             self._max = val._max
             self._nrbits = val._nrbits
-            self._setNextVal = self._setNextIntbv
+            if self._nrbits and self._min == 0 and \
+               self._max == 1 << self._nrbits:
+                self._setNextVal = self._setNextUnsigned
+            else:
+                self._setNextVal = self._setNextIntbv
             if self._nrbits:
                 self._printVcd = self._printVcdVec
             else:
@@ -148,7 +152,9 @@ class Signal(object):
         self._eventWaiters = _WaiterList()
         self._posedgeWaiters = _PosedgeWaiterList(self)
         self._negedgeWaiters = _NegedgeWaiterList(self)
+        self._staticWaiters = []
         self._code = ""
+        self._vcdFmt = None
         self._tracing = 0
         _signals.append(self)
 
@@ -156,27 +162,46 @@ class Signal(object):
         del self._eventWaiters[:]
         del self._posedgeWaiters[:]
         del self._negedgeWaiters[:]
+        for w in self._staticWaiters:
+            w.registered = w.queued = 0
+        del self._staticWaiters[:]
         self._next = self._val = self._init
         self._name = self._read = self._driven = None
         
     def _update(self):
         val, next = self._val, self._next
         if val != next:
-            waiters = self._eventWaiters[:]
-            del self._eventWaiters[:]
-            if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
-                del self._posedgeWaiters[:]
-            elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
-                del self._negedgeWaiters[:]
             self._val = next
             if self._tracing:
                 self._printVcd()
-            return waiters
+            return self._triggered(val, next)
         else:
             return []
 
+    def _triggered(self, val, next):
+        """ Return waiters triggered by a change from val to next.
+
+        The event waiter list is handed over instead of being copied, edge
+        waiter lists are kept as they can be referenced by waiters. Each
+        static waiter is only queued once until it runs.
+
+        """
+        waiters = self._eventWaiters
+        self._eventWaiters = _WaiterList()
+        if not val and next:
+            if self._posedgeWaiters:
+                waiters.extend(self._posedgeWaiters)
+                del self._posedgeWaiters[:]
+        elif not next and val:
+            if self._negedgeWaiters:
+                waiters.extend(self._negedgeWaiters)
+                del self._negedgeWaiters[:]
+        for w in self._staticWaiters:
+            if not w.queued:
+                w.queued = 1
+                waiters.append(w)
+        return waiters
+
     # support for the 'val' attribute
     def _get_val(self):
         return self._val
@@ -248,10 +273,26 @@ class Signal(object):
         elif not isinstance(val, (int, long)):
             raise TypeError("Expected int or intbv, got %s" % type(val))
         if self._next is self._val:
-            self._next = copy(self._val)
+            self._next = self._val.__copy__()
         self._next._val = val
         self._next._checkBounds()
 
+    def _setNextUnsigned(self, val):
+        """ _setNextIntbv for fixed width unsigned values: bounds are the
+        signal bounds, they are checked before the value is copied.
+        """
+        if isinstance(val, intbv):
+            val = val._val
+        elif not isinstance(val, (int, long)):
+            raise TypeError("Expected int or intbv, got %s" % type(val))
+        if not 0 <= val < self._max:
+            if val < 0:
+                raise ValueError("intbv value %s < minimum 0" % val)
+            raise ValueError("intbv value %s >= maximum %s" % (val, self._max))
+        if self._next is self._val:
+            self._next = self._val.__copy__()
+        self._next._val = val
+
     def _setNextType(self, val):
         if not isinstance(val, self._type):
             raise TypeError("Expected %s, got %s" % (self._type, type(val)))
@@ -261,17 +302,30 @@ class Signal(object):
         self._next = val
 
     # vcd print methods
+    # VCD output
+    def _trace(self, code):
+        """ Enable tracing with VCD identifier code """
+        self._tracing = 1
+        self._code = code
+        if self._printVcd == self._printVcdBit:
+            self._vcdFmt = ("0%s\n" % code, "1%s\n" % code)
+        else:
+            self._vcdFmt = " %s\n" % code
+
     def _printVcdStr(self):
-        print >> sim._tf, "s%s %s" % (str(self._val), self._code)
+        sim._tf.write("s%s%s" % (str(self._val), self._vcdFmt))
         
     def _printVcdHex(self):
-        print >> sim._tf, "s%s %s" % (hex(self._val), self._code)
+        sim._tf.write("s%s%s" % (hex(self._val), self._vcdFmt))
 
     def _printVcdBit(self):
-        print >> sim._tf, "%d%s" % (self._val, self._code)
+        if self._val:
+            sim._tf.write(self._vcdFmt[1])
+        else:
+            sim._tf.write(self._vcdFmt[0])
 
     def _printVcdVec(self):
-        print >> sim._tf, "b%s %s" % (bin(self._val, self._nrbits), self._code)
+        sim._tf.write("b%s%s" % (bin(self._val, self._nrbits), self._vcdFmt))
 
     ### operators for which delegation to current value is appropriate ###
         
@@ -494,18 +548,10 @@ class DelayedSignal(Signal):
     def _apply(self, next, timeStamp):
         val = self._val
         if timeStamp == self._timeStamp and val != next:
-            waiters = self._eventWaiters[:]
-            del self._eventWaiters[:]
-            if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
-                del self._posedgeWaiters[:]
-            elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
-                del self._negedgeWaiters[:]
             self._val = copy(next)
             if self._tracing:
                 self._printVcd()
-            return waiters            
+            return self._triggered(val, next)
         else:
             return []
 
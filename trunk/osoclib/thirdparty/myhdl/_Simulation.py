@@ -25,23 +25,27 @@ import os
 from warnings import warn
 from types import GeneratorType
 from sets import Set
+from heapq import heappop
 
 from myhdl import Cosimulation, StopSimulation, _SuspendSimulation
 from myhdl import _simulator, SimulationError
-from myhdl._simulator import _signals, _siglist, _futureEvents
+from myhdl._simulator import _signals, _siglist, _futureEvents, _schedule
 from myhdl._Waiter import _Waiter, _inferWaiter, _SignalWaiter,_SignalTupleWaiter
 from myhdl._util import _flatten, _printExcInfo
 from myhdl._instance import _Instantiator
+from myhdl._profile import Profile
+from myhdl._checkpoint import _checkpoint, _restore
 
 
 
-schedule = _futureEvents.append
+schedule = _schedule
 
 class _error:
     pass
 _error.ArgType = "Inappriopriate argument type"
 _error.MultipleCosim = "Only a single cosimulator argument allowed"
 _error.DuplicatedArg = "Duplicated argument"
+_error.NoAccelerator = "Accelerated kernel not available"
             
 class Simulation(object):
 
@@ -49,6 +53,12 @@ class Simulation(object):
 
     Methods:
     run -- run a simulation for some duration
+    runProfiled -- run a simulation and record a profile
+    checkpoint -- save the state of a suspended simulation
+    restore -- restore a saved state before running
+
+    Attributes:
+    profile -- Profile of the profiled runs, or None
 
     """
 
@@ -62,9 +72,11 @@ class Simulation(object):
         _simulator._time = 0
         arglist = _flatten(*args)
         self._waiters, self._cosim = _checkArgs(arglist)
+        self._processes = list(self._waiters)
         if not self._cosim and _simulator._cosim:
             warn("Cosimulation not registered as Simulation argument")
         self._finished = False
+        self.profile = None
         del _futureEvents[:]
         del _siglist[:]
         
@@ -85,10 +97,6 @@ class Simulation(object):
         self._finished = True
             
         
-    def runc(self, duration=0, quiet=0):
-        simrunc.run(sim=self, duration=duration, quiet=quiet)
-
-
     def run(self, duration=None, quiet=0):
 
         """ Run the simulation for some duration.
@@ -96,109 +104,185 @@ class Simulation(object):
         duration -- specified simulation duration (default: forever)
         quiet -- don't print StopSimulation messages (default: off)
 
+        The accelerated kernel is used when available.
+
+        """
+        return self._run(_kernel, duration, quiet)
+
+
+    def runc(self, duration=None, quiet=0):
+
+        """ Run the simulation with the accelerated kernel.
+
+        Same as run, but raises SimulationError if the _simrunc extension
+        module is not available.
+
+        """
+        if _simrunc is None:
+            raise SimulationError(_error.NoAccelerator)
+        return self._run(_simrunc.run, duration, quiet)
+
+
+    def runProfiled(self, duration=None, quiet=0):
+
+        """ Run the simulation and record a profile.
+
+        Same as run, but the time spent in each process, the delta cycles,
+        signal changes and future events are recorded in the profile
+        attribute. Successive profiled runs add up in the same profile.
+
+        """
+        if self.profile is None:
+            self.profile = Profile()
+        return self._run(self.profile._kernel, duration, quiet)
+
+
+    def checkpoint(self, filename):
+
+        """ Save the state of a suspended simulation in a file.
+
+        The time, the state of the signals and the position of always and
+        always_comb processes are saved, see the _checkpoint module.
+
+        """
+        _checkpoint(self, filename)
+
+
+    def restore(self, filename):
+
+        """ Restore the state saved in a checkpoint file.
+
+        Must be called before the simulation runs, with the same design
+        as the checkpointed simulation. The other generators start from
+        their beginning at the restored time.
+
         """
+        _restore(self, filename)
+
 
+    def _run(self, kernel, duration, quiet):
         # If the simulation is already finished, raise StopSimulation immediately
         # From this point it will propagate to the caller, that can catch it.
         if self._finished:
             raise StopSimulation("Simulation has already finished")
-        waiters = self._waiters
         maxTime = None
         if duration:
             stop = _Waiter(None)
             stop.hasRun = 1
             maxTime = _simulator._time + duration
             schedule((maxTime, stop))
-        cosim = self._cosim
-        t = _simulator._time
-        actives = {}
         tracing = _simulator._tracing
         tracefile = _simulator._tf
         exc = []
-        _pop = waiters.pop
-        _append = waiters.append
-        _extend = waiters.extend
 
-        while 1:
+        try:
+            kernel(self._waiters, self._cosim, maxTime, duration, exc)
+
+        except _SuspendSimulation:
+            if not quiet:
+                _printExcInfo()
+            if tracing:
+                tracefile.flush()
+            return 1
+
+        except StopSimulation:
+            if not quiet:
+                _printExcInfo()
+            self._finalize()
+            self._finished = True
+            return 0
+
+        except Exception, e:
+            if tracing:
+                tracefile.flush()
+            # if the exception came from a yield, make sure we can resume
+            if exc and e is exc[0]:
+                pass # don't finalize
+            else:
+                self._finalize()
+            # now reraise the exepction
+            raise
+                
+
+def _run(waiters, cosim, maxTime, duration, exc):
+
+    """ Simulation kernel, runs until an exception stops the simulation.
+
+    waiters -- list of waiters to run
+    cosim -- Cosimulation object or None
+    maxTime -- time at which the simulation is suspended, or None
+    duration -- duration requested to run, for the suspend message
+    exc -- list in which waiters store exceptions yielded by generators
+
+    """
+    t = _simulator._time
+    actives = {}
+    tracing = _simulator._tracing
+    tracefile = _simulator._tf
+    _pop = waiters.pop
+    _append = waiters.append
+    _extend = waiters.extend
+
+    while 1:
+
+        for s in _siglist:
+            _extend(s._update())
+        del _siglist[:]
+
+        while waiters:
+            waiter = _pop()
             try:
+                waiter.next(waiters, actives, exc)
+            except StopIteration:
+                continue
 
-                for s in _siglist:
-                    _extend(s._update())
-                del _siglist[:]
-
-                while waiters:
-                    waiter = _pop()
-                    try:
-                        waiter.next(waiters, actives, exc)
-                    except StopIteration:
-                        continue
-
-                if cosim:
-                    cosim._get()
-                    if _siglist or cosim._hasChange:
-                        cosim._put(t)
-                        continue
-                elif _siglist:
-                    continue
-
-                if actives:
-                    for wl in actives.values():
-                        wl.purge()
-                    actives = {}
-
-                # at this point it is safe to potentially suspend a simulation
-                if exc:
-                    raise exc[0]
-
-                # future events
-                if _futureEvents:
-                    if t == maxTime:
-                        raise _SuspendSimulation(
-                            "Simulated %s timesteps" % duration)
-                    _futureEvents.sort()
-                    t = _simulator._time = _futureEvents[0][0]
-                    if tracing:
-                        print >> tracefile, "#%s" % t
-                    if cosim:
-                        cosim._put(t)
-                    while _futureEvents:
-                        newt, event = _futureEvents[0]
-                        if newt == t:
-                            if isinstance(event, _Waiter):
-                                _append(event)
-                            else:
-                                _extend(event.apply())
-                            del _futureEvents[0]
-                        else:
-                            break
-                else:
-                    raise StopSimulation("No more events")
-
-            except _SuspendSimulation:
-                if not quiet:
-                    _printExcInfo()
-                if tracing:
-                    tracefile.flush()
-                return 1
-
-            except StopSimulation:
-                if not quiet:
-                    _printExcInfo()
-                self._finalize()
-                self._finished = True
-                return 0
-
-            except Exception, e:
-                if tracing:
-                    tracefile.flush()
-                # if the exception came from a yield, make sure we can resume
-                if exc and e is exc[0]:
-                    pass # don't finalize
+        if cosim:
+            cosim._get()
+            if _siglist or cosim._hasChange:
+                cosim._put(t)
+                continue
+        elif _siglist:
+            continue
+
+        if actives:
+            for wl in actives.values():
+                wl.purge()
+            actives = {}
+
+        # at this point it is safe to potentially suspend a simulation
+        if exc:
+            raise exc[0]
+
+        # future events
+        if _futureEvents:
+            if t == maxTime:
+                raise _SuspendSimulation(
+                    "Simulated %s timesteps" % duration)
+            t = _simulator._time = _futureEvents[0][0]
+            if tracing:
+                tracefile.timestep(t)
+            if cosim:
+                cosim._put(t)
+            while _futureEvents and _futureEvents[0][0] == t:
+                event = heappop(_futureEvents)[2]
+                if isinstance(event, _Waiter):
+                    _append(event)
                 else:
-                    self._finalize()
-                # now reraise the exepction
-                raise
-                
+                    _extend(event.apply())
+        else:
+            raise StopSimulation("No more events")
+
+
+try:
+    from myhdl import _simrunc
+except ImportError:
+    _simrunc = None
+
+if _simrunc is None:
+    _kernel = _run
+else:
+    _kernel = _simrunc.run
+
 
 def _checkArgs(arglist):
     waiters = []
@@ -31,10 +31,10 @@ from myhdl._delay import delay
 from myhdl._join import join
 from myhdl._Signal import Signal, _WaiterList, posedge, negedge
 from myhdl import _simulator
-from myhdl._simulator import _siglist, _futureEvents
+from myhdl._simulator import _siglist, _schedule
 from myhdl._enum import enum
 
-schedule = _futureEvents.append
+schedule = _schedule
 
 
 class _Waiter(object):
@@ -188,6 +188,36 @@ class _SignalTupleWaiter(_Waiter):
             wl = clause._eventWaiters
             wl.append(clone)
             actives[id(wl)] = wl
+
+
+class _StaticWaiter(_Waiter):
+
+    """ Waiter of a function with a static sensitivity list.
+
+    Once registered, the waiter stays in the static waiter list of its
+    sensitivity signals. Signals queue it at most once per delta cycle,
+    however many of them change, and it calls the function directly.
+
+    """
+
+    __slots__ = ('func', 'senslist', 'queued', 'registered', 'activations')
+
+    def __init__(self, func, senslist):
+        self.func = func
+        self.senslist = senslist
+        self.hasRun = 0
+        self.queued = 0
+        self.registered = 0
+        self.activations = 0
+
+    def next(self, waiters, actives, exc):
+        if not self.registered:
+            self.registered = 1
+            for s in self.senslist:
+                s._staticWaiters.append(self)
+        self.queued = 0
+        self.activations += 1
+        self.func()
             
 
 _kind = enum("SIGNAL_TUPLE", "EDGE_TUPLE", "SIGNAL", "EDGE", "DELAY", "UNDEFINED")
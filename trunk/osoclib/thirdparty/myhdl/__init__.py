@@ -40,6 +40,9 @@ processes -- function that returns all processes defined in a function
 always_comb -- function that returns an input-sensitive generator
 enum -- function that returns an enumeration type
 traceSignals -- function that enables signal tracing in a VCD file
+WaveReader -- class to query a waveform database written by traceSignals
+waveToVcd -- function that converts a waveform database to a VCD file
+runBatch -- function that runs a testbench for a list of parameters
 toVerilog -- function that converts a design to Verilog
 
 """
@@ -84,6 +87,8 @@ class ToVerilogError(Error):
     pass
 class TraceSignalsError(Error):
     pass
+class WaveformError(Error):
+    pass
 class ConversionError(Error):
     pass
 class ToVerilogError(ConversionError):
@@ -120,6 +125,8 @@ from _always import always
 from _instance import instance
 from _enum import enum, EnumType, EnumItemType
 from _traceSignals import traceSignals
+from _waveform import WaveReader, waveToVcd
+from _batch import runBatch
 
 from myhdl import conversion
 from conversion import toVerilog
@@ -149,6 +156,9 @@ __all__ = ["bin",
            "EnumType",
            "EnumItemType",
            "traceSignals",
+           "WaveReader",
+           "waveToVcd",
+           "runBatch",
            "toVerilog",
            "toVHDL",
            "conversion",
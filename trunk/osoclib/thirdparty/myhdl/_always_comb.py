@@ -30,7 +30,7 @@ from myhdl import Signal, AlwaysCombError
 from myhdl._Signal import _isListOfSigs
 from myhdl._util import _isGenFunc
 from myhdl._cell_deref import _cell_deref
-from myhdl._Waiter import _Waiter, _SignalWaiter, _SignalTupleWaiter
+from myhdl._Waiter import _StaticWaiter
 from myhdl._instance import _Instantiator
 
 class _error:
@@ -65,6 +65,9 @@ def always_comb(func):
 
 INPUT, OUTPUT, INOUT = range(3)
 
+# parsed source trees by code object, _SigNameVisitor doesn't change them
+_sourceCache = {}
+
 class _SigNameVisitor(object):
     def __init__(self, symdict):
         self.inputs = Set()
@@ -152,11 +155,15 @@ class _AlwaysComb(_Instantiator):
     def __init__(self, func, symdict):
         self.func = func
         self.symdict = symdict
-        s = inspect.getsource(func)
-        # remove decorators
-        s = re.sub(r"@.*", "", s)
-        s = s.lstrip()
-        tree = compiler.parse(s)
+        code = func.func_code
+        key = (code, code.co_filename)
+        tree = _sourceCache.get(key)
+        if tree is None:
+            s = inspect.getsource(func)
+            # remove decorators
+            s = re.sub(r"@.*", "", s)
+            s = s.lstrip()
+            tree = _sourceCache[key] = compiler.parse(s)
         v = _SigNameVisitor(symdict)
         compiler.walk(tree, v)
         self.inputs = v.inputs
@@ -172,11 +179,12 @@ class _AlwaysComb(_Instantiator):
         self.gen = self.genfunc()
         if len(self.senslist) == 0:
             raise AlwaysCombError(_error.EmptySensitivityList)
-        if len(self.senslist) == 1:
-            W = _SignalWaiter
-        else:
-            W = _SignalTupleWaiter
-        self.waiter = W(self.gen)
+        self.waiter = _StaticWaiter(self.func, self.senslist)
+
+    def _get_activations(self):
+        return self.waiter.activations
+    activations = property(_get_activations, None, None,
+                           "number of times the function has been run")
 
     def genfunc(self):
         senslist = self.senslist
@@ -0,0 +1,248 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl batch simulation module.
+
+As the simulator state is global to the module, only one Simulation can
+run in a process. runBatch runs the same testbench for a list of
+parameters, each run in its own worker process from a pool, so that
+parameter sweeps use all processors.
+
+This module provides the following objects:
+runBatch -- function that runs a testbench for a list of parameters
+BatchResult -- class of the result of a run
+BatchSummary -- class of the results of a batch
+
+"""
+
+import sys
+import time
+import traceback
+from types import FunctionType
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+if sys.version_info < (2, 7):
+    # the maxtasksperchild argument of Pool is new in Python 2.7, runs are
+    # done sequentially on older versions
+    multiprocessing = None
+
+from myhdl import _simulator, StopSimulation
+from myhdl._Simulation import Simulation
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+
+
+class BatchResult(object):
+
+    """ Result of a batch run.
+
+    Attributes:
+    index -- index of the run parameters
+    params -- run parameters
+    status -- PASSED, FAILED on AssertionError, ERROR on other exceptions
+    value -- value returned by the collect function of the testbench
+    error -- formatted exception when the run did not pass
+    time -- simulation time at the end of the run
+    elapsed -- run duration in seconds
+
+    """
+
+    def __init__(self, index, params):
+        self.index = index
+        self.params = params
+        self.status = PASSED
+        self.value = None
+        self.error = ""
+        self.time = 0
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return "<BatchResult %d %s %s>" % (self.index, self.status,
+                                           self.params)
+
+
+class BatchSummary(object):
+
+    """ Results of a batch.
+
+    Attributes:
+    results -- list of BatchResult, in parameters order
+    elapsed -- batch duration in seconds
+    cputime -- sum of runs duration in seconds
+
+    """
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+        self.cputime = sum([r.elapsed for r in results])
+
+    def _select(self, status):
+        return [r for r in self.results if r.status == status]
+
+    passed = property(lambda self: self._select(PASSED))
+    failed = property(lambda self: self._select(FAILED))
+    errors = property(lambda self: self._select(ERROR))
+
+    def ok(self):
+        """ Return True if all runs passed """
+        return len(self.passed) == len(self.results)
+
+    def __str__(self):
+        lines = []
+        for r in self.results:
+            lines.append("%4d %-6s %8.3f s  %s" % (r.index, r.status,
+                                                   r.elapsed, r.params))
+            if r.error:
+                lines.append(r.error.rstrip())
+        lines.append("%d runs: %d passed, %d failed, %d errors in %.3f s "
+                     "(%.3f s of simulation)" %
+                     (len(self.results), len(self.passed), len(self.failed),
+                      len(self.errors), self.elapsed, self.cputime))
+        return "\n".join(lines)
+
+
+def _reset():
+    """ Clear the simulator state left by a previous run """
+    del _simulator._signals[:]
+    del _simulator._siglist[:]
+    del _simulator._futureEvents[:]
+    _simulator._time = 0
+    _simulator._cosim = 0
+    _simulator._tracing = 0
+    _simulator._tf = None
+
+def _saveState():
+    """ Return the simulator state of the calling process """
+    return (_simulator._signals[:], _simulator._siglist[:],
+            _simulator._futureEvents[:], _simulator._time,
+            _simulator._cosim, _simulator._tracing, _simulator._tf)
+
+def _restoreState(state):
+    """ Restore a simulator state returned by _saveState """
+    signals, siglist, futureEvents, t, cosim, tracing, tf = state
+    # the lists are imported by other modules, update them in place
+    _simulator._signals[:] = signals
+    _simulator._siglist[:] = siglist
+    _simulator._futureEvents[:] = futureEvents
+    _simulator._time = t
+    _simulator._cosim = cosim
+    _simulator._tracing = tracing
+    _simulator._tf = tf
+
+def _call(factory, params):
+    if isinstance(params, dict):
+        return factory(**params)
+    if isinstance(params, tuple):
+        return factory(*params)
+    return factory(params)
+
+def _runOne(task):
+    """ Run a testbench, return its BatchResult """
+    factory, index, params, duration = task
+    result = BatchResult(index, params)
+    start = time.time()
+    try:
+        _reset()
+        insts = _call(factory, params)
+        collect = None
+        if isinstance(insts, tuple) and len(insts) == 2 and \
+           isinstance(insts[1], FunctionType):
+            insts, collect = insts
+        try:
+            Simulation(insts).run(duration, quiet=1)
+        finally:
+            result.time = _simulator._time
+        if collect is not None:
+            result.value = collect()
+    except AssertionError:
+        result.status = FAILED
+        result.error = traceback.format_exc()
+    except Exception:
+        result.status = ERROR
+        result.error = traceback.format_exc()
+    result.elapsed = time.time() - start
+    return result
+
+
+def runBatch(factory, params, duration=None, workers=None, callback=None):
+
+    """ Run a testbench for each parameters of a list.
+
+    factory -- testbench function, called with each parameters
+    params -- list of parameters: a tuple is passed as positional
+              arguments, a dict as keyword arguments, other objects as the
+              single argument of the factory
+    duration -- simulation duration of each run (default: until the end)
+    workers -- number of processes, processor count by default, 1 to run
+               sequentially in the calling process, whose simulator state
+               is restored at the end
+    callback -- function called with each BatchResult as runs complete
+
+    The factory returns the Simulation arguments, or a tuple of the
+    arguments and a collect function, called without argument at the end
+    of the run to return the result value. As signals are reset to their
+    initial value at the end of a run, processes must save the values to
+    collect. An AssertionError raised by
+    the run makes it fail. As runs are done in worker processes, the
+    factory, its parameters and the collected values must be picklable.
+
+    Returns a BatchSummary.
+
+    """
+    params = list(params)
+    tasks = [(factory, i, p, duration) for i, p in enumerate(params)]
+    if workers is None:
+        workers = 1
+        if multiprocessing is not None:
+            try:
+                workers = multiprocessing.cpu_count()
+            except NotImplementedError:
+                pass
+    workers = min(workers, len(tasks))
+    results = [None] * len(tasks)
+
+    start = time.time()
+    if workers < 2 or multiprocessing is None:
+        state = _saveState()
+        try:
+            for task in tasks:
+                result = results[task[1]] = _runOne(task)
+                if callback is not None:
+                    callback(result)
+        finally:
+            _restoreState(state)
+    else:
+        # a fresh process for each run, as the simulator state is global
+        pool = multiprocessing.Pool(workers, maxtasksperchild=1)
+        try:
+            for result in pool.imap_unordered(_runOne, tasks):
+                results[result.index] = result
+                if callback is not None:
+                    callback(result)
+        finally:
+            pool.close()
+            pool.join()
+
+    return BatchSummary(results, time.time() - start)
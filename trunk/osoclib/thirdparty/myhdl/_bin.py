@@ -23,7 +23,18 @@
 
 
 
+# binary strings of hexadecimal digits, with and without leading zeros
+_hexbits = {}
+_hexlead = {}
+for _i in range(16):
+    _hexbits["%x" % _i] = ''.join([str((_i >> _j) & 1) for _j in (3, 2, 1, 0)])
+    _hexlead["%x" % _i] = _hexbits["%x" % _i].lstrip('0')
+
+
 def _int2bitstring(num):
+    if num > 1:
+        h = "%x" % num
+        return _hexlead[h[0]] + ''.join([_hexbits[c] for c in h[1:]])
     if num == 0:
         return '0'
     if abs(num) == 1:
@@ -0,0 +1,231 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl simulation checkpoint module.
+
+A checkpoint holds the state of a suspended simulation: the time, the
+state of the signals and the position of the processes. As generators
+can't be saved, only processes created with always and always_comb are
+restored: between timesteps, they always wait on their sensitivity list,
+so that the position of a process is the time of its next activation
+when it waits on a delay. Their signals and the lists of values of their
+closure, such as memories, are saved.
+
+The restored design must be built in the same way as the checkpointed
+one. The other generators, such as a testbench stimulus, start from
+their beginning at the restored time.
+
+"""
+
+import cPickle
+
+from myhdl import _simulator, SimulationError, __version__
+from myhdl._simulator import _siglist, _futureEvents, _schedule
+from myhdl._intbv import intbv
+from myhdl._enum import EnumItemType
+from myhdl._delay import delay
+from myhdl._Signal import Signal, DelayedSignal, _SignalWrap
+from myhdl._Waiter import _DelayWaiter, _StaticWaiter
+from myhdl._always import _Always
+from myhdl._tristate import Tristate
+
+class _error:
+    pass
+_error.Cosim = "Cosimulation can't be checkpointed"
+_error.Finished = "Simulation has finished"
+_error.Started = "Checkpoint must be restored before the simulation runs"
+_error.Version = "Checkpoint written by another myhdl version"
+_error.Mismatch = "Checkpoint doesn't match the simulated design"
+_error.Delay = "always process mixing delays and signals can't be checkpointed"
+
+_FORMAT = "myhdl checkpoint 1"
+
+# value encodings
+_VALUE = 0
+_INTBV = 1
+_ENUM = 2
+
+def _encode(v):
+    if isinstance(v, intbv):
+        return (_INTBV, v._val)
+    if isinstance(v, EnumItemType):
+        return (_ENUM, v._name)
+    return (_VALUE, v)
+
+def _decode(data, template):
+    """ Return a value decoded with the type of template """
+    kind, v = data
+    if kind == _INTBV:
+        if isinstance(template, intbv):
+            new = template.__copy__()
+            new._val = v
+            return new
+        return intbv(v)
+    if kind == _ENUM:
+        return getattr(template._type, v)
+    return v
+
+def _isMemory(v):
+    return isinstance(v, list) and v and \
+           isinstance(v[0], (intbv, int, long, EnumItemType))
+
+
+class _State(object):
+
+    """ Processes and state objects of a simulation """
+
+    def __init__(self, sim):
+        self.procs = []
+        self.signals = []
+        self.memories = []
+        ids = {}
+        for waiter in sim._processes:
+            if isinstance(waiter, _StaticWaiter):
+                func, senslist = waiter.func, waiter.senslist
+            else:
+                frame = waiter.generator.gi_frame
+                obj = frame and frame.f_locals.get('self')
+                if not isinstance(obj, _Always):
+                    continue
+                func, senslist = obj.func, obj.senslist
+            code = func.func_code
+            self.procs.append((waiter, "%s:%d" % (code.co_name,
+                                                  code.co_firstlineno)))
+            cells = func.func_closure or ()
+            ns = zip(code.co_freevars, cells)
+            ns.sort()
+            for name, cell in ns:
+                try:
+                    self._visit(cell.cell_contents, ids)
+                except ValueError:
+                    pass # empty cell
+            self._visit(list(senslist), ids)
+
+    def _visit(self, v, ids):
+        if id(v) in ids:
+            return
+        if isinstance(v, Signal):
+            ids[id(v)] = v
+            self.signals.append(v)
+            if isinstance(v, Tristate):
+                self._visit(v._drivers, ids)
+        elif _isMemory(v):
+            ids[id(v)] = v
+            self.memories.append(v)
+        elif isinstance(v, (list, tuple)):
+            ids[id(v)] = v
+            for e in v:
+                self._visit(e, ids)
+        elif hasattr(v, 'sig') and isinstance(v.sig, Signal):
+            self._visit(v.sig, ids) # edge
+
+
+def _checkpoint(sim, filename):
+    """ Write the state of a suspended simulation in a checkpoint file """
+    if sim._cosim:
+        raise SimulationError(_error.Cosim)
+    if sim._finished:
+        raise SimulationError(_error.Finished)
+    state = _State(sim)
+    signals = []
+    for s in state.signals:
+        extra = None
+        if isinstance(s, DelayedSignal):
+            extra = (_encode(s._nextZ), s._timeStamp)
+        signals.append((_encode(s._val), _encode(s._next), extra))
+    memories = [[_encode(v) for v in m] for m in state.memories]
+    sigIndex = dict([(id(s), i) for i, s in enumerate(state.signals)])
+    procIndex = {}
+    for i, (waiter, name) in enumerate(state.procs):
+        if not isinstance(waiter, _StaticWaiter):
+            procIndex[id(waiter.generator)] = i
+    delays = []
+    events = []
+    for t, seq, event in sorted(_futureEvents):
+        if isinstance(event, _SignalWrap):
+            if id(event.sig) in sigIndex:
+                events.append((t, sigIndex[id(event.sig)],
+                               _encode(event.next), event.timeStamp))
+        else:
+            i = procIndex.get(id(getattr(event, 'generator', None)))
+            if i is None:
+                continue # restarted process
+            if not isinstance(event, _DelayWaiter):
+                raise SimulationError(_error.Delay, state.procs[i][1])
+            delays.append((i, t))
+    data = {"format": _FORMAT,
+            "version": __version__,
+            "time": _simulator._time,
+            "processes": [name for waiter, name in state.procs],
+            "signals": signals,
+            "memories": memories,
+            "delays": delays,
+            "events": events}
+    f = open(filename, "wb")
+    try:
+        cPickle.dump(data, f, 2)
+    finally:
+        f.close()
+
+
+def _restore(sim, filename):
+    """ Restore the state of a simulation from a checkpoint file """
+    if len(sim._waiters) != len(sim._processes) or _simulator._time:
+        raise SimulationError(_error.Started)
+    f = open(filename, "rb")
+    try:
+        data = cPickle.load(f)
+    finally:
+        f.close()
+    if not isinstance(data, dict) or data.get("format") != _FORMAT:
+        raise SimulationError(_error.Mismatch, "not a checkpoint file")
+    if data["version"] != __version__:
+        raise SimulationError(_error.Version, data["version"])
+    state = _State(sim)
+    if [name for waiter, name in state.procs] != data["processes"]:
+        raise SimulationError(_error.Mismatch, "processes differ")
+    if len(state.signals) != len(data["signals"]) or \
+       [len(m) for m in state.memories] != \
+       [len(m) for m in data["memories"]]:
+        raise SimulationError(_error.Mismatch, "signals differ")
+
+    _simulator._time = data["time"]
+    for s, (val, next, extra) in zip(state.signals, data["signals"]):
+        template = s._init
+        s._val = _decode(val, template)
+        if next == val:
+            s._next = s._val
+        else:
+            s._next = _decode(next, template)
+        if extra is not None:
+            s._nextZ = _decode(extra[0], template)
+            s._timeStamp = extra[1]
+    for m, values in zip(state.memories, data["memories"]):
+        for i, v in enumerate(values):
+            m[i] = _decode(v, m[i])
+    for i, t in data["delays"]:
+        # wait for the next activation: the always generator yields its
+        # delay before calling the function
+        waiter = state.procs[i][0]
+        sim._waiters.remove(waiter)
+        waiter.generator.next()
+        _schedule((t, waiter))
+    for t, i, next, timeStamp in data["events"]:
+        s = state.signals[i]
+        _schedule((t, _SignalWrap(s, _decode(next, s._init), timeStamp)))
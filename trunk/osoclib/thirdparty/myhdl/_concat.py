@@ -65,7 +65,7 @@ def concat(base, *args):
         if not w:
             raise TypeError, "concat: arg to concat should have length"
         width += w
-        val = val*(2**w) + v
+        val = (val << w) + v
         
     if basewidth:
         return intbv(val, _nrbits=basewidth + width)
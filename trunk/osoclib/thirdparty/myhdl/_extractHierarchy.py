@@ -48,13 +48,16 @@ _error.InconsistentHierarchy = "Inconsistent hierarchy - are all instances retur
 
 
 class _Instance(object):
-    __slots__ = ['level', 'obj', 'subs', 'sigdict', 'memdict', 'name']
+    __slots__ = ['level', 'obj', 'subs', 'sigdict', 'memdict', 'name',
+                 'code', 'args']
     def __init__(self, level, obj, subs, sigdict, memdict):
         self.level = level
         self.obj = obj
         self.subs = subs
         self.sigdict = sigdict
         self.memdict = memdict
+        self.code = None
+        self.args = None
         
 
 _memInfoMap = {}
@@ -244,6 +247,12 @@ class _HierExtr(object):
                                 subs.append((n, sub))
                                 
                     inst = _Instance(self.level, arg, subs, sigdict, memdict)
+                    # keep the call arguments, they identify replicated instances
+                    code = frame.f_code
+                    inst.code = code
+                    if not code.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS):
+                        inst.args = [(n, frame.f_locals.get(n)) for n in
+                                     code.co_varnames[:code.co_argcount]]
                     self.hierarchy.append(inst)
                 self.level -= 1
                 
@@ -30,24 +30,38 @@ from myhdl._bin import bin
 
 from __builtin__ import max as maxfunc
 
+if hasattr(int, "bit_length"):
+    def _width(num):
+        """ Return len(bin(num)) without building the string """
+        if not isinstance(num, (int, long)):
+            num = long(num)
+        if num < 0:
+            return (~num).bit_length() + 1
+        return num.bit_length() or 1
+else:
+    def _width(num):
+        return len(bin(num))
+
+_new = object.__new__
+
 class intbv(object):
     __slots__ = ('_val', '_min', '_max', '_nrbits')
     
     def __init__(self, val=None, min=None, max=None, _nrbits=0):
         if _nrbits:
             self._min = 0
-            self._max = 2**_nrbits
+            self._max = 1 << _nrbits
         else:
             self._min = min
             self._max = max
             if max is not None and min is not None:
                 if min >= 0:
-                    _nrbits = len(bin(max-1))
+                    _nrbits = _width(max-1)
                 elif max <= 1:
-                    _nrbits = len(bin(min))
+                    _nrbits = _width(min)
                 else:
                     # make sure there is a leading zero bit in positive numbers
-                    _nrbits = maxfunc(len(bin(max-1))+1, len(bin(min)))
+                    _nrbits = maxfunc(_width(max-1)+1, _width(min))
         if isinstance(val, (int, long)):
             self._val = val
         elif isinstance(val, StringType):
@@ -74,15 +88,14 @@ class intbv(object):
     min = property(_get_min, None)
 
     def _checkBounds(self):
-        if self._val is None: return
-        if self._max is not None:
-            if self._val >= self._max:
-                raise ValueError("intbv value %s >= maximum %s" %
-                                 (self._val, self._max))
-        if self._min is not None:
-            if self._val < self._min:
-                raise ValueError("intbv value %s < minimum %s" %
-                                 (self._val, self._min))
+        val = self._val
+        if val is None: return
+        max = self._max
+        if max is not None and val >= max:
+            raise ValueError("intbv value %s >= maximum %s" % (val, max))
+        min = self._min
+        if min is not None and val < min:
+            raise ValueError("intbv value %s < minimum %s" % (val, min))
 
 
     # hash
@@ -91,15 +104,24 @@ class intbv(object):
         
     # copy methods
     def __copy__(self):
-        return intbv(self)
+        c = _new(intbv)
+        c._val = self._val
+        c._min = self._min
+        c._max = self._max
+        c._nrbits = self._nrbits
+        return c
     def __deepcopy__(self, visit):
-        return intbv(self)
+        return self.__copy__()
 
     # iterator method
     def __iter__(self):
         if not self._nrbits:
             raise TypeError, "Cannot iterate over unsized intbv"
-        return iter([self[i] for i in range(self._nrbits-1, -1, -1)])
+        val = self._val
+        if val is None:
+            return iter([self[i] for i in range(self._nrbits-1, -1, -1)])
+        return iter([bool((val >> i) & 1)
+                     for i in range(self._nrbits-1, -1, -1)])
 
     # logical testing
     def __nonzero__(self):
@@ -135,7 +157,13 @@ class intbv(object):
                       "            i, j == %s, %s" % (i, j)
             if self._val is None:
                 return intbv(None, _nrbits=i-j)
-            res = intbv((self._val & (1L << i)-1) >> j, _nrbits=i-j)
+            # the result is always within bounds, skip the constructor
+            n = i - j
+            res = _new(intbv)
+            res._val = (self._val >> j) & ((1 << n) - 1)
+            res._min = 0
+            res._max = 1 << n
+            res._nrbits = n
             return res
         else:
             raise TypeError("intbv item/slice indices should be integers")
@@ -148,9 +176,9 @@ class intbv(object):
                 raise ValueError, "intbv[i] = v requires v in (0, 1)\n" \
                       "            i == %s " % i
             if val:
-                self._val |= (1L << i)
+                self._val |= (1 << i)
             else:
-                self._val &= ~(1L << i)
+                self._val &= ~(1 << i)
             self._checkBounds()
         elif isinstance(key, slice):
             i, j = key.start, key.stop
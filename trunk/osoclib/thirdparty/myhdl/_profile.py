@@ -0,0 +1,348 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl simulation profile module.
+
+Simulation.runProfiled runs a simulation with a copy of the kernel that
+records, in a Profile object:
+  - the number of activations and the time spent in the processes of
+    each code
+  - the number of delta cycles of each timestep
+  - the number of value changes of each signal
+  - the depth of the future events queue at each timestep
+
+The regular kernels are left unchanged, so profiling costs nothing when
+it is not used. Profiled runs always use the Python kernel.
+
+"""
+
+import sys
+import os
+import time
+import weakref
+from heapq import heappop
+
+try:
+    import json
+except ImportError:
+    json = None
+
+from myhdl import _simulator, StopSimulation, _SuspendSimulation
+from myhdl._simulator import _siglist, _futureEvents
+from myhdl._Signal import Signal
+from myhdl._Waiter import _Waiter
+from myhdl._instance import _Instantiator
+
+_SORTKEYS = {
+    "time": lambda p: -p[2],
+    "activations": lambda p: -p[1],
+    "mean": lambda p: -p[2] / max(p[1], 1),
+    "name": lambda p: p[0],
+    }
+
+
+def _funcNamespace(func):
+    """ Return the free variables of a function """
+    ns = {}
+    code = func.func_code
+    for name, cell in zip(code.co_freevars, func.func_closure or ()):
+        try:
+            ns[name] = cell.cell_contents
+        except ValueError:
+            pass # empty cell
+    return ns
+
+def _process(waiter):
+    """ Return the function or generator run by a waiter, the name of the
+    process and its namespace.
+
+    The generators of always and always_comb instances are run by a method
+    of the instance: the decorated function is used instead.
+
+    """
+    func = getattr(waiter, 'func', None)
+    if func is not None:
+        return func, func.func_code, _funcNamespace(func)
+    gen = getattr(waiter, 'generator', None)
+    if gen is None:
+        return None, None, {}
+    frame = gen.gi_frame
+    if frame is None:
+        return gen, None, {}
+    ns = frame.f_locals
+    obj = ns.get('self')
+    if isinstance(obj, _Instantiator) and hasattr(obj, 'func'):
+        return gen, obj.func.func_code, _funcNamespace(obj.func)
+    return gen, frame.f_code, ns
+
+def _codeName(code):
+    if code is None:
+        return "<finished generator>"
+    return "%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename),
+                           code.co_firstlineno)
+
+
+class Profile(object):
+
+    """ Simulation profile.
+
+    Attributes:
+    processes -- list of [name, activations, time] of each process code
+    toggles -- list of [name, changes] of each changed signal
+    deltas -- dict of the number of timesteps by number of delta cycles
+    timesteps -- number of timesteps
+    maxQueue -- maximum depth of the future events queue
+    meanQueue -- mean depth of the future events queue
+    elapsed -- time spent in profiled runs
+
+    Methods:
+    report -- print a report
+    dump -- write the profile in a JSON file
+
+    """
+
+    def __init__(self):
+        self._procs = {}
+        self._running = {}
+        self._toggles = {}
+        self._names = {}
+        self.deltas = {}
+        self.timesteps = 0
+        self.maxQueue = 0
+        self._sumQueue = 0
+        self.elapsed = 0.0
+        self._pending = 0
+
+    def _register(self, waiter):
+        """ Return the stats of the process run by a waiter.
+
+        Processes with the same code share their stats, so that the calls
+        of a sub-generator are reported as a single process. The function
+        or generator is only referenced weakly, to find its stats at its
+        next activation.
+
+        """
+        obj, code, ns = _process(waiter)
+        if obj is None:
+            # not reported
+            return [None, 0, 0.0]
+        stats = self._procs.get(code)
+        if stats is None:
+            stats = self._procs[code] = [_codeName(code), 0, 0.0]
+        running = self._running
+        key = id(obj)
+        def forget(ref):
+            entry = running.get(key)
+            if entry is not None and entry[0] is ref:
+                del running[key]
+        running[key] = (weakref.ref(obj, forget), stats)
+        names = self._names
+        for name, v in ns.items():
+            if isinstance(v, Signal):
+                names.setdefault(id(v), name)
+            elif isinstance(v, (list, tuple)):
+                for i, s in enumerate(v):
+                    if isinstance(s, Signal):
+                        names.setdefault(id(s), "%s[%d]" % (name, i))
+        return stats
+
+    def _signalName(self, s):
+        return self._names.get(id(s), "<Signal at 0x%x>" % id(s))
+
+    def _get_processes(self):
+        return [[name, n, t] for name, n, t in self._procs.values()]
+    processes = property(_get_processes)
+
+    def _get_toggles(self):
+        return [[self._signalName(s), n] for s, n in self._toggles.values()]
+    toggles = property(_get_toggles)
+
+    def _get_meanQueue(self):
+        return float(self._sumQueue) / max(self.timesteps, 1)
+    meanQueue = property(_get_meanQueue)
+
+    def _kernel(self, waiters, cosim, maxTime, duration, exc):
+        """ Profiling copy of the simulation kernel, see _Simulation._run """
+        start = time.time()
+        # a resumed run starts with an empty delta cycle of the timestep
+        # where it was suspended
+        deltas = [max(self._pending - 1, 0)]
+        self._pending = 0
+        try:
+            try:
+                self._run(waiters, cosim, maxTime, duration, exc, deltas)
+            except _SuspendSimulation:
+                self._pending = deltas[0]
+                raise
+            except:
+                if deltas[0]:
+                    self._timestep(deltas[0])
+                raise
+        finally:
+            self.elapsed += time.time() - start
+
+    def _timestep(self, deltas):
+        self.timesteps += 1
+        self.deltas[deltas] = self.deltas.get(deltas, 0) + 1
+        depth = len(_futureEvents)
+        self._sumQueue += depth
+        if depth > self.maxQueue:
+            self.maxQueue = depth
+
+    def _run(self, waiters, cosim, maxTime, duration, exc, deltas):
+        t = _simulator._time
+        actives = {}
+        tracing = _simulator._tracing
+        tracefile = _simulator._tf
+        _pop = waiters.pop
+        _append = waiters.append
+        _extend = waiters.extend
+        _time = time.time
+        running = self._running
+        toggles = self._toggles
+
+        while 1:
+            deltas[0] += 1
+
+            for s in _siglist:
+                val = s._val
+                _extend(s._update())
+                if s._val is not val:
+                    entry = toggles.get(id(s))
+                    if entry is None:
+                        toggles[id(s)] = [s, 1]
+                    else:
+                        entry[1] += 1
+            del _siglist[:]
+
+            while waiters:
+                waiter = _pop()
+                obj = getattr(waiter, 'func', None) or \
+                      getattr(waiter, 'generator', None)
+                entry = running.get(id(obj))
+                if entry is not None and entry[0]() is obj:
+                    stats = entry[1]
+                else:
+                    stats = self._register(waiter)
+                start = _time()
+                try:
+                    waiter.next(waiters, actives, exc)
+                except StopIteration:
+                    stats[1] += 1
+                    stats[2] += _time() - start
+                    continue
+                stats[1] += 1
+                stats[2] += _time() - start
+
+            if cosim:
+                cosim._get()
+                if _siglist or cosim._hasChange:
+                    cosim._put(t)
+                    continue
+            elif _siglist:
+                continue
+
+            if actives:
+                for wl in actives.values():
+                    wl.purge()
+                actives = {}
+
+            # at this point it is safe to potentially suspend a simulation
+            if exc:
+                raise exc[0]
+
+            # future events
+            if _futureEvents:
+                if t == maxTime:
+                    raise _SuspendSimulation(
+                        "Simulated %s timesteps" % duration)
+                self._timestep(deltas[0])
+                deltas[0] = 0
+                t = _simulator._time = _futureEvents[0][0]
+                if tracing:
+                    tracefile.timestep(t)
+                if cosim:
+                    cosim._put(t)
+                while _futureEvents and _futureEvents[0][0] == t:
+                    event = heappop(_futureEvents)[2]
+                    if isinstance(event, _Waiter):
+                        _append(event)
+                    else:
+                        _extend(event.apply())
+            else:
+                raise StopSimulation("No more events")
+
+    def report(self, sort="time", limit=None, stream=None):
+        """ Print a profile report.
+
+        sort -- process sort key: "time", "activations", "mean" or "name"
+        limit -- maximum number of processes and signals listed
+        stream -- output file (default: sys.stdout)
+
+        """
+        if sort not in _SORTKEYS:
+            raise ValueError("Unknown sort key: %s" % sort)
+        if stream is None:
+            stream = sys.stdout
+        procs = self.processes
+        procs.sort(key=_SORTKEYS[sort])
+        total = sum([p[2] for p in procs])
+        print >> stream, "%d timesteps in %.3f s, %.3f s in processes" % \
+              (self.timesteps, self.elapsed, total)
+        print >> stream
+        print >> stream, "%12s %10s %10s %6s  %s" % \
+              ("activations", "time (s)", "mean (us)", "%", "process")
+        for name, n, t in procs[:limit]:
+            print >> stream, "%12d %10.3f %10.1f %6.1f  %s" % \
+                  (n, t, 1e6 * t / max(n, 1), 100 * t / (total or 1), name)
+        print >> stream
+        toggles = self.toggles
+        toggles.sort(key=lambda s: (-s[1], s[0]))
+        print >> stream, "%12s  %s" % ("changes", "signal")
+        for name, n in toggles[:limit]:
+            print >> stream, "%12d  %s" % (n, name)
+        print >> stream
+        print >> stream, "%12s %10s" % ("deltas", "timesteps")
+        for n in sorted(self.deltas):
+            print >> stream, "%12d %10d" % (n, self.deltas[n])
+        print >> stream
+        print >> stream, "future events queue: max %d, mean %.1f" % \
+              (self.maxQueue, self.meanQueue)
+
+    def toDict(self):
+        """ Return the profile as a dict of lists, numbers and strings """
+        return {"elapsed": self.elapsed,
+                "timesteps": self.timesteps,
+                "processes": [{"name": name, "activations": n, "time": t}
+                              for name, n, t in self.processes],
+                "toggles": [{"name": name, "changes": n}
+                            for name, n in self.toggles],
+                "deltas": sorted(self.deltas.items()),
+                "maxQueue": self.maxQueue,
+                "meanQueue": self.meanQueue}
+
+    def dump(self, filename):
+        """ Write the profile in a JSON file """
+        if json is None:
+            raise ImportError("json module not available (Python >= 2.6)")
+        f = open(filename, 'w')
+        try:
+            json.dump(self.toDict(), f, indent=1)
+        finally:
+            f.close()
@@ -0,0 +1,932 @@
+/*  This file is part of the myhdl library, a Python package for using
+ *  Python as a Hardware Description Language.
+ *
+ *  Copyright (C) 2003-2008 Jan Decaluwe
+ *
+ *  The myhdl library is free software; you can redistribute it and/or
+ *  modify it under the terms of the GNU Lesser General Public License as
+ *  published by the Free Software Foundation; either version 2.1 of the
+ *  License, or (at your option) any later version.
+ *
+ *  This library is distributed in the hope that it will be useful, but
+ *  WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ *  Lesser General Public License for more details.
+ *
+ *  You should have received a copy of the GNU Lesser General Public
+ *  License along with this library; if not, write to the Free Software
+ *  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+ */
+
+/* Accelerated simulation kernel.
+ *
+ * Implements the same algorithm as the pure Python kernel _Simulation._run:
+ * the delta cycle loop, the update of plain Signal objects and the dispatch
+ * of the waiter classes of _Waiter.py are done in C. Other signal and waiter
+ * classes, signal wraps of delayed signals and cosimulation still run their
+ * Python methods.
+ *
+ * Build with the Makefile of this directory, Simulation uses the pure
+ * Python kernel when this module is not available.
+ */
+
+#include "Python.h"
+
+static PyObject *_simulator = NULL;
+static PyObject *_siglist, *_futureEvents, *_eventSeq;
+static PyObject *heappush, *heappop;
+static PyObject *StopSimulation, *SuspendSimulation;
+static PyObject *Signal, *_WaiterList, *delay, *join;
+static PyObject *_Waiter, *_SignalWaiter, *_SignalTupleWaiter;
+static PyObject *_EdgeWaiter, *_EdgeTupleWaiter, *_DelayWaiter;
+static PyObject *_StaticWaiter;
+
+static PyObject *str_update, *str_next, *str_apply, *str_purge;
+static PyObject *str_get, *str_put, *str_hasChange, *str_time;
+static PyObject *str_generator, *str_caller, *str_hasRun, *str_semaphore;
+static PyObject *str_nrTriggers, *str_args, *str_genfunc;
+static PyObject *str_val, *str_nextval, *str_eventWaiters;
+static PyObject *str_posedgeWaiters, *str_negedgeWaiters;
+static PyObject *str_tracing, *str_printVcd, *str_tf, *str_timestep;
+static PyObject *str_staticWaiters, *str_queued, *str_registered;
+static PyObject *str_activations, *str_func;
+static PyObject *zero, *one;
+
+
+/* Get attribute of a module */
+static PyObject *
+import_attr(const char *module, const char *name)
+{
+    PyObject *m, *attr;
+
+    m = PyImport_ImportModule(module);
+    if (m == NULL)
+        return NULL;
+    attr = PyObject_GetAttrString(m, name);
+    Py_DECREF(m);
+    return attr;
+}
+
+#define INTERN(var, name) \
+    if ((var = PyString_InternFromString(name)) == NULL) return -1
+#define IMPORT(var, module, name) \
+    if ((var = import_attr(module, name)) == NULL) return -1
+
+/* myhdl modules are imported on first run, as this module is imported by
+   _Simulation while myhdl package is initialized. */
+static int
+init_globals(void)
+{
+    if (_simulator != NULL)
+        return 0;
+
+    IMPORT(_siglist, "myhdl._simulator", "_siglist");
+    IMPORT(_futureEvents, "myhdl._simulator", "_futureEvents");
+    IMPORT(_eventSeq, "myhdl._simulator", "_eventSeq");
+    IMPORT(heappush, "heapq", "heappush");
+    IMPORT(heappop, "heapq", "heappop");
+    IMPORT(StopSimulation, "myhdl", "StopSimulation");
+    IMPORT(SuspendSimulation, "myhdl", "_SuspendSimulation");
+    IMPORT(Signal, "myhdl._Signal", "Signal");
+    IMPORT(_WaiterList, "myhdl._Signal", "_WaiterList");
+    IMPORT(delay, "myhdl._delay", "delay");
+    IMPORT(join, "myhdl._join", "join");
+    IMPORT(_Waiter, "myhdl._Waiter", "_Waiter");
+    IMPORT(_SignalWaiter, "myhdl._Waiter", "_SignalWaiter");
+    IMPORT(_SignalTupleWaiter, "myhdl._Waiter", "_SignalTupleWaiter");
+    IMPORT(_EdgeWaiter, "myhdl._Waiter", "_EdgeWaiter");
+    IMPORT(_EdgeTupleWaiter, "myhdl._Waiter", "_EdgeTupleWaiter");
+    IMPORT(_DelayWaiter, "myhdl._Waiter", "_DelayWaiter");
+    IMPORT(_StaticWaiter, "myhdl._Waiter", "_StaticWaiter");
+
+    INTERN(str_update, "_update");
+    INTERN(str_next, "next");
+    INTERN(str_apply, "apply");
+    INTERN(str_purge, "purge");
+    INTERN(str_get, "_get");
+    INTERN(str_put, "_put");
+    INTERN(str_hasChange, "_hasChange");
+    INTERN(str_time, "_time");
+    INTERN(str_generator, "generator");
+    INTERN(str_caller, "caller");
+    INTERN(str_hasRun, "hasRun");
+    INTERN(str_semaphore, "semaphore");
+    INTERN(str_nrTriggers, "nrTriggers");
+    INTERN(str_args, "_args");
+    INTERN(str_genfunc, "_generator");
+    INTERN(str_val, "_val");
+    INTERN(str_nextval, "_next");
+    INTERN(str_eventWaiters, "_eventWaiters");
+    INTERN(str_posedgeWaiters, "_posedgeWaiters");
+    INTERN(str_negedgeWaiters, "_negedgeWaiters");
+    INTERN(str_tracing, "_tracing");
+    INTERN(str_printVcd, "_printVcd");
+    INTERN(str_tf, "_tf");
+    INTERN(str_timestep, "timestep");
+    INTERN(str_staticWaiters, "_staticWaiters");
+    INTERN(str_queued, "queued");
+    INTERN(str_registered, "registered");
+    INTERN(str_activations, "activations");
+    INTERN(str_func, "func");
+
+    if ((zero = PyInt_FromLong(0)) == NULL)
+        return -1;
+    if ((one = PyInt_FromLong(1)) == NULL)
+        return -1;
+
+    _simulator = PyImport_ImportModule("myhdl._simulator");
+    if (_simulator == NULL)
+        return -1;
+    return 0;
+}
+
+
+/* list.append(item), or append method of other objects */
+static int
+append(PyObject *list, PyObject *item)
+{
+    PyObject *r;
+
+    if (PyList_Check(list))
+        return PyList_Append(list, item);
+    r = PyObject_CallMethod(list, "append", "O", item);
+    if (r == NULL)
+        return -1;
+    Py_DECREF(r);
+    return 0;
+}
+
+/* list.extend(seq) */
+static int
+extend(PyObject *list, PyObject *seq)
+{
+    Py_ssize_t n = PyList_GET_SIZE(list);
+
+    return PyList_SetSlice(list, n, n, seq);
+}
+
+/* del list[:] */
+static int
+clear(PyObject *list)
+{
+    if (!PyList_Check(list)) {
+        PyErr_SetString(PyExc_TypeError, "waiter list expected");
+        return -1;
+    }
+    return PyList_SetSlice(list, 0, PyList_GET_SIZE(list), NULL);
+}
+
+/* actives[id(wl)] = wl */
+static int
+set_active(PyObject *actives, PyObject *wl)
+{
+    PyObject *key;
+    int r;
+
+    key = PyLong_FromVoidPtr(wl);
+    if (key == NULL)
+        return -1;
+    r = PyDict_SetItem(actives, key, wl);
+    Py_DECREF(key);
+    return r;
+}
+
+/* Same as _simulator._schedule((t, event)) */
+static int
+schedule(PyObject *t, PyObject *event)
+{
+    PyObject *seq, *entry, *r;
+
+    seq = PyObject_CallObject(_eventSeq, NULL);
+    if (seq == NULL)
+        return -1;
+    entry = PyTuple_Pack(3, t, seq, event);
+    Py_DECREF(seq);
+    if (entry == NULL)
+        return -1;
+    r = PyObject_CallFunctionObjArgs(heappush, _futureEvents, entry, NULL);
+    Py_DECREF(entry);
+    if (r == NULL)
+        return -1;
+    Py_DECREF(r);
+    return 0;
+}
+
+/* Same as schedule((t + clause._time, waiter)) */
+static int
+schedule_delay(PyObject *t, PyObject *clause, PyObject *waiter)
+{
+    PyObject *dt, *newt;
+    int r;
+
+    dt = PyObject_GetAttr(clause, str_time);
+    if (dt == NULL)
+        return -1;
+    newt = PyNumber_Add(t, dt);
+    Py_DECREF(dt);
+    if (newt == NULL)
+        return -1;
+    r = schedule(newt, waiter);
+    Py_DECREF(newt);
+    return r;
+}
+
+/* Return 1 if attribute value is true */
+static int
+attr_true(PyObject *obj, PyObject *name)
+{
+    PyObject *value;
+    int r;
+
+    value = PyObject_GetAttr(obj, name);
+    if (value == NULL)
+        return -1;
+    r = PyObject_IsTrue(value);
+    Py_DECREF(value);
+    return r;
+}
+
+
+/* Queue static waiters of a signal that are not queued yet */
+static int
+queue_static(PyObject *sig, PyObject *waiters)
+{
+    PyObject *wl, *w;
+    Py_ssize_t i;
+    int queued, status = -1;
+
+    wl = PyObject_GetAttr(sig, str_staticWaiters);
+    if (wl == NULL)
+        return -1;
+    if (!PyList_Check(wl)) {
+        PyErr_SetString(PyExc_TypeError, "waiter list expected");
+        goto done;
+    }
+    for (i = 0; i < PyList_GET_SIZE(wl); i++) {
+        w = PyList_GET_ITEM(wl, i);
+        if ((queued = attr_true(w, str_queued)) < 0)
+            goto done;
+        if (queued)
+            continue;
+        if (PyObject_SetAttr(w, str_queued, one) < 0 ||
+            PyList_Append(waiters, w) < 0)
+            goto done;
+    }
+    status = 0;
+
+done:
+    Py_DECREF(wl);
+    return status;
+}
+
+/* Signal._update, waiters to run are appended to waiters list */
+static int
+update_signal(PyObject *sig, PyObject *waiters)
+{
+    PyObject *val, *next, *wl, *r;
+    int changed, edge = 0, status = -1;
+
+    if (Py_TYPE(sig) != (PyTypeObject *)Signal) {
+        r = PyObject_CallMethodObjArgs(sig, str_update, NULL);
+        if (r == NULL)
+            return -1;
+        status = extend(waiters, r);
+        Py_DECREF(r);
+        return status;
+    }
+
+    val = PyObject_GetAttr(sig, str_val);
+    next = PyObject_GetAttr(sig, str_nextval);
+    if (val == NULL || next == NULL)
+        goto done;
+
+    r = PyObject_RichCompare(val, next, Py_NE);
+    if (r == NULL)
+        goto done;
+    changed = PyObject_IsTrue(r);
+    Py_DECREF(r);
+    if (changed <= 0) {
+        status = changed;
+        goto done;
+    }
+
+    wl = PyObject_GetAttr(sig, str_eventWaiters);
+    if (wl == NULL)
+        goto done;
+    if (extend(waiters, wl) < 0 || clear(wl) < 0) {
+        Py_DECREF(wl);
+        goto done;
+    }
+    Py_DECREF(wl);
+
+    /* not val and next -> posedge, not next and val -> negedge */
+    if ((changed = PyObject_Not(val)) < 0)
+        goto done;
+    if (changed) {
+        if ((edge = PyObject_IsTrue(next)) < 0)
+            goto done;
+        wl = edge ? PyObject_GetAttr(sig, str_posedgeWaiters) : NULL;
+    } else {
+        if ((edge = PyObject_Not(next)) < 0)
+            goto done;
+        wl = edge ? PyObject_GetAttr(sig, str_negedgeWaiters) : NULL;
+    }
+    if (edge) {
+        if (wl == NULL)
+            goto done;
+        if (extend(waiters, wl) < 0 || clear(wl) < 0) {
+            Py_DECREF(wl);
+            goto done;
+        }
+        Py_DECREF(wl);
+    }
+    if (queue_static(sig, waiters) < 0)
+        goto done;
+
+    if (PyObject_SetAttr(sig, str_val, next) < 0)
+        goto done;
+    if ((changed = attr_true(sig, str_tracing)) < 0)
+        goto done;
+    if (changed) {
+        r = PyObject_CallMethodObjArgs(sig, str_printVcd, NULL);
+        if (r == NULL)
+            goto done;
+        Py_DECREF(r);
+    }
+    status = 0;
+
+done:
+    Py_XDECREF(val);
+    Py_XDECREF(next);
+    return status;
+}
+
+
+/* Next clause of waiter generator, NULL without exception set when the
+   generator is exhausted. */
+static PyObject *
+next_clause(PyObject *gen)
+{
+    if (!PyIter_Check(gen))
+        return PyObject_CallMethodObjArgs(gen, str_next, NULL);
+    return PyIter_Next(gen);
+}
+
+/* Status of a waiter that raised StopIteration or failed */
+static int
+stop_iteration(void)
+{
+    if (!PyErr_Occurred())
+        return 0;
+    if (PyErr_ExceptionMatches(PyExc_StopIteration)) {
+        PyErr_Clear();
+        return 0;
+    }
+    return -1;
+}
+
+/* _SignalTupleWaiter.next and _EdgeTupleWaiter.next, once clauses are
+   known. */
+static int
+tuple_waiter(PyObject *waiter, PyObject *gen, PyObject *clauses,
+             PyObject *actives, int edges)
+{
+    PyObject *clone, *it, *clause, *wl;
+    int r = -1;
+
+    if (PyObject_SetAttr(waiter, str_hasRun, one) < 0)
+        return -1;
+    clone = PyObject_CallFunctionObjArgs((PyObject *)Py_TYPE(waiter), gen,
+                                         NULL);
+    if (clone == NULL)
+        return -1;
+    it = PyObject_GetIter(clauses);
+    if (it == NULL)
+        goto done;
+
+    while ((clause = PyIter_Next(it)) != NULL) {
+        if (edges) {
+            wl = clause;
+        } else {
+            wl = PyObject_GetAttr(clause, str_eventWaiters);
+            Py_DECREF(clause);
+            if (wl == NULL)
+                goto done;
+        }
+        if (append(wl, clone) < 0 || set_active(actives, wl) < 0) {
+            Py_DECREF(wl);
+            goto done;
+        }
+        Py_DECREF(wl);
+    }
+    if (!PyErr_Occurred())
+        r = 0;
+
+done:
+    Py_XDECREF(it);
+    Py_DECREF(clone);
+    return r;
+}
+
+/* Handle one clause yielded to a _Waiter */
+static int
+waiter_clause(PyObject *clause, PyObject *clone, Py_ssize_t nr,
+              PyObject *waiters, PyObject *actives, PyObject *exc,
+              PyObject *t)
+{
+    PyObject *wl, *gen, *w, *repr, *type;
+    int r;
+
+    if ((r = PyObject_IsInstance(clause, _WaiterList)) != 0) {
+        if (r < 0 || append(clause, clone) < 0)
+            return -1;
+        return nr > 1 ? set_active(actives, clause) : 0;
+    }
+    if ((r = PyObject_IsInstance(clause, Signal)) != 0) {
+        if (r < 0)
+            return -1;
+        wl = PyObject_GetAttr(clause, str_eventWaiters);
+        if (wl == NULL)
+            return -1;
+        r = append(wl, clone);
+        if (r == 0 && nr > 1)
+            r = set_active(actives, wl);
+        Py_DECREF(wl);
+        return r;
+    }
+    if ((r = PyObject_IsInstance(clause, delay)) != 0)
+        return r < 0 ? -1 : schedule_delay(t, clause, clone);
+    if (PyGen_Check(clause)) {
+        w = PyObject_CallFunctionObjArgs(_Waiter, clause, clone, NULL);
+        if (w == NULL)
+            return -1;
+        r = PyList_Append(waiters, w);
+        Py_DECREF(w);
+        return r;
+    }
+    if ((r = PyObject_IsInstance(clause, join)) != 0) {
+        if (r < 0)
+            return -1;
+        gen = PyObject_CallMethodObjArgs(clause, str_genfunc, NULL);
+        if (gen == NULL)
+            return -1;
+        w = PyObject_CallFunctionObjArgs(_Waiter, gen, clone, NULL);
+        Py_DECREF(gen);
+        if (w == NULL)
+            return -1;
+        r = PyList_Append(waiters, w);
+        Py_DECREF(w);
+        return r;
+    }
+    if (clause == Py_None)
+        return PyList_Append(waiters, clone);
+    if ((r = PyObject_IsInstance(clause, PyExc_Exception)) != 0) {
+        if (r < 0 || PyList_Append(waiters, clone) < 0)
+            return -1;
+        if (PyList_GET_SIZE(exc) == 0)
+            return PyList_Append(exc, clause);
+        return 0;
+    }
+
+    repr = PyObject_Repr(clause);
+    type = PyObject_Str((PyObject *)Py_TYPE(clause));
+    if (repr != NULL && type != NULL)
+        PyErr_Format(PyExc_TypeError, "yield clause %s has type %s",
+                     PyString_AsString(repr), PyString_AsString(type));
+    Py_XDECREF(repr);
+    Py_XDECREF(type);
+    return -1;
+}
+
+/* _Waiter.next */
+static int
+plain_waiter(PyObject *waiter, PyObject *waiters, PyObject *actives,
+             PyObject *exc, PyObject *t)
+{
+    PyObject *value, *gen = NULL, *caller = NULL, *clone = NULL;
+    PyObject *clause = NULL, *clauses = NULL, *seq = NULL;
+    Py_ssize_t nr, i;
+    int r, status = -1;
+
+    if ((r = attr_true(waiter, str_hasRun)) != 0)
+        return r < 0 ? -1 : 0;
+
+    value = PyObject_GetAttr(waiter, str_semaphore);
+    if (value == NULL)
+        return -1;
+    if ((r = PyObject_IsTrue(value)) != 0) {
+        if (r > 0) {
+            clause = PyNumber_Subtract(value, one);
+            r = clause == NULL ? -1 :
+                PyObject_SetAttr(waiter, str_semaphore, clause);
+            Py_XDECREF(clause);
+        }
+        Py_DECREF(value);
+        return r;
+    }
+    Py_DECREF(value);
+
+    gen = PyObject_GetAttr(waiter, str_generator);
+    caller = PyObject_GetAttr(waiter, str_caller);
+    value = PyObject_GetAttr(waiter, str_nrTriggers);
+    if (gen == NULL || caller == NULL || value == NULL) {
+        Py_XDECREF(value);
+        goto done;
+    }
+    r = PyObject_RichCompareBool(value, one, Py_EQ);
+    Py_DECREF(value);
+    if (r < 0)
+        goto done;
+    if (r) {
+        clone = waiter;
+        Py_INCREF(clone);
+    } else {
+        if (PyObject_SetAttr(waiter, str_hasRun, one) < 0)
+            goto done;
+        clone = PyObject_CallFunctionObjArgs(_Waiter, gen, caller, NULL);
+        if (clone == NULL)
+            goto done;
+    }
+
+    clause = next_clause(gen);
+    if (clause == NULL) {
+        if (PyErr_Occurred() &&
+            !PyErr_ExceptionMatches(PyExc_StopIteration))
+            goto done;
+        PyErr_Clear();
+        if ((r = PyObject_IsTrue(caller)) > 0)
+            r = PyList_Append(waiters, caller);
+        status = r;
+        goto done;
+    }
+
+    if ((r = PyObject_IsInstance(clause, _WaiterList)) != 0) {
+        if (r < 0)
+            goto done;
+        clauses = PyTuple_Pack(1, clause);
+    } else if (PyTuple_Check(clause) || PyList_Check(clause)) {
+        nr = PySequence_Fast_GET_SIZE(clause);
+        value = PyInt_FromSsize_t(nr);
+        if (value == NULL)
+            goto done;
+        r = PyObject_SetAttr(clone, str_nrTriggers, value);
+        Py_DECREF(value);
+        if (r < 0)
+            goto done;
+        if (nr) {
+            clauses = clause;
+            Py_INCREF(clauses);
+        } else {
+            clauses = PyTuple_Pack(1, Py_None);
+        }
+    } else if ((r = PyObject_IsInstance(clause, join)) != 0) {
+        if (r < 0)
+            goto done;
+        clauses = PyObject_GetAttr(clause, str_args);
+        if (clauses == NULL)
+            goto done;
+        nr = PyObject_Size(clauses);
+        value = nr < 0 ? NULL : PyInt_FromSsize_t(nr - 1);
+        if (value == NULL)
+            goto done;
+        r = PyObject_SetAttr(clone, str_semaphore, value);
+        Py_DECREF(value);
+        if (r < 0)
+            goto done;
+    } else {
+        clauses = PyTuple_Pack(1, clause);
+    }
+    if (clauses == NULL)
+        goto done;
+
+    seq = PySequence_Fast(clauses, "yield clauses must be a sequence");
+    if (seq == NULL)
+        goto done;
+    nr = PySequence_Fast_GET_SIZE(seq);
+    for (i = 0; i < nr; i++) {
+        /* item list can't change, clauses of a list are not run */
+        if (waiter_clause(PySequence_Fast_GET_ITEM(seq, i), clone, nr,
+                          waiters, actives, exc, t) < 0)
+            goto done;
+    }
+    status = 0;
+
+done:
+    Py_XDECREF(seq);
+    Py_XDECREF(clauses);
+    Py_XDECREF(clause);
+    Py_XDECREF(clone);
+    Py_XDECREF(caller);
+    Py_XDECREF(gen);
+    return status;
+}
+
+/* _StaticWaiter.next once registered */
+static int
+static_waiter(PyObject *waiter)
+{
+    PyObject *count, *r;
+    int status;
+
+    if (PyObject_SetAttr(waiter, str_queued, zero) < 0)
+        return -1;
+    count = PyObject_GetAttr(waiter, str_activations);
+    if (count == NULL)
+        return -1;
+    r = PyNumber_Add(count, one);
+    Py_DECREF(count);
+    if (r == NULL)
+        return -1;
+    status = PyObject_SetAttr(waiter, str_activations, r);
+    Py_DECREF(r);
+    if (status < 0)
+        return -1;
+
+    r = PyObject_CallMethodObjArgs(waiter, str_func, NULL);
+    if (r == NULL)
+        return stop_iteration();
+    Py_DECREF(r);
+    return 0;
+}
+
+/* waiter.next(waiters, actives, exc), StopIteration is ignored */
+static int
+run_waiter(PyObject *waiter, PyObject *waiters, PyObject *actives,
+           PyObject *exc, PyObject *t)
+{
+    PyObject *type = (PyObject *)Py_TYPE(waiter);
+    PyObject *gen, *clause, *r;
+    int edges, status;
+
+    if (type == _Waiter)
+        return plain_waiter(waiter, waiters, actives, exc, t);
+
+    if (type == _StaticWaiter) {
+        if ((status = attr_true(waiter, str_registered)) < 0)
+            return -1;
+        if (status)
+            return static_waiter(waiter);
+    }
+
+    if (type == _SignalWaiter || type == _EdgeWaiter ||
+        type == _DelayWaiter) {
+        gen = PyObject_GetAttr(waiter, str_generator);
+        if (gen == NULL)
+            return -1;
+        clause = next_clause(gen);
+        Py_DECREF(gen);
+        if (clause == NULL)
+            return stop_iteration();
+
+        if (type == _SignalWaiter) {
+            r = PyObject_GetAttr(clause, str_eventWaiters);
+            status = r == NULL ? -1 : append(r, waiter);
+            Py_XDECREF(r);
+        } else if (type == _EdgeWaiter) {
+            status = append(clause, waiter);
+        } else {
+            status = schedule_delay(t, clause, waiter);
+        }
+        Py_DECREF(clause);
+        return status;
+    }
+
+    if (type == _SignalTupleWaiter || type == _EdgeTupleWaiter) {
+        edges = type == _EdgeTupleWaiter;
+        if ((status = attr_true(waiter, str_hasRun)) != 0)
+            return status < 0 ? -1 : 0;
+        gen = PyObject_GetAttr(waiter, str_generator);
+        if (gen == NULL)
+            return -1;
+        clause = next_clause(gen);
+        if (clause == NULL) {
+            Py_DECREF(gen);
+            return stop_iteration();
+        }
+        status = tuple_waiter(waiter, gen, clause, actives, edges);
+        Py_DECREF(clause);
+        Py_DECREF(gen);
+        return status;
+    }
+
+    r = PyObject_CallMethodObjArgs(waiter, str_next, waiters, actives, exc,
+                                   NULL);
+    if (r == NULL)
+        return stop_iteration();
+    Py_DECREF(r);
+    return 0;
+}
+
+
+/* Raise exception yielded by a generator */
+static void
+raise_exception(PyObject *e)
+{
+    if (PyExceptionInstance_Check(e))
+        PyErr_SetObject(PyExceptionInstance_Class(e), e);
+    else
+        PyErr_SetObject((PyObject *)Py_TYPE(e), e);
+}
+
+/* Call method without argument and discard result */
+static int
+call_method(PyObject *obj, PyObject *name, PyObject *arg)
+{
+    PyObject *r;
+
+    r = PyObject_CallMethodObjArgs(obj, name, arg, NULL);
+    if (r == NULL)
+        return -1;
+    Py_DECREF(r);
+    return 0;
+}
+
+/* Purge waiter lists with waiters that may have run */
+static int
+purge(PyObject *actives)
+{
+    PyObject *values;
+    Py_ssize_t i;
+    int r = 0;
+
+    values = PyDict_Values(actives);
+    if (values == NULL)
+        return -1;
+    for (i = 0; r == 0 && i < PyList_GET_SIZE(values); i++)
+        r = call_method(PyList_GET_ITEM(values, i), str_purge, NULL);
+    Py_DECREF(values);
+    PyDict_Clear(actives);
+    return r;
+}
+
+/* Run events of next time step */
+static int
+next_events(PyObject *t, PyObject *waiters)
+{
+    PyObject *entry, *event, *r;
+    int status;
+
+    while (PyList_GET_SIZE(_futureEvents)) {
+        entry = PyList_GET_ITEM(_futureEvents, 0);
+        if (!PyTuple_Check(entry) || PyTuple_GET_SIZE(entry) != 3) {
+            PyErr_SetString(PyExc_TypeError, "bad future event entry");
+            return -1;
+        }
+        status = PyObject_RichCompareBool(PyTuple_GET_ITEM(entry, 0), t,
+                                          Py_EQ);
+        if (status <= 0)
+            return status;
+
+        entry = PyObject_CallFunctionObjArgs(heappop, _futureEvents, NULL);
+        if (entry == NULL)
+            return -1;
+        event = PyTuple_GET_ITEM(entry, 2);
+        Py_INCREF(event);
+        Py_DECREF(entry);
+
+        status = PyObject_IsInstance(event, _Waiter);
+        if (status > 0) {
+            status = PyList_Append(waiters, event);
+        } else if (status == 0) {
+            r = PyObject_CallMethodObjArgs(event, str_apply, NULL);
+            status = r == NULL ? -1 : extend(waiters, r);
+            Py_XDECREF(r);
+        }
+        Py_DECREF(event);
+        if (status < 0)
+            return -1;
+    }
+    return 0;
+}
+
+PyDoc_STRVAR(run_doc,
+"run(waiters, cosim, maxTime, duration, exc)\n\
+\n\
+Simulation kernel, same as _Simulation._run.");
+
+static PyObject *
+run(PyObject *self, PyObject *args)
+{
+    PyObject *waiters, *cosim, *maxTime, *duration, *exc;
+    PyObject *t = NULL, *actives = NULL, *tracefile = NULL;
+    PyObject *waiter, *msg;
+    Py_ssize_t i, n;
+    int tracing, hascosim, status;
+
+    if (!PyArg_ParseTuple(args, "O!OOOO!:run", &PyList_Type, &waiters,
+                          &cosim, &maxTime, &duration, &PyList_Type, &exc))
+        return NULL;
+    if (init_globals() < 0)
+        return NULL;
+
+    if ((hascosim = PyObject_IsTrue(cosim)) < 0)
+        return NULL;
+    if ((tracing = attr_true(_simulator, str_tracing)) < 0)
+        return NULL;
+    if ((tracefile = PyObject_GetAttr(_simulator, str_tf)) == NULL)
+        goto error;
+    if ((t = PyObject_GetAttr(_simulator, str_time)) == NULL)
+        goto error;
+    if ((actives = PyDict_New()) == NULL)
+        goto error;
+
+    for (;;) {
+
+        for (i = 0; i < PyList_GET_SIZE(_siglist); i++) {
+            PyObject *sig = PyList_GET_ITEM(_siglist, i);
+            Py_INCREF(sig);
+            status = update_signal(sig, waiters);
+            Py_DECREF(sig);
+            if (status < 0)
+                goto error;
+        }
+        if (clear(_siglist) < 0)
+            goto error;
+
+        while ((n = PyList_GET_SIZE(waiters)) > 0) {
+            waiter = PyList_GET_ITEM(waiters, n - 1);
+            Py_INCREF(waiter);
+            if (PyList_SetSlice(waiters, n - 1, n, NULL) < 0) {
+                Py_DECREF(waiter);
+                goto error;
+            }
+            status = run_waiter(waiter, waiters, actives, exc, t);
+            Py_DECREF(waiter);
+            if (status < 0)
+                goto error;
+        }
+
+        if (hascosim) {
+            if (call_method(cosim, str_get, NULL) < 0)
+                goto error;
+            status = PyList_GET_SIZE(_siglist) > 0;
+            if (!status && (status = attr_true(cosim, str_hasChange)) < 0)
+                goto error;
+            if (status) {
+                if (call_method(cosim, str_put, t) < 0)
+                    goto error;
+                continue;
+            }
+        } else if (PyList_GET_SIZE(_siglist)) {
+            continue;
+        }
+
+        if (PyDict_Size(actives) && purge(actives) < 0)
+            goto error;
+
+        /* at this point it is safe to potentially suspend a simulation */
+        if (PyList_GET_SIZE(exc)) {
+            raise_exception(PyList_GET_ITEM(exc, 0));
+            goto error;
+        }
+
+        /* future events */
+        if (PyList_GET_SIZE(_futureEvents) == 0) {
+            PyErr_SetString(StopSimulation, "No more events");
+            goto error;
+        }
+        if ((status = PyObject_RichCompareBool(t, maxTime, Py_EQ)) != 0) {
+            if (status > 0) {
+                msg = PyString_FromString("Simulated ");
+                PyString_ConcatAndDel(&msg, PyObject_Str(duration));
+                PyString_ConcatAndDel(&msg, PyString_FromString(" timesteps"));
+                if (msg != NULL) {
+                    PyErr_SetObject(SuspendSimulation, msg);
+                    Py_DECREF(msg);
+                }
+            }
+            goto error;
+        }
+
+        Py_DECREF(t);
+        t = PyTuple_GetItem(PyList_GET_ITEM(_futureEvents, 0), 0);
+        Py_XINCREF(t);
+        if (t == NULL || PyObject_SetAttr(_simulator, str_time, t) < 0)
+            goto error;
+        if (tracing && call_method(tracefile, str_timestep, t) < 0)
+            goto error;
+        if (hascosim && call_method(cosim, str_put, t) < 0)
+            goto error;
+        if (next_events(t, waiters) < 0)
+            goto error;
+    }
+
+error:
+    Py_XDECREF(t);
+    Py_XDECREF(actives);
+    Py_XDECREF(tracefile);
+    return NULL;
+}
+
+
+static PyMethodDef _simrunc_methods[] = {
+    {"run", run, METH_VARARGS, run_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+PyMODINIT_FUNC
+init_simrunc(void)
+{
+    Py_InitModule3("_simrunc", _simrunc_methods,
+                   "Accelerated simulation kernel.");
+}
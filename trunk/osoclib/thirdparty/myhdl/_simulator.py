@@ -24,6 +24,8 @@ now -- function that returns the current simulation time
 
 """
 
+from heapq import heappush
+from itertools import count
 
 _signals = []
 _siglist = []
@@ -36,3 +38,11 @@ _tf = None
 def now():
     """ Return the current simulation time """
     return _time
+
+# _futureEvents is a heap of (time, sequence number, event) entries,
+# the sequence number keeps same time events in scheduling order
+_eventSeq = count().next
+
+def _schedule(event):
+    """ Schedule a (time, event) tuple """
+    heappush(_futureEvents, (event[0], _eventSeq(), event[1]))
@@ -29,9 +29,12 @@ import os
 path = os.path
 import shutil
 from sets import Set
+from fnmatch import fnmatchcase
+from cStringIO import StringIO
 
 from myhdl import _simulator, Signal, __version__
 from myhdl._extractHierarchy import _HierExtr
+from myhdl._waveform import _WaveWriter
 from myhdl import TraceSignalsError
 
 _tracing = 0
@@ -42,14 +45,94 @@ class _error:
 _error.TopLevelName = "result of traceSignals call should be assigned to a top level name"
 _error.ArgType = "traceSignals first argument should be a classic function"
 _error.MultipleTraces = "Cannot trace multiple instances simultaneously"
+_error.Compression = "Unsupported VCD file compression"
+_error.Format = "Unsupported trace file format"
+
+# VCD file extensions and open functions, by compression
+def _openPlain(filename):
+    return open(filename, 'w')
+
+def _openBinary(filename):
+    return open(filename, 'wb')
+
+def _openGzip(filename):
+    import gzip
+    return gzip.open(filename, 'wb')
+
+def _openBz2(filename):
+    import bz2
+    return bz2.BZ2File(filename, 'w')
+
+_compressions = {None: (".vcd", _openPlain),
+                 "gzip": (".vcd.gz", _openGzip),
+                 "bz2": (".vcd.bz2", _openBz2)
+                }
+
+
+class _VcdWriter(object):
+
+    """ Buffered VCD output file.
+
+    Value changes are written in a memory buffer, which is written to the
+    output file at the next time step once it is larger than bufsize.
+
+    """
+
+    def __init__(self, f, bufsize=1 << 16):
+        self._file = f
+        self._bufsize = bufsize
+        self._buf = StringIO()
+        self.write = self._buf.write
+
+    def timestep(self, t):
+        """ Start time step t """
+        if self._buf.tell() >= self._bufsize:
+            self._flushBuffer()
+        self.write("#%s\n" % t)
+
+    def _flushBuffer(self):
+        self._file.write(self._buf.getvalue())
+        self._buf = StringIO()
+        self.write = self._buf.write
+
+    def flush(self):
+        self._flushBuffer()
+        self._file.flush()
+
+    def close(self):
+        self._flushBuffer()
+        self._file.close()
 
 
 class _TraceSignalsClass(object):
 
-    __slot__ = ("name", )
+    """ Trace signals of a design in a VCD file or a waveform database.
+
+    Attributes:
+    name -- trace file base name (default: name of the design function)
+    format -- "vcd" or "wdb" for a waveform database (default: "vcd")
+    compression -- VCD file compression, None, "gzip" or "bz2"
+                   (default: None)
+    depth -- maximum hierarchy depth of traced instances (default: all)
+    filter -- list of signal name patterns (default: all signals). Patterns
+              are matched against local and hierarchical names, such as
+              "clk" or "top.inst.clk".
+    bufsize -- VCD output buffer size
+    chunksize -- number of value changes in a waveform database chunk
+
+    """
+
+    __slot__ = ("name", "format", "compression", "depth", "filter",
+                "bufsize", "chunksize")
 
     def __init__(self):
         self.name = None
+        self.format = "vcd"
+        self.compression = None
+        self.depth = None
+        self.filter = None
+        self.bufsize = 1 << 16
+        self.chunksize = 1 << 16
 
     def __call__(self, dut, *args, **kwargs):
         global _tracing
@@ -74,17 +157,35 @@ class _TraceSignalsClass(object):
                 name = str(self.name)
             if name is None:
                 raise TraceSignalsError(_error.TopLevelName)
+            if not self.format in ("vcd", "wdb"):
+                raise TraceSignalsError(_error.Format, repr(self.format))
+            if not self.compression in _compressions:
+                raise TraceSignalsError(_error.Compression,
+                                        repr(self.compression))
             h = _HierExtr(name, dut, *args, **kwargs)
-            vcdpath = name + ".vcd"
+            if self.format == "wdb":
+                ext, openfunc = ".wdb", _openBinary
+            else:
+                ext, openfunc = _compressions[self.compression]
+            vcdpath = name + ext
             if path.exists(vcdpath):
                 backup = vcdpath + '.' + str(path.getmtime(vcdpath))
                 shutil.copyfile(vcdpath, backup)
                 os.remove(vcdpath)
-            vcdfile = open(vcdpath, 'w')
-            _simulator._tracing = 1
-            _simulator._tf = vcdfile
-            _writeVcdHeader(vcdfile)
-            _writeVcdSigs(vcdfile, h.hierarchy)
+            if self.format == "wdb":
+                wavefile = _WaveWriter(openfunc(vcdpath), self.chunksize)
+                _simulator._tracing = 1
+                _simulator._tf = wavefile
+                for level, scopename, sigs in _tracedScopes(h.hierarchy,
+                                                            self.depth,
+                                                            self.filter):
+                    wavefile.scope(level, scopename, sigs)
+            else:
+                vcdfile = _VcdWriter(openfunc(vcdpath), self.bufsize)
+                _simulator._tracing = 1
+                _simulator._tf = vcdfile
+                _writeVcdHeader(vcdfile)
+                _writeVcdSigs(vcdfile, h.hierarchy, self.depth, self.filter)
         finally:
             _tracing = 0
 
@@ -124,15 +225,36 @@ def _writeVcdHeader(f):
     print >> f, "$end"
     print >> f
 
-def _writeVcdSigs(f, hierarchy):
+def _isTraced(scope, name, filter):
+    """ Check if a signal name matches one of the filter patterns """
+    if not filter:
+        return True
+    fullname = "%s.%s" % (scope, name)
+    for pattern in filter:
+        if fnmatchcase(name, pattern) or fnmatchcase(fullname, pattern):
+            return True
+    return False
+
+def _tracedScopes(hierarchy, depth=None, filter=None):
+    """ Generate (level, name, [(name, signal)]) traced hierarchy scopes """
+    scope = []
+    if isinstance(filter, basestring):
+        filter = [filter]
+    for inst in hierarchy:
+        level = inst.level
+        if depth is not None and level > depth:
+            continue
+        scope[level-1:] = [inst.name]
+        prefix = ".".join(scope)
+        sigs = [(n, s) for n, s in inst.sigdict.items()
+                if _isTraced(prefix, n, filter)]
+        yield level, inst.name, sigs
+
+def _writeVcdSigs(f, hierarchy, depth=None, filter=None):
     curlevel = 0
     namegen = _genNameCode()
     siglist = []
-    for inst in hierarchy:
-        level = inst.level
-        name = inst.name
-        sigdict = inst.sigdict
-        memdict = inst.memdict
+    for level, name, sigs in _tracedScopes(hierarchy, depth, filter):
         delta = curlevel - level
         curlevel = level
         assert(delta >= -1)
@@ -140,10 +262,9 @@ def _writeVcdSigs(f, hierarchy):
             for i in range(delta + 1):
                 print >> f, "$upscope $end"
         print >> f, "$scope module %s $end" % name
-        for n, s in sigdict.items():
+        for n, s in sigs:
             if not s._tracing:
-                s._tracing = 1
-                s._code = namegen.next()
+                s._trace(namegen.next())
                 siglist.append(s)
             w = s._nrbits
             if w:
@@ -0,0 +1,513 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl waveform database module.
+
+The waveform database is a compact binary alternative to VCD files,
+written by traceSignals when its format attribute is "wdb".
+
+Value changes are written in chunks. In each chunk, the changes of a
+signal are stored in a zlib compressed block holding its delta encoded
+change times followed by its values. The file ends with an index of the
+signals, the hierarchy scopes and the chunks, so that a reader only
+decodes the blocks of the requested signal and time window.
+
+File layout:
+    magic
+    chunks blocks
+    index (zlib compressed)
+    trailer: index offset and length (little endian 64 bits), magic
+
+"""
+
+import os
+import time
+import zlib
+import mmap
+import struct
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+from myhdl import WaveformError, intbv, bin, __version__
+
+class _error:
+    pass
+_error.BadFile = "Not a waveform database file"
+_error.UnknownSignal = "Unknown signal"
+
+_MAGIC = "MYHDLWDB"
+_TRAILER = "<QQ"
+_TRAILERSIZE = struct.calcsize(_TRAILER) + len(_MAGIC)
+
+# signal kinds
+_BIT = "b"      # bool, values 0 or 1
+_VEC = "v"      # intbv with a bit width, integer values
+_INT = "i"      # int or unbounded intbv, integer values
+_STR = "s"      # any other type, string values
+
+
+def _putNum(out, n):
+    """ Append natural integer n to out list as a varint """
+    while n > 0x7f:
+        out.append(chr((n & 0x7f) | 0x80))
+        n >>= 7
+    out.append(chr(n))
+
+def _getNum(data, pos):
+    """ Return natural integer varint in data at pos, and next pos """
+    n = shift = 0
+    while 1:
+        b = ord(data[pos])
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def _putInt(out, n):
+    """ Append integer n to out list as a zigzag varint """
+    if n >= 0:
+        _putNum(out, n << 1)
+    else:
+        _putNum(out, ((-n) << 1) - 1)
+
+def _getInt(data, pos):
+    """ Return integer zigzag varint in data at pos, and next pos """
+    n, pos = _getNum(data, pos)
+    if n & 1:
+        return -((n + 1) >> 1), pos
+    return n >> 1, pos
+
+def _putStr(out, s):
+    _putNum(out, len(s))
+    out.append(s)
+
+def _getStr(data, pos):
+    n, pos = _getNum(data, pos)
+    return data[pos:pos+n], pos + n
+
+
+def _kind(s):
+    """ Return kind and width of signal s """
+    if s._type is bool:
+        return _BIT, 1
+    if s._type is intbv and s._nrbits:
+        return _VEC, s._nrbits
+    if s._type in (intbv, (int, long)):
+        return _INT, 0
+    return _STR, s._nrbits
+
+def _recorder(append, index, sig, kind):
+    """ Return value change recording function of a signal """
+    if kind == _INT:
+        def record():
+            append((index, int(sig._val)))
+    elif kind == _STR:
+        def record():
+            append((index, str(sig._val)))
+    else:
+        # intbv values are copied before being modified, keep references
+        def record():
+            append((index, sig._val))
+    return record
+
+def _encodeBlock(kind, tstart, times, values):
+    out = []
+    prev = tstart
+    for t in times:
+        _putNum(out, t - prev)
+        prev = t
+    if kind == _BIT:
+        out.append("".join([v and "\x01" or "\x00" for v in values]))
+    elif kind == _STR:
+        for v in values:
+            _putStr(out, v)
+    else:
+        for v in values:
+            _putInt(out, int(v))
+    return zlib.compress("".join(out))
+
+def _decodeBlock(kind, tstart, count, data):
+    data = zlib.decompress(data)
+    times = []
+    pos = 0
+    t = tstart
+    for i in xrange(count):
+        d, pos = _getNum(data, pos)
+        t += d
+        times.append(t)
+    if kind == _BIT:
+        values = [ord(c) for c in data[pos:pos+count]]
+    else:
+        if kind == _STR:
+            get = _getStr
+        else:
+            get = _getInt
+        values = []
+        for i in xrange(count):
+            v, pos = get(data, pos)
+            values.append(v)
+    return times, values
+
+
+class _WaveWriter(object):
+
+    """ Waveform database trace file.
+
+    Signals value changes are logged in memory, and written as a chunk at
+    the next time step once chunksize changes have been logged.
+
+    """
+
+    def __init__(self, f, chunksize=1 << 16):
+        self.timescale = "1ns"
+        self._file = f
+        self._chunksize = chunksize
+        self._log = []
+        self._time = 0
+        self._signals = {}
+        self._kinds = []
+        self._scopes = []
+        self._chunks = []
+        f.write(_MAGIC)
+        self._offset = len(_MAGIC)
+
+    def scope(self, level, name, sigs):
+        """ Add a hierarchy scope with its list of (name, signal) """
+        vars = []
+        for n, s in sigs:
+            index = self._signals.get(id(s))
+            if index is None:
+                index = self._signals[id(s)] = len(self._kinds)
+                kind, width = _kind(s)
+                self._kinds.append((kind, width))
+                s._tracing = 1
+                s._printVcd = _recorder(self._log.append, index, s, kind)
+                s._printVcd() # initial value
+            vars.append((n, index))
+        self._scopes.append((level, name, vars))
+
+    def timestep(self, t):
+        """ Start time step t """
+        if len(self._log) >= self._chunksize:
+            self._flushChunk()
+        self._log.append((-1, t))
+
+    def _flushChunk(self):
+        log = self._log
+        if not log:
+            return
+        columns = {}
+        t = tstart = self._time
+        for index, v in log:
+            if index < 0:
+                t = v
+                continue
+            column = columns.get(index)
+            if column is None:
+                column = columns[index] = ([], [])
+            column[0].append(t)
+            column[1].append(v)
+        blocks = []
+        offset = self._offset
+        for index in sorted(columns):
+            times, values = columns[index]
+            data = _encodeBlock(self._kinds[index][0], tstart, times, values)
+            self._file.write(data)
+            blocks.append((index, len(times), len(data)))
+            self._offset += len(data)
+        self._chunks.append((tstart, t, offset, blocks))
+        self._time = t
+        # recorders keep a reference to the log append method
+        del log[:]
+
+    def _index(self):
+        out = []
+        _putStr(out, self.timescale)
+        _putNum(out, len(self._kinds))
+        for kind, width in self._kinds:
+            out.append(kind)
+            _putNum(out, width)
+        _putNum(out, len(self._scopes))
+        for level, name, vars in self._scopes:
+            _putNum(out, level)
+            _putStr(out, name)
+            _putNum(out, len(vars))
+            for n, index in vars:
+                _putStr(out, n)
+                _putNum(out, index)
+        _putNum(out, len(self._chunks))
+        for tstart, tend, offset, blocks in self._chunks:
+            _putNum(out, tstart)
+            _putNum(out, tend - tstart)
+            _putNum(out, offset)
+            _putNum(out, len(blocks))
+            for index, count, length in blocks:
+                _putNum(out, index)
+                _putNum(out, count)
+                _putNum(out, length)
+        return zlib.compress("".join(out))
+
+    def flush(self):
+        self._flushChunk()
+        self._file.flush()
+
+    def close(self):
+        self._flushChunk()
+        index = self._index()
+        self._file.write(index)
+        self._file.write(struct.pack(_TRAILER, self._offset, len(index)))
+        self._file.write(_MAGIC)
+        self._file.close()
+
+
+class WaveReader(object):
+
+    """ Waveform database reader.
+
+    The file is memory mapped, only the blocks needed to answer a query
+    are read and decoded.
+
+    Attributes:
+    timescale -- time unit of the file, as in VCD files
+    names -- hierarchical signal names, such as "top.inst.clk"
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        f = open(filename, 'rb')
+        try:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (mmap.error, ValueError, EnvironmentError):
+                raise WaveformError(_error.BadFile, filename)
+        finally:
+            f.close()
+        size = len(self._map)
+        if size < len(_MAGIC) + _TRAILERSIZE or \
+           self._map[:len(_MAGIC)] != _MAGIC or \
+           self._map[-len(_MAGIC):] != _MAGIC:
+            self._map.close()
+            raise WaveformError(_error.BadFile, filename)
+        offset, length = struct.unpack(_TRAILER,
+                                       self._map[-_TRAILERSIZE:-len(_MAGIC)])
+        try:
+            self._readIndex(zlib.decompress(self._map[offset:offset+length]))
+        except (zlib.error, IndexError):
+            self._map.close()
+            raise WaveformError(_error.BadFile, filename)
+
+    def _readIndex(self, data):
+        self.timescale, pos = _getStr(data, 0)
+        n, pos = _getNum(data, pos)
+        self._kinds = []
+        for i in range(n):
+            kind = data[pos]
+            width, pos = _getNum(data, pos + 1)
+            self._kinds.append((kind, width))
+        n, pos = _getNum(data, pos)
+        self._scopes = []
+        self._vars = {}
+        self.names = []
+        scope = []
+        for i in range(n):
+            level, pos = _getNum(data, pos)
+            name, pos = _getStr(data, pos)
+            scope[level-1:] = [name]
+            nvars, pos = _getNum(data, pos)
+            vars = []
+            for j in range(nvars):
+                varname, pos = _getStr(data, pos)
+                index, pos = _getNum(data, pos)
+                vars.append((varname, index))
+                fullname = ".".join(scope + [varname])
+                self._vars[fullname] = index
+                self.names.append(fullname)
+            self._scopes.append((level, name, vars))
+        n, pos = _getNum(data, pos)
+        self._chunks = []
+        self._starts = []
+        self._ends = []
+        for i in range(n):
+            tstart, pos = _getNum(data, pos)
+            duration, pos = _getNum(data, pos)
+            offset, pos = _getNum(data, pos)
+            nblocks, pos = _getNum(data, pos)
+            blocks = {}
+            for j in range(nblocks):
+                index, pos = _getNum(data, pos)
+                count, pos = _getNum(data, pos)
+                length, pos = _getNum(data, pos)
+                blocks[index] = (offset, count, length)
+                offset += length
+            self._chunks.append((tstart, blocks))
+            self._starts.append(tstart)
+            self._ends.append(tstart + duration)
+
+    def _index(self, name):
+        try:
+            return self._vars[name]
+        except KeyError:
+            raise WaveformError(_error.UnknownSignal, name)
+
+    def _decode(self, index, tstart, block):
+        offset, count, length = block
+        return _decodeBlock(self._kinds[index][0], tstart, count,
+                            self._map[offset:offset+length])
+
+    def width(self, name):
+        """ Return the bit width of a signal, 0 if it is not a bit vector """
+        return self._kinds[self._index(name)][1]
+
+    def changes(self, name, start=None, end=None):
+        """ Return the list of (time, value) changes of a signal.
+
+        start -- if given, changes before start are skipped
+        end -- if given, changes after end are skipped
+
+        """
+        index = self._index(name)
+        if start is None:
+            first = 0
+        else:
+            first = bisect_left(self._ends, start)
+        result = []
+        for tstart, blocks in self._chunks[first:]:
+            if end is not None and tstart > end:
+                break
+            block = blocks.get(index)
+            if block is None:
+                continue
+            times, values = self._decode(index, tstart, block)
+            lo, hi = 0, len(times)
+            if start is not None:
+                lo = bisect_left(times, start)
+            if end is not None:
+                hi = bisect_right(times, end)
+            result.extend(zip(times[lo:hi], values[lo:hi]))
+        return result
+
+    def value(self, name, t):
+        """ Return the value of a signal at time t, None before its first
+        change.
+        """
+        index = self._index(name)
+        last = bisect_right(self._starts, t)
+        for tstart, blocks in reversed(self._chunks[:last]):
+            block = blocks.get(index)
+            if block is None:
+                continue
+            times, values = self._decode(index, tstart, block)
+            i = bisect_right(times, t)
+            if i:
+                return values[i-1]
+        return None
+
+    def close(self):
+        self._map.close()
+
+
+def waveToVcd(filename, vcdname=None):
+    """ Convert a waveform database to a VCD file.
+
+    filename -- waveform database file name
+    vcdname -- VCD file name, by default the database file name with a
+               .vcd extension
+
+    """
+    from myhdl._traceSignals import _namecode
+    if vcdname is None:
+        vcdname = os.path.splitext(filename)[0] + ".vcd"
+    reader = WaveReader(filename)
+    f = open(vcdname, 'w')
+    try:
+        _writeVcd(f, reader, _namecode)
+    finally:
+        f.close()
+        reader.close()
+    return vcdname
+
+def _writeVcd(f, reader, namecode):
+    print >> f, "$date"
+    print >> f, "    %s" % time.asctime()
+    print >> f, "$end"
+    print >> f, "$version"
+    print >> f, "    MyHDL %s" % __version__
+    print >> f, "$end"
+    print >> f, "$timescale"
+    print >> f, "    %s" % reader.timescale
+    print >> f, "$end"
+    print >> f
+
+    curlevel = 0
+    for level, name, vars in reader._scopes:
+        delta = curlevel - level
+        curlevel = level
+        if delta >= 0:
+            for i in range(delta + 1):
+                print >> f, "$upscope $end"
+        print >> f, "$scope module %s $end" % name
+        for n, index in vars:
+            kind, width = reader._kinds[index]
+            code = namecode(index)
+            if width:
+                print >> f, "$var reg %s %s %s $end" % (width, code, n)
+            else:
+                print >> f, "$var real 1 %s %s $end" % (code, n)
+    for i in range(curlevel):
+        print >> f, "$upscope $end"
+    print >> f
+    print >> f, "$enddefinitions $end"
+
+    formats = []
+    for index, (kind, width) in enumerate(reader._kinds):
+        code = namecode(index)
+        if kind == _BIT:
+            formats.append(("0%s\n" % code, "1%s\n" % code))
+        elif kind == _VEC:
+            formats.append(lambda v, w=width, c=" %s\n" % code:
+                           "b" + bin(v, w) + c)
+        else:
+            formats.append(lambda v, c=" %s\n" % code: "s%s%s" % (v, c))
+
+    print >> f, "$dumpvars"
+    dumping = True
+    current = 0
+    for tstart, blocks in reader._chunks:
+        changes = []
+        for index, block in blocks.items():
+            times, values = reader._decode(index, tstart, block)
+            changes.extend(zip(times, [index] * len(times), values))
+        # stable sort keeps the order of changes of a signal in a time step
+        changes.sort(key=itemgetter(0))
+        for t, index, v in changes:
+            if t != current or (dumping and t):
+                if dumping:
+                    print >> f, "$end"
+                    dumping = False
+                current = t
+                f.write("#%s\n" % t)
+            fmt = formats[index]
+            if type(fmt) is tuple:
+                f.write(fmt[v])
+            else:
+                f.write(fmt(v))
+    if dumping:
+        print >> f, "$end"
@@ -26,7 +26,8 @@ import inspect
 import compiler
 from compiler import ast as astNode
 from sets import Set
-from types import GeneratorType, FunctionType, ClassType, MethodType
+from types import GeneratorType, FunctionType, ClassType, MethodType, \
+                  InstanceType
 from cStringIO import StringIO
 import re
 import warnings
@@ -51,6 +52,102 @@ builtinObjects = __builtin__.__dict__.values()
 
 _enumTypeSet = set()
 
+# parsed and checked source trees by code object, see _parseSource
+_sourceCache = {}
+
+def _copyTree(node):
+    """ Return a copy of an AST, nodes are copied but not their values """
+    d = node.__dict__.copy()
+    for n, v in d.iteritems():
+        if isinstance(v, astNode.Node):
+            d[n] = _copyTree(v)
+        elif isinstance(v, (list, tuple)):
+            d[n] = _copySeq(v)
+    return InstanceType(node.__class__, d)
+
+def _copySeq(seq):
+    l = []
+    for v in seq:
+        if isinstance(v, astNode.Node):
+            v = _copyTree(v)
+        elif isinstance(v, (list, tuple)):
+            v = _copySeq(v)
+        l.append(v)
+    if isinstance(seq, tuple):
+        return tuple(l)
+    return l
+
+class _SymDict(object):
+
+    """ Symbol table of a generator or a function.
+
+    The global namespace of the function is shared, not copied, as it is
+    the same for all the instances of a design. The symbols of an instance
+    (free variables, generator locals and function arguments) are kept in
+    an overlay that hides the global names. The global namespace is never
+    modified.
+
+    """
+
+    def __init__(self, globals, symbols=None):
+        self.globals = globals
+        self.symbols = {}
+        if symbols is not None:
+            self.symbols.update(symbols)
+
+    def __contains__(self, n):
+        return n in self.symbols or n in self.globals
+
+    def __getitem__(self, n):
+        if n in self.symbols:
+            return self.symbols[n]
+        return self.globals[n]
+
+    def __setitem__(self, n, v):
+        self.symbols[n] = v
+
+    def select(self, types):
+        """ Return a dict of the symbols that are instances of types. """
+        d = dict([(n, v) for n, v in self.globals.iteritems()
+                  if isinstance(v, types)])
+        for n, v in self.symbols.iteritems():
+            if isinstance(v, types):
+                d[n] = v
+            elif n in d:
+                del d[n]
+        return d
+
+    def eval(self, expr, vardict):
+        """ Evaluate an expression, variables hide the symbols. """
+        names = self.symbols.copy()
+        names.update(vardict)
+        return eval(expr, self.globals, names)
+
+
+def _parseSource(obj, code, decorated=True):
+    """ Return the AST of the source of a function or generator frame.
+
+    The source is parsed and checked by _NotSupportedVisitor once per code
+    object. As analysis visitors annotate the tree, a copy of the cached
+    tree is returned.
+
+    """
+    key = (code, code.co_filename)
+    tree = _sourceCache.get(key)
+    if tree is None:
+        s = inspect.getsource(obj)
+        if decorated:
+            # remove decorators
+            s = re.sub(r"@.*", "", s)
+        s = s.lstrip()
+        tree = compiler.parse(s)
+        tree.sourcefile = inspect.getsourcefile(obj)
+        tree.lineoffset = inspect.getsourcelines(obj)[1]-1
+        v = _NotSupportedVisitor(tree)
+        compiler.walk(tree, v)
+        _sourceCache[key] = tree
+    return _copyTree(tree)
+
 
 def _makeName(n, prefixes):
     if len(prefixes) > 1:
@@ -131,15 +228,8 @@ def _analyzeGens(top, absnames):
             ast = g
         elif isinstance(g, (_AlwaysComb, _Always)):
             f = g.func
-            s = inspect.getsource(f)
-            # remove decorators
-            s = re.sub(r"@.*", "", s)
-            s = s.lstrip()
-            ast = compiler.parse(s)
-            # print ast
-            ast.sourcefile = inspect.getsourcefile(f)
-            ast.lineoffset = inspect.getsourcelines(f)[1]-1
-            ast.symdict = f.func_globals.copy()
+            ast = _parseSource(f, f.func_code)
+            ast.symdict = _SymDict(f.func_globals)
             ast.callstack = []
             # handle free variables
             if f.func_code.co_freevars:
@@ -151,8 +241,6 @@ def _analyzeGens(top, absnames):
                                _isMem(obj) or _isTupleOfInts(obj)
                     ast.symdict[n] = obj
             ast.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
-            v = _NotSupportedVisitor(ast)
-            compiler.walk(ast, v)
             if isinstance(g, _AlwaysComb):
                 v = _AnalyzeAlwaysCombVisitor(ast, g.senslist)
             else:
@@ -160,20 +248,10 @@ def _analyzeGens(top, absnames):
             compiler.walk(ast, v)
         else: # @instance
             f = g.gen.gi_frame
-            s = inspect.getsource(f)
-            # remove decorators
-            s = re.sub(r"@.*", "", s)
-            s = s.lstrip()
-            ast = compiler.parse(s)
-            # print ast
-            ast.sourcefile = inspect.getsourcefile(f)
-            ast.lineoffset = inspect.getsourcelines(f)[1]-1
-            ast.symdict = f.f_globals.copy()
-            ast.symdict.update(f.f_locals)
+            ast = _parseSource(f, f.f_code)
+            ast.symdict = _SymDict(f.f_globals, f.f_locals)
             ast.callstack = []
             ast.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
-            v = _NotSupportedVisitor(ast)
-            compiler.walk(ast, v)
             v = _AnalyzeBlockVisitor(ast)
             compiler.walk(ast, v)
         genlist.append(ast)
@@ -521,15 +599,10 @@ class _AnalyzeVisitor(_ConversionMixin):
             pass
         elif type(f) is FunctionType:
             argsAreInputs = False
-            s = inspect.getsource(f)
-            s = s.lstrip()
-            ast = compiler.parse(s)
-            # print ast
+            ast = _parseSource(f, f.func_code, decorated=False)
             fname = f.__name__
             ast.name = _Label(fname)
-            ast.sourcefile = inspect.getsourcefile(f)
-            ast.lineoffset = inspect.getsourcelines(f)[1]-1
-            ast.symdict = f.func_globals.copy()
+            ast.symdict = _SymDict(f.func_globals)
             if fname in self.ast.callstack:
                 self.raiseError(node, _error.NotSupported, "Recursive call")
             ast.callstack = self.ast.callstack[:]
@@ -541,8 +614,6 @@ class _AnalyzeVisitor(_ConversionMixin):
                     if not  isinstance(obj, (int, long, Signal)):
                         self.raiseError(node, _error.FreeVarTypeError, n)
                     ast.symdict[n] = obj
-            v = _NotSupportedVisitor(ast)
-            compiler.walk(ast, v)
             v = _AnalyzeFuncVisitor(ast, node.args)
             compiler.walk(ast, v)
             node.obj = ast.returnObj
@@ -917,9 +988,7 @@ class _AnalyzeBlockVisitor(_AnalyzeVisitor):
     
     def __init__(self, ast):
         _AnalyzeVisitor.__init__(self, ast)
-        for n, v in self.ast.symdict.items():
-            if isinstance(v, Signal):
-                self.ast.sigdict[n] = v
+        self.ast.sigdict.update(self.ast.symdict.select(Signal))
         
     def visitFunction(self, node, *args):
         self.refStack.push()
@@ -1020,9 +1089,7 @@ class _AnalyzeFuncVisitor(_AnalyzeVisitor):
                 n = argnames[i]
                 self.ast.symdict[n] = self.getObj(arg)
             self.ast.argnames.append(n)
-        for n, v in self.ast.symdict.items():
-            if isinstance(v, (Signal, intbv)):
-                self.ast.sigdict[n] = v
+        self.ast.sigdict.update(self.ast.symdict.select((Signal, intbv)))
         self.visit(node.code)
         self.refStack.pop()
         if self.ast.hasYield:
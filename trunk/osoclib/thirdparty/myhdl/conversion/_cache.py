@@ -0,0 +1,303 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl conversion cache module.
+
+A converted design is identified by a fingerprint, computed while the
+hierarchy of the design is extracted, so that the design is elaborated
+only once. It covers the myhdl sources, the convertor options, the source
+files of the functions called during elaboration and of the generators,
+the arguments of these calls and the values the generators refer to:
+signal types, widths and initial values, and constants. The files
+generated for a fingerprint are kept in the cache directory, and are
+restored when the fingerprint is found again.
+
+Designs that refer to objects with no known description, such as
+instances of user classes, are not cached.
+
+"""
+
+import sys
+import os
+import cPickle
+import tempfile
+from sets import Set
+from types import FunctionType, GeneratorType
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
+import myhdl
+from myhdl._Signal import Signal
+from myhdl._intbv import intbv
+from myhdl._enum import EnumType, EnumItemType
+from myhdl._util import _flatten
+from myhdl._cell_deref import _cell_deref
+from myhdl._always_comb import _AlwaysComb
+from myhdl._always import _Always
+from myhdl._instance import _Instantiator
+from myhdl._extractHierarchy import _HierExtr
+
+# increment when the fingerprint or the cache entry format changes
+_cacheVersion = 2
+
+_CO_VARARGS = 0x4
+_CO_VARKEYWORDS = 0x8
+
+# functions of myhdl and of the python library are not part of designs,
+# unlike the functions of installed packages
+_myhdlDir = os.path.dirname(os.path.abspath(myhdl.__file__))
+_myhdlDirs = (_myhdlDir, os.path.join(_myhdlDir, "conversion"))
+_libDir = os.path.dirname(os.path.abspath(os.__file__)) + os.sep
+_packageDirs = ("site-packages", "dist-packages")
+
+# digest of the myhdl sources, see _myhdlDigest
+_myhdlHash = None
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _isDesignFile(filename):
+    filename = os.path.abspath(filename)
+    if os.path.dirname(filename) in _myhdlDirs:
+        return False
+    if not filename.startswith(_libDir):
+        return True
+    return filename[len(_libDir):].split(os.sep)[0] in _packageDirs
+
+def _myhdlDigest():
+    """ Return a digest of the myhdl sources, so that cached files are
+    converted again by a modified convertor.
+    """
+    global _myhdlHash
+    if _myhdlHash is None:
+        h = md5()
+        for d in _myhdlDirs:
+            for name in sorted(os.listdir(d)):
+                if not name.endswith(".py"):
+                    continue
+                f = open(os.path.join(d, name), 'rb')
+                try:
+                    h.update(name)
+                    h.update(f.read())
+                finally:
+                    f.close()
+        _myhdlHash = h.hexdigest()
+    return _myhdlHash
+
+def _describe(obj, files):
+    """ Return a description of an object that repr() makes stable. """
+    if obj is None or isinstance(obj, (bool, int, long, float, str, unicode)):
+        return obj
+    elif isinstance(obj, Signal):
+        return ('Signal', _describe(obj._val, files), obj._nrbits,
+                obj._min, obj._max)
+    elif isinstance(obj, intbv):
+        return ('intbv', obj._val, obj._min, obj._max)
+    elif isinstance(obj, EnumItemType):
+        return ('EnumItem', _describe(obj._type, files), obj._name)
+    elif isinstance(obj, EnumType):
+        return ('Enum', tuple(obj._names), obj._encoding)
+    elif isinstance(obj, (list, tuple)):
+        return (type(obj).__name__,) + \
+               tuple([_describe(e, files) for e in obj])
+    elif isinstance(obj, FunctionType):
+        code = obj.func_code
+        if _isDesignFile(code.co_filename):
+            files.add(code.co_filename)
+        return ('function', code.co_filename, code.co_name,
+                code.co_firstlineno)
+    raise _Uncacheable(type(obj))
+
+
+class _CallCollector(object):
+    """ Trace function recording the design functions called with their
+    arguments.
+
+    It is a global trace function that doesn't trace the called frames:
+    it only sees the calls, which is less costly than a profile function.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.files = Set()
+        self.error = None
+        self._design = {}
+
+    def __call__(self, frame, event, arg):
+        if event != "call" or self.error is not None:
+            return
+        code = frame.f_code
+        design = self._design.get(code)
+        if design is None:
+            if code.co_filename.startswith("<"):
+                # code compiled from a string, such as the eval of number
+                # literals by the compiler package, has no source to hash:
+                # only the design can't be cached when it runs such code
+                caller = frame.f_back
+                if caller is not None and \
+                   _isDesignFile(caller.f_code.co_filename):
+                    self.error = _Uncacheable(code.co_filename)
+                return
+            design = self._design[code] = _isDesignFile(code.co_filename)
+            if design:
+                self.files.add(code.co_filename)
+        if not design:
+            return
+        n = code.co_argcount
+        if code.co_flags & _CO_VARARGS:
+            n += 1
+        if code.co_flags & _CO_VARKEYWORDS:
+            n += 1
+        f_locals = frame.f_locals
+        try:
+            args = [(name, _describe(f_locals.get(name), self.files))
+                    for name in code.co_varnames[:n]]
+        except _Uncacheable, e:
+            self.error = e
+            return
+        self.calls.append((code.co_filename, code.co_name,
+                           code.co_firstlineno, args))
+
+
+def _describeGen(g, files):
+    if isinstance(g, (_Always, _AlwaysComb)):
+        func = g.func
+    elif isinstance(g, _Instantiator):
+        func = g.genfunc
+    elif isinstance(g, GeneratorType):
+        frame = g.gi_frame
+        code = frame.f_code
+        files.add(code.co_filename)
+        return (code.co_name, code.co_firstlineno,
+                _describe(sorted(frame.f_locals.items()), files))
+    else:
+        raise _Uncacheable(type(g))
+    code = func.func_code
+    files.add(code.co_filename)
+    free = []
+    if code.co_freevars:
+        for n, c in zip(code.co_freevars, func.func_closure):
+            free.append((n, _describe(_cell_deref(c), files)))
+    # constants and functions used from the global namespace
+    glob = []
+    for n in code.co_names:
+        obj = func.func_globals.get(n)
+        try:
+            glob.append((n, _describe(obj, files)))
+        except _Uncacheable:
+            pass
+    return (code.co_name, code.co_firstlineno, free, glob)
+
+
+def _fingerprint(options, name, func, *args, **kwargs):
+    """ Extract the hierarchy of a design and return its fingerprint with
+    the _HierExtr.
+
+    The hierarchy extraction uses a profile function, the collector is a
+    trace function that sees the same calls. The fingerprint is None when
+    the design can't be cached.
+    """
+    collector = _CallCollector()
+    trace = sys.gettrace()
+    sys.settrace(collector)
+    try:
+        h = _HierExtr(name, func, *args, **kwargs)
+    finally:
+        sys.settrace(trace)
+    if collector.error is not None:
+        return None, h
+    files = collector.files
+    digest = md5()
+    digest.update(repr((_cacheVersion, myhdl.__version__, _myhdlDigest(),
+                   options)))
+    for call in collector.calls:
+        digest.update(repr(call))
+    try:
+        for g in _flatten(h.top):
+            digest.update(repr(_describeGen(g, files)))
+        for filename in sorted(files):
+            f = open(filename, 'rb')
+            try:
+                digest.update(filename)
+                digest.update(f.read())
+            finally:
+                f.close()
+    except (_Uncacheable, IOError):
+        return None, h
+    return digest.hexdigest(), h
+
+
+def _loadCache(directory, key):
+    """ Return the files cached for a fingerprint, or None. """
+    if key is None:
+        return None
+    try:
+        f = open(os.path.join(directory, key + ".pck"), 'rb')
+    except IOError:
+        return None
+    try:
+        try:
+            entry = cPickle.load(f)
+        except Exception:
+            return None
+    finally:
+        f.close()
+    if not isinstance(entry, dict) or entry.get('version') != _cacheVersion:
+        return None
+    return entry['files']
+
+def _storeCache(directory, key, files):
+    """ Cache the files generated for a fingerprint. """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    path = os.path.join(directory, key + ".pck")
+    # write a new entry then rename it, concurrent conversions
+    # never see a partial entry
+    fd, tmppath = tempfile.mkstemp(dir=directory)
+    f = os.fdopen(fd, 'wb')
+    try:
+        cPickle.dump({'version': _cacheVersion, 'files': files}, f, 2)
+    finally:
+        f.close()
+    try:
+        os.rename(tmppath, path)
+    except OSError:
+        # the entry exists already, on platforms that don't replace it
+        os.remove(tmppath)
+
+def _writeFiles(files, target=None, keep=()):
+    """ Write generated files, or store them in target if it's a dict.
+
+    Files in keep aren't written again when they exist.
+    """
+    for path, text in files.items():
+        if target is not None:
+            target[path] = text
+        elif path in keep and os.path.isfile(path):
+            continue
+        else:
+            f = open(path, 'w')
+            try:
+                f.write(text)
+            finally:
+                f.close()
@@ -23,6 +23,7 @@
 
 
 import inspect
+from cStringIO import StringIO
 import compiler
 from compiler import ast as astNode
 
@@ -73,6 +74,7 @@ _error.FormatString = "Format string error"
 _error.UnsupportedAttribute = "Unsupported attribute"
 _error.PortInList = "Port in list is not supported"
 _error.SignalInMultipleLists = "Signal in multiple list is not supported"
+_error.EnumTypeNotFound = "Enum type not found in the namespaces of the generators"
 
 
 _access = enum("INPUT", "OUTPUT", "INOUT", "UNKNOWN")
@@ -118,7 +120,7 @@ class _ConversionMixin(object):
         return None
 
     def getVal(self, node):
-        val = eval(_unparse(node), self.ast.symdict, self.ast.vardict)
+        val = self.ast.symdict.eval(_unparse(node), self.ast.vardict)
         return val
     
     def raiseError(self, node, kind, msg=""):
@@ -184,3 +186,59 @@ class _namesVisitor(object):
 
     def visitName(self, node):
         self.names.append(node.name)
+
+
+class _OutputBuffer(object):
+    """ Text output of the conversion backends.
+
+    Text is collected in memory. With a target file, it is written to it
+    in bulk when more than chunksize characters are pending at the end of
+    a line, and when the buffer is flushed or closed. Without target, the
+    text is returned by getvalue().
+    """
+
+    chunksize = 1 << 16
+
+    def __init__(self, target=None):
+        self.target = target
+        self.softspace = 0
+        self._reset()
+
+    def _reset(self):
+        self._buf = StringIO()
+        # bind the write method of the buffer directly, writes are frequent
+        self.write = self._buf.write
+
+    def writeline(self, ind='', nr=1):
+        self.write(("\n" + ind) * nr)
+        if self.target is not None and self._buf.tell() > self.chunksize:
+            self.flush()
+
+    def flush(self):
+        if self.target is not None:
+            self.target.write(self._buf.getvalue())
+            self._reset()
+
+    def getvalue(self):
+        return self._buf.getvalue()
+
+    def close(self):
+        self.flush()
+        if self.target is not None:
+            self.target.close()
+
+
+def _openOutput(path, files=None):
+    """ Return an output buffer for a generated file.
+
+    The buffer writes to the file, or keeps the text in memory when
+    files is a dict to store it in.
+    """
+    if files is None:
+        return _OutputBuffer(open(path, 'w'))
+    return _OutputBuffer()
+
+def _closeOutput(f, path, files=None):
+    f.close()
+    if files is not None:
+        files[path] = f.getvalue()
@@ -0,0 +1,387 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl parallel conversion module.
+
+The analysis and the code generation of the generators are done by worker
+processes, each for a range of consecutive generators, and the generated
+code is merged in generator order.
+
+Labels and enum type names are numbered by global counters, in the order
+of a sequential conversion. Workers generate placeholders instead, which
+are numbered in that order when the results are merged, so that the
+output is the same as the output of a sequential conversion. The signals
+driven and read by the generators are merged in the same way, which
+detects signals driven by generators of different workers.
+
+Workers are forked processes that inherit the extracted hierarchy, so
+conversion is sequential on platforms without os.fork, and with Python
+versions older than 2.7.
+
+"""
+
+import sys
+import os
+import re
+import cPickle
+import traceback
+from types import FunctionType
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+if sys.version_info < (2, 7):
+    # the maxtasksperchild argument of Pool is new in Python 2.7,
+    # conversion is sequential on older versions
+    multiprocessing = None
+
+from myhdl import Error, ConversionError
+from myhdl._enum import EnumType, EnumItemType
+from myhdl._always_comb import _AlwaysComb
+from myhdl._always import _Always
+from myhdl._extractHierarchy import _UserCode
+from myhdl._cell_deref import _cell_deref
+from myhdl.conversion import _misc, _analyze
+from myhdl.conversion._misc import (_error, _ConversionMixin, _OutputBuffer,
+                                    _genUniqueSuffix)
+from myhdl.conversion._analyze import _analyzeGens, _enumTypeSet
+
+# conversion phases, in sequential order
+_ANALYZE, _ANNOTATE, _CONVERT = range(3)
+
+_placeholder = re.compile(r"\x01(\d+)\x02|t_enum_\w+\x03(\d+)\x04")
+_enumName = re.compile(r"t_enum_(\w+)\x03(\d+)\x04$")
+
+# state of the parallel conversion, inherited by the workers
+_job = None
+
+
+class _RenderedGens(object):
+
+    """ Code generated by workers for a list of generators.
+
+    An error of the code generation is raised when the code is written, as
+    in a sequential conversion.
+    """
+
+    def __init__(self, func, block, error=None):
+        self.func = func
+        self.block = block
+        self.error = error
+
+    def write(self, blockBuf, funcBuf):
+        if self.error is not None:
+            raise self.error
+        funcBuf.write(self.func)
+        blockBuf.write(self.block)
+
+
+class _Placeholders(object):
+
+    """ Label and unique suffix generator of a worker.
+
+    The phase and generator of each placeholder are recorded in where.
+    """
+
+    def __init__(self):
+        self.where = None
+        self.labels = []
+        self.suffixes = []
+
+    def genLabel(self):
+        while 1:
+            self.labels.append(self.where)
+            yield "\x01%d\x02" % (len(self.labels) - 1)
+
+    def reset(self):
+        pass
+
+    def next(self):
+        self.suffixes.append(self.where)
+        return "\x03%d\x04" % (len(self.suffixes) - 1)
+
+
+class _RangeResult(object):
+
+    """ Result of the conversion of a range of generators by a worker. """
+
+    def __init__(self):
+        self.labels = []
+        self.enums = []
+        self.drives = []
+        self.func = ""
+        self.block = ""
+        self.error = None
+
+
+def _workerCount(workers, nrgens):
+    """ Return the number of workers to use for a conversion. """
+    if multiprocessing is None or not hasattr(os, 'fork'):
+        return 1
+    if workers is None:
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+    return min(workers, nrgens)
+
+def _drives(ast):
+    """ Return the signals driven and read by an analyzed generator. """
+    if not hasattr(ast, 'outputs'):
+        # user defined code
+        return None, [], []
+    sigdict = ast.sigdict
+    info = None
+    if ast.outputs:
+        # info of the error on signals driven by several generators
+        v = _ConversionMixin()
+        v.ast = ast
+        info = "in file %s, line %s:\n    " % \
+               (ast.sourcefile, ast.lineoffset + v.getLineNo(ast))
+    driven = [(n, id(sigdict[n]), sigdict[n]._driven) for n in ast.outputs]
+    read = [id(sigdict[n]) for n in ast.inputs]
+    return info, driven, read
+
+def _enumTypes(gens, sigs):
+    """ Return the enum types that generators can refer to, by id.
+
+    Enum types are referred to by name, so they are found in the values of
+    the signals and in the namespaces of the generators and of the
+    functions that they can call.
+    """
+    types = {}
+    for s in sigs:
+        if isinstance(s._val, EnumItemType):
+            types[id(s._val._type)] = s._val._type
+    namespaces = []
+    for g in gens:
+        if isinstance(g, _UserCode):
+            continue
+        if isinstance(g, (_AlwaysComb, _Always)):
+            namespaces.append(g.func)
+        else:
+            f = g.gen.gi_frame
+            namespaces.append(f.f_globals)
+            namespaces.append(f.f_locals)
+    seen = set()
+    while namespaces:
+        ns = namespaces.pop()
+        if id(ns) in seen:
+            continue
+        seen.add(id(ns))
+        if isinstance(ns, FunctionType):
+            values = []
+            for c in ns.func_closure or ():
+                try:
+                    values.append(_cell_deref(c))
+                except NameError:
+                    # free variable that is not bound yet
+                    pass
+            namespaces.append(ns.func_globals)
+        else:
+            values = ns.values()
+        for v in values:
+            if isinstance(v, EnumType):
+                types[id(v)] = v
+            elif isinstance(v, EnumItemType):
+                types[id(v._type)] = v._type
+            elif isinstance(v, FunctionType):
+                namespaces.append(v)
+    return types
+
+def _errorArgs(e):
+    """ Return the class and arguments of an exception, to raise it again
+    in the main process.
+    """
+    if isinstance(e, Error):
+        # myhdl errors don't pickle their arguments
+        args = (e.__class__, (e.kind, e.msg, e.info))
+    else:
+        args = (e.__class__, e.args)
+    try:
+        cPickle.loads(cPickle.dumps(args, 2))
+    except Exception:
+        args = (RuntimeError, (traceback.format_exc(),))
+    return args
+
+def _renderRange(index):
+    """ Analyze and convert a range of generators, in a worker. """
+    gens, absnames, annotate, convert, ranges = _job
+    start, stop = ranges[index]
+    p = _Placeholders()
+    # each worker process converts a single range
+    _misc._genLabel = p.genLabel()
+    _analyze._genUniqueSuffix = p
+    r = _RangeResult()
+    funcBuf = _OutputBuffer()
+    blockBuf = _OutputBuffer()
+    try:
+        asts = []
+        for i in range(start, stop):
+            p.where = (_ANALYZE, i)
+            ast = _analyzeGens([gens[i]], absnames)[0]
+            r.drives.append((i,) + _drives(ast))
+            asts.append(ast)
+        if annotate is not None:
+            for i, ast in enumerate(asts):
+                p.where = (_ANNOTATE, start + i)
+                annotate([ast])
+        for i, ast in enumerate(asts):
+            p.where = (_CONVERT, start + i)
+            convert(ast, blockBuf, funcBuf)
+    except Exception, e:
+        r.error = (p.where, _errorArgs(e))
+    for t in _enumTypeSet:
+        m = _enumName.match(t.__dict__.get('_name', ''))
+        if m is not None:
+            k = int(m.group(2))
+            r.enums.append((k, p.suffixes[k], id(t), m.group(1)))
+    r.enums.sort()
+    r.labels = p.labels
+    r.func = funcBuf.getvalue()
+    r.block = blockBuf.getvalue()
+    return r
+
+
+def _renderGens(gens, absnames, siglist, memlist, annotate, convert, workers):
+
+    """ Analyze and convert generators in worker processes.
+
+    gens -- list of generators
+    absnames -- hierarchical names of the generators
+    siglist, memlist -- signals and lists of signals of the hierarchy
+    annotate -- function that annotates a list of analyzed generators,
+                or None
+    convert -- function that converts an analyzed generator to a block
+               and a function buffer
+    workers -- number of worker processes
+
+    Returns a _RenderedGens with the code of the generators.
+
+    """
+
+    global _job
+    sigs = list(siglist)
+    for m in memlist:
+        sigs.extend(m.mem)
+    # types named by workers are found by id in the main process
+    types = _enumTypes(gens, sigs)
+    n = len(gens)
+    ranges = [(n * i // workers, n * (i+1) // workers) for i in range(workers)]
+    _job = (gens, absnames, annotate, convert, ranges)
+    try:
+        # a fresh process for each range, as conversion state is global
+        pool = multiprocessing.Pool(workers, maxtasksperchild=1)
+        try:
+            results = pool.map(_renderRange, range(workers), 1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _job = None
+
+    error = _mergeDrives(results, sigs)
+    if error is None:
+        errors = [r.error for r in results if r.error is not None]
+        if errors:
+            error = min(errors, key=lambda e: e[0])
+    until = error and error[0]
+    enumNames = _mergeEnums(results, types, until)
+    labelNames = _mergeLabels(results, until)
+    if error is not None:
+        cls, args = error[1]
+        if error[0][0] == _CONVERT:
+            return _RenderedGens(None, None, cls(*args))
+        raise cls(*args)
+
+    func = []
+    block = []
+    for r, enums, labels in zip(results, enumNames, labelNames):
+        def sub(m):
+            if m.group(1) is not None:
+                return labels[int(m.group(1))]
+            return enums[int(m.group(2))]
+        func.append(_placeholder.sub(sub, r.func))
+        block.append(_placeholder.sub(sub, r.block))
+    return _RenderedGens("".join(func), "".join(block))
+
+def _mergeDrives(results, sigs):
+    """ Mark the signals driven and read, in generator order.
+
+    Returns the first analysis error, or None.
+    """
+    sigmap = dict([(id(s), s) for s in sigs])
+    driven = {}
+    for r in results:
+        for i, info, outputs, inputs in r.drives:
+            for n, sid, value in outputs:
+                s = sigmap.get(sid)
+                if sid in driven or (s is not None and s._driven):
+                    args = (_error.SigMultipleDriven, n, info)
+                    return ((_ANALYZE, i), (ConversionError, args))
+                driven[sid] = True
+                if s is not None:
+                    s._driven = value
+            for sid in inputs:
+                s = sigmap.get(sid)
+                if s is not None:
+                    s._read = True
+        if r.error is not None and r.error[0][0] == _ANALYZE:
+            return r.error
+    return None
+
+def _mergeEnums(results, types, until=None):
+    """ Name the enum types, in the order of a sequential conversion.
+
+    types -- enum types by id, see _enumTypes
+
+    Returns the names of the placeholders of each worker.
+    """
+    names = []
+    for r in results:
+        placeholders = {}
+        for k, where, tid, n in r.enums:
+            if until is not None and where > until:
+                break
+            t = types.get(tid)
+            if t is None:
+                raise ConversionError(_error.EnumTypeNotFound, n)
+            if t not in _enumTypeSet:
+                _enumTypeSet.add(t)
+                t._setName(n + _genUniqueSuffix.next())
+            placeholders[k] = t._name
+        names.append(placeholders)
+    return names
+
+def _mergeLabels(results, until=None):
+    """ Number the labels, in the order of a sequential conversion.
+
+    Returns the names of the placeholders of each worker.
+    """
+    names = [[None] * len(r.labels) for r in results]
+    for phase in (_ANALYZE, _ANNOTATE, _CONVERT):
+        for r, placeholders in zip(results, names):
+            for k, where in enumerate(r.labels):
+                if where[0] != phase:
+                    continue
+                if until is not None and where > until:
+                    return names
+                placeholders[k] = _misc._genLabel.next()
+    return names
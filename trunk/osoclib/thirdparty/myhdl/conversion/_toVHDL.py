@@ -41,17 +41,22 @@ import myhdl
 from myhdl import *
 from myhdl import ToVHDLError, ToVHDLWarning
 from myhdl._extractHierarchy import (_HierExtr, _isMem, _getMemInfo,
-                                     _UserVhdl, _userCodeMap)
+                                     _UserVhdl, _userCodeMap, _Instance)
 
 from myhdl._always_comb import _AlwaysComb
 from myhdl._always import _Always
 from myhdl._instance import _Instantiator
 from myhdl.conversion._misc import (_error, _access, _kind,_context,
-                                    _ConversionMixin, _Label, _genUniqueSuffix, _isConstant)
+                                    _ConversionMixin, _Label, _genUniqueSuffix, _isConstant,
+                                    _OutputBuffer, _openOutput, _closeOutput)
 from myhdl.conversion._analyze import (_analyzeSigs, _analyzeGens, _analyzeTopFunc,
                                        _Ram, _Rom, _enumTypeSet)
 from myhdl._Signal import _WaiterList
 from myhdl.conversion._toVHDLPackage import _package
+from myhdl.conversion._cache import (_fingerprint, _loadCache, _storeCache,
+                                     _writeFiles)
+from myhdl.conversion._parallel import (_RenderedGens, _renderGens,
+                                        _workerCount)
 
 _version = myhdl.__version__.replace('.','')
 _converting = 0
@@ -80,11 +85,19 @@ class _ToVHDLConvertor(object):
 
     __slots__ = ("name",
                  "component_declarations",
+                 "reuse",
+                 "files",
+                 "cache",
+                 "workers",
                  )
 
     def __init__(self):
         self.name = None
         self.component_declarations = None
+        self.reuse = False
+        self.files = None
+        self.cache = None
+        self.workers = 1
 
     def __call__(self, func, *args, **kwargs):
         global _converting
@@ -104,30 +117,59 @@ class _ToVHDLConvertor(object):
             name = func.func_name
         else:
             name = str(self.name)
+        compDecls = self.component_declarations
+        files = self.files
+        vpath = name + ".vhd"
+        ppath = "pck_myhdl_%s.vhd" % _version
+        key = None
         try:
-            h = _HierExtr(name, func, *args, **kwargs)
+            if self.cache is not None:
+                options = ("VHDL", name, compDecls, self.reuse)
+                key, h = _fingerprint(options, name, func, *args, **kwargs)
+                cached = _loadCache(self.cache, key)
+                if cached is not None:
+                    _writeFiles(cached, files, keep=[ppath])
+                    self._cleanup()
+                    return h.top
+            else:
+                h = _HierExtr(name, func, *args, **kwargs)
         finally:
             _converting = 0
 
-        compDecls = self.component_declarations
-
-        vpath = name + ".vhd"
-        vfile = open(vpath, 'w')
-        ppath = "pck_myhdl_%s.vhd" % _version
+        # generate in memory the files to cache
+        output = files
+        if key is not None and files is None:
+            output = {}
+        vfile = _openOutput(vpath, output)
         pfile = None
-        if not os.path.isfile(ppath):
-            pfile = open(ppath, 'w')
+        if output is not None or not os.path.isfile(ppath):
+            pfile = _openOutput(ppath, output)
 
         ### initialize properly ###
         _genUniqueSuffix.reset()
         _enumTypeSet.clear()
 
-        siglist, memlist = _analyzeSigs(h.hierarchy, hdl='VHDL')
+        hierarchy = h.hierarchy
         arglist = _flatten(h.top)
+        complist = []
+        compBuf = _OutputBuffer()
+        if self.reuse:
+            e = _ComponentExtractor(name, h.hierarchy, compBuf)
+            hierarchy, arglist, complist = e.extract(hierarchy, arglist, h.absnames)
+
+        siglist, memlist = _analyzeSigs(hierarchy, hdl='VHDL')
         # print h.top
         _checkArgs(arglist)
-        genlist = _analyzeGens(arglist, h.absnames)
-        _annotateTypes(genlist)
+        workers = _workerCount(self.workers, len(arglist))
+        if workers > 1:
+            genlist = [_renderGens(arglist, h.absnames, siglist, memlist,
+                                   _annotateTypes, _convertGen, workers)]
+        else:
+            genlist = _analyzeGens(arglist, h.absnames)
+            _annotateTypes(genlist)
+        for c in complist:
+            c.markPorts()
+        genlist.extend(complist)
         intf = _analyzeTopFunc(func, *args, **kwargs)
         intf.name = name
 
@@ -136,11 +178,12 @@ class _ToVHDLConvertor(object):
         if pfile:
             _writeFileHeader(pfile, ppath)
             print >> pfile, _package
-            pfile.close()
+            _closeOutput(pfile, ppath, output)
 
         _writeFileHeader(vfile, vpath)
         if needPck:
             _writeCustomPackage(vfile, intf)
+        vfile.write(compBuf.getvalue())
         _writeModuleHeader(vfile, intf, needPck)
         _writeFuncDecls(vfile)
         _writeSigDecls(vfile, intf, siglist, memlist)
@@ -148,9 +191,14 @@ class _ToVHDLConvertor(object):
         _convertGens(genlist, vfile)
         _writeModuleFooter(vfile)
 
-        vfile.close()
+        _closeOutput(vfile, vpath, output)
         # tbfile.close()
 
+        if key is not None:
+            _storeCache(self.cache, key, output)
+            if files is None:
+                _writeFiles(output, keep=[ppath])
+
         ### clean-up properly ###
         
         # clean up signal names
@@ -159,11 +207,16 @@ class _ToVHDLConvertor(object):
             sig._driven = False
             sig._read = False
             
+        self._cleanup()
+
+        return h.top
+
+    def _cleanup(self):
         # clean up attributes
         self.name = None
         self.component_declarations = None
-
-        return h.top
+        self.reuse = False
+        self.files = None
     
 
 toVHDL = _ToVHDLConvertor()
@@ -186,7 +239,7 @@ def _writeCustomPackage(f, intf):
     print >> f
 
 
-def _writeModuleHeader(f, intf, needPck):
+def _writeModuleHeader(f, intf, needPck, pckName=None):
     print >> f, "library IEEE;"
     print >> f, "use IEEE.std_logic_1164.all;"
     print >> f, "use IEEE.numeric_std.all;"
@@ -195,7 +248,7 @@ def _writeModuleHeader(f, intf, needPck):
     print >> f, "use work.pck_myhdl_%s.all;" % _version
     print >> f
     if needPck:
-        print >> f, "use work.pck_%s.all;" % intf.name
+        print >> f, "use work.pck_%s.all;" % (pckName or intf.name)
         print >> f
     print >> f, "entity %s is" % intf.name
     if intf.argnames:
@@ -286,6 +339,255 @@ def _writeCompDecls(f,  compDecls):
 def _writeModuleFooter(f):
     print >> f, "end architecture MyHDL;"
 
+
+def _argsKey(args):
+    """ Return a hashable description of instance arguments.
+
+    Signals are described by their type and width, other arguments by
+    their value. None is returned when an argument can't be described.
+    """
+    if args is None:
+        return None
+    key = []
+    for n, v in args:
+        if isinstance(v, Signal):
+            if isinstance(v._val, EnumItemType):
+                t = v._val._type
+            else:
+                t = v._type
+            key.append((n, t, v._nrbits, v._min is not None and v._min < 0))
+        else:
+            k = _constKey(v)
+            if k is None:
+                return None
+            key.append((n, k))
+    return tuple(key)
+
+def _constKey(v):
+    if v is None or isinstance(v, (bool, int, long, float, str)):
+        return (type(v), v)
+    elif isinstance(v, intbv):
+        return (intbv, v._val, v._min, v._max)
+    elif isinstance(v, tuple):
+        key = [_constKey(e) for e in v]
+        if None in key:
+            return None
+        return tuple(key)
+    return None
+
+
+class _Component(object):
+    """ Entity emitted once for structurally identical sub-hierarchies. """
+
+    def __init__(self, name, argnames, argdict):
+        self.name = name
+        self.argnames = argnames
+        self.argdict = argdict
+        self.modes = {}
+
+
+class _ComponentInstance(object):
+    """ Instantiation of a component entity in an architecture. """
+
+    def __init__(self, label, comp, ports):
+        self.label = label
+        self.comp = comp
+        self.ports = ports
+
+    def markPorts(self):
+        # the component drives and reads its port signals
+        for n, s in self.ports:
+            mode = self.comp.modes[n]
+            if mode != 'in':
+                if s._driven:
+                    raise ToVHDLError(_error.SigMultipleDriven, s._name)
+                s._driven = "wire"
+            if mode != 'out':
+                s._read = True
+
+    def __str__(self):
+        buf = StringIO()
+        buf.write("%s: entity work.%s" % (self.label, self.comp.name))
+        if self.ports:
+            buf.write("\n    port map (")
+            c = ''
+            for n, s in self.ports:
+                buf.write("%s\n        %s => %s" % (c, n, s._name))
+                c = ','
+            buf.write("\n    )")
+        print >> buf, ";"
+        print >> buf
+        return buf.getvalue()
+
+
+class _ComponentExtractor(object):
+    """ Emit structurally identical sub-hierarchies as a single entity.
+
+    Instances are identical when they come from the same function, called
+    with signals of the same types and widths and with the same constants,
+    and have the same sub-hierarchy. Each group of identical instances is
+    converted once into an entity written to buf, and each instance is
+    replaced by an instantiation of that entity.
+    """
+
+    def __init__(self, name, hierarchy, buf):
+        self.pckName = name
+        self.buf = buf
+        self.names = Set([name.lower()])
+        self.components = {}
+        self.keys = {}
+        self.counts = {}
+        for i, inst in enumerate(hierarchy):
+            j = _subtreeEnd(hierarchy, i)
+            key = _subtreeKey(hierarchy[i:j])
+            if key is None:
+                continue
+            self.keys[id(inst.obj)] = key
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def extract(self, hierarchy, arglist, absnames):
+        """ Return the hierarchy and generators left to convert inline,
+        with the list of component instances replacing the others.
+        """
+        kept = []
+        complist = []
+        removed = Set()
+        parents = []
+        order = dict([(id(g), i) for i, g in enumerate(arglist)])
+        i = 0
+        while i < len(hierarchy):
+            inst = hierarchy[i]
+            parents = parents[:inst.level-1]
+            parent = parents and parents[-1] or None
+            parents.append(inst)
+            key = self.keys.get(id(inst.obj))
+            j = _subtreeEnd(hierarchy, i)
+            if parent is None or key is None or self.counts[key] < 2 or \
+               not _isIsolated(hierarchy[i:j], parent):
+                kept.append(inst)
+                i += 1
+                continue
+            comp = self.components.get(key)
+            if comp is None:
+                comp = self._convert(hierarchy[i:j], absnames)
+                self.components[key] = comp
+            ports = [(n, v) for n, v in inst.args if isinstance(v, Signal)]
+            label = absnames[id(inst.obj)].upper()
+            gens = _flatten(inst.obj)
+            pos = min([order.get(id(g), len(order)) for g in gens])
+            complist.append((pos, _ComponentInstance(label, comp, ports)))
+            # keep the instance itself to name the actual port signals
+            # as they would be named inline
+            stub = _Instance(inst.level, inst.obj, [], dict(ports), {})
+            stub.name = inst.name
+            kept.append(stub)
+            for g in gens:
+                removed.add(id(g))
+            i = j
+        arglist = [g for g in arglist if id(g) not in removed]
+        # instantiate in the order the generators would be converted
+        complist.sort()
+        complist = [c for pos, c in complist]
+        return kept, arglist, complist
+
+    def _entityName(self, name):
+        # designs converted to the same library don't share entity names
+        name = "%s_%s" % (self.pckName, name)
+        n, i = name, 0
+        while n.lower() in self.names:
+            i += 1
+            n = "%s_%s" % (name, i)
+        self.names.add(n.lower())
+        return n
+
+    def _convert(self, subtree, absnames):
+        root = subtree[0]
+        name = self._entityName(root.code.co_name)
+        # names inside the entity don't repeat the top level name
+        local = name[len(self.pckName)+1:]
+        # relevel the sub-hierarchy and rename it relative to its root
+        hierarchy = []
+        for inst in subtree:
+            c = _Instance(inst.level - root.level + 1, inst.obj, inst.subs,
+                          inst.sigdict, inst.memdict)
+            c.name, c.code, c.args = inst.name, inst.code, inst.args
+            hierarchy.append(c)
+        arglist = _flatten(root.obj)
+        prefix = absnames[id(root.obj)]
+        relnames = {}
+        for obj in [inst.obj for inst in subtree] + arglist:
+            if id(obj) in absnames:
+                relnames[id(obj)] = local + absnames[id(obj)][len(prefix):]
+        ports = [(n, v) for n, v in root.args if isinstance(v, Signal)]
+        comp = _Component(name, [n for n, v in ports], dict(ports))
+
+        hierarchy, arglist, complist = self.extract(hierarchy, arglist, relnames)
+        siglist, memlist = _analyzeSigs(hierarchy, hdl='VHDL')
+        _checkArgs(arglist)
+        genlist = _analyzeGens(arglist, relnames)
+        _annotateTypes(genlist)
+        for c in complist:
+            c.markPorts()
+        genlist.extend(complist)
+
+        f = self.buf
+        _writeModuleHeader(f, comp, len(_enumTypeSet) > 0, self.pckName)
+        _writeFuncDecls(f)
+        _writeSigDecls(f, comp, siglist, memlist)
+        _convertGens(genlist, f)
+        _writeModuleFooter(f)
+        print >> f
+        print >> f
+
+        for n, s in ports:
+            if s._driven:
+                comp.modes[n] = s._read and 'inout' or 'out'
+            else:
+                comp.modes[n] = 'in'
+        # release the signals for the enclosing conversion
+        for s in siglist:
+            s._name = None
+            s._driven = False
+            s._read = False
+        for m in memlist:
+            m.name = None
+            for s in m.mem:
+                s._name = None
+                s._inList = False
+        return comp
+
+
+def _subtreeEnd(hierarchy, i):
+    level = hierarchy[i].level
+    j = i + 1
+    while j < len(hierarchy) and hierarchy[j].level > level:
+        j += 1
+    return j
+
+def _subtreeKey(subtree):
+    root = subtree[0]
+    key = [root.code]
+    for inst in subtree:
+        args = _argsKey(inst.args)
+        if args is None:
+            return None
+        key.append((inst.level - root.level, inst.code, args))
+    return tuple(key)
+
+def _isIsolated(subtree, parent):
+    """ Check that a sub-hierarchy only shares its ports with its parent. """
+    outer = Set([id(s) for s in parent.sigdict.values()])
+    outer.update([id(m.mem) for m in parent.memdict.values()])
+    ports = Set([id(v) for n, v in subtree[0].args])
+    for inst in subtree:
+        for s in inst.sigdict.values():
+            if s._used and id(s) in outer and id(s) not in ports:
+                return False
+        for m in inst.memdict.values():
+            if m._used and id(m.mem) in outer and id(m.mem) not in ports:
+                return False
+    return True
+
     
 
     
@@ -313,26 +615,12 @@ def _getTypeString(s):
 
 
 def _convertGens(genlist, vfile):
-    blockBuf = StringIO()
-    funcBuf = StringIO()
+    blockBuf = _OutputBuffer()
+    funcBuf = _OutputBuffer()
     for ast in genlist:
-        if isinstance(ast, _UserVhdl):
-            blockBuf.write(str(ast))
-            continue
-        if ast.kind == _kind.ALWAYS:
-            Visitor = _ConvertAlwaysVisitor
-        elif ast.kind == _kind.INITIAL:
-            Visitor = _ConvertInitialVisitor
-        elif ast.kind == _kind.SIMPLE_ALWAYS_COMB:
-            Visitor = _ConvertSimpleAlwaysCombVisitor
-        elif ast.kind == _kind.ALWAYS_DECO:
-            Visitor = _ConvertAlwaysDecoVisitor
-        else: # ALWAYS_COMB
-            Visitor = _ConvertAlwaysCombVisitor
-        v = Visitor(ast, blockBuf, funcBuf)
-        compiler.walk(ast, v)
+        _convertGen(ast, blockBuf, funcBuf)
     # print >> vfile
-    vfile.write(funcBuf.getvalue()); funcBuf.close()
+    vfile.write(funcBuf.getvalue())
     print >> vfile, "begin"
     print >> vfile
     for s in constwires:
@@ -349,7 +637,28 @@ def _convertGens(genlist, vfile):
             assert 0
         print >> vfile, "%s <= %s%s%s;" % (s._name, pre, int(s._val), suf)
     print >> vfile
-    vfile.write(blockBuf.getvalue()); blockBuf.close()
+    vfile.write(blockBuf.getvalue())
+
+
+def _convertGen(ast, blockBuf, funcBuf):
+    if isinstance(ast, _RenderedGens):
+        ast.write(blockBuf, funcBuf)
+        return
+    if isinstance(ast, (_UserVhdl, _ComponentInstance)):
+        blockBuf.write(str(ast))
+        return
+    if ast.kind == _kind.ALWAYS:
+        Visitor = _ConvertAlwaysVisitor
+    elif ast.kind == _kind.INITIAL:
+        Visitor = _ConvertInitialVisitor
+    elif ast.kind == _kind.SIMPLE_ALWAYS_COMB:
+        Visitor = _ConvertSimpleAlwaysCombVisitor
+    elif ast.kind == _kind.ALWAYS_DECO:
+        Visitor = _ConvertAlwaysDecoVisitor
+    else: # ALWAYS_COMB
+        Visitor = _ConvertAlwaysCombVisitor
+    v = Visitor(ast, blockBuf, funcBuf)
+    compiler.walk(ast, v)
 
     
 
@@ -367,8 +676,7 @@ class _ConvertVisitor(_ConversionMixin):
         self.buf.write("%s" % arg)
 
     def writeline(self, nr=1):
-        for i in range(nr):
-            self.buf.write("\n%s" % self.ind)
+        self.buf.writeline(self.ind, nr)
 
     def inferCast(self, vhd, ori):
         pre, suf = "", ""
@@ -2007,7 +2315,7 @@ class _AnnotateTypesVisitor(_ConversionMixin):
 
 def _annotateTypes(genlist):
     for ast in genlist:
-        if isinstance(ast, _UserVhdl):
+        if isinstance(ast, (_UserVhdl, _ComponentInstance)):
             continue
         v = _AnnotateTypesVisitor(ast)
         compiler.walk(ast, v)
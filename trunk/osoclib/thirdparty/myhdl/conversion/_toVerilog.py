@@ -46,7 +46,12 @@ from myhdl._always_comb import _AlwaysComb
 from myhdl._always import _Always
 from myhdl._instance import _Instantiator
 from myhdl.conversion._misc import (_error, _access, _kind,_context, 
-                                    _ConversionMixin, _Label, _genUniqueSuffix, _isConstant)
+                                    _ConversionMixin, _Label, _genUniqueSuffix, _isConstant,
+                                    _OutputBuffer, _openOutput, _closeOutput)
+from myhdl.conversion._cache import (_fingerprint, _loadCache, _storeCache,
+                                     _writeFiles)
+from myhdl.conversion._parallel import (_RenderedGens, _renderGens,
+                                        _workerCount)
 from myhdl.conversion._analyze import (_analyzeSigs, _analyzeGens, _analyzeTopFunc, 
                                        _Ram, _Rom)
             
@@ -73,11 +78,14 @@ def _flatten(*args):
 
 class _ToVerilogConvertor(object):
 
-    __slots__ = ("name", "timescale")
+    __slots__ = ("name", "timescale", "files", "cache", "workers")
 
     def __init__(self):
         self.name = None
         self.timescale = "1ns/10ps"
+        self.files = None
+        self.cache = None
+        self.workers = 1
 
     def __call__(self, func, *args, **kwargs):
         global _converting
@@ -97,13 +105,28 @@ class _ToVerilogConvertor(object):
             name = func.func_name
         else:
             name = str(self.name)
+        files = self.files
+        vpath = name + ".v"
+        key = None
         try:
-            h = _HierExtr(name, func, *args, **kwargs)
+            if self.cache is not None:
+                options = ("Verilog", name, self.timescale)
+                key, h = _fingerprint(options, name, func, *args, **kwargs)
+                cached = _loadCache(self.cache, key)
+                if cached is not None:
+                    _writeFiles(cached, files)
+                    self._cleanup()
+                    return h.top
+            else:
+                h = _HierExtr(name, func, *args, **kwargs)
         finally:
             _converting = 0
 
-        vpath = name + ".v"
-        vfile = open(vpath, 'w')
+        # generate in memory the files to cache
+        output = files
+        if key is not None and files is None:
+            output = {}
+        vfile = _openOutput(vpath, output)
         
         ### initialize properly ###
         _genUniqueSuffix.reset()
@@ -112,7 +135,12 @@ class _ToVerilogConvertor(object):
         arglist = _flatten(h.top)
         # print h.top
         _checkArgs(arglist)
-        genlist = _analyzeGens(arglist, h.absnames)
+        workers = _workerCount(self.workers, len(arglist))
+        if workers > 1:
+            genlist = [_renderGens(arglist, h.absnames, siglist, memlist,
+                                   None, _convertGen, workers)]
+        else:
+            genlist = _analyzeGens(arglist, h.absnames)
         intf = _analyzeTopFunc(func, *args, **kwargs)
         intf.name = name
 
@@ -122,14 +150,19 @@ class _ToVerilogConvertor(object):
         _convertGens(genlist, vfile)
         _writeModuleFooter(vfile)
 
-        vfile.close()
+        _closeOutput(vfile, vpath, output)
 
         # don't write testbench if module has no ports
         if len(intf.argnames) > 0:
             tbpath = "tb_" + vpath
-            tbfile = open(tbpath, 'w')
+            tbfile = _openOutput(tbpath, output)
             _writeTestBench(tbfile, intf)
-            tbfile.close()
+            _closeOutput(tbfile, tbpath, output)
+
+        if key is not None:
+            _storeCache(self.cache, key, output)
+            if files is None:
+                _writeFiles(output)
 
         # clean up signal names
         for sig in siglist:
@@ -137,10 +170,14 @@ class _ToVerilogConvertor(object):
             sig._driven = False
             sig._read = False
             
-        # clean up attributes
-        self.name = None
+        self._cleanup()
 
         return h.top
+
+    def _cleanup(self):
+        # clean up attributes
+        self.name = None
+        self.files = None
     
 
 toVerilog = _ToVerilogConvertor()
@@ -293,26 +330,32 @@ def _getSignString(s):
 
 
 def _convertGens(genlist, vfile):
-    blockBuf = StringIO()
-    funcBuf = StringIO()
+    blockBuf = _OutputBuffer()
+    funcBuf = _OutputBuffer()
     for ast in genlist:
-        if isinstance(ast, _UserVerilog):
-            blockBuf.write(str(ast))
-            continue
-        if ast.kind == _kind.ALWAYS:
-            Visitor = _ConvertAlwaysVisitor
-        elif ast.kind == _kind.INITIAL:
-            Visitor = _ConvertInitialVisitor
-        elif ast.kind == _kind.SIMPLE_ALWAYS_COMB:
-            Visitor = _ConvertSimpleAlwaysCombVisitor
-        elif ast.kind == _kind.ALWAYS_DECO:
-            Visitor = _ConvertAlwaysDecoVisitor
-        else: # ALWAYS_COMB
-            Visitor = _ConvertAlwaysCombVisitor
-        v = Visitor(ast, blockBuf, funcBuf)
-        compiler.walk(ast, v)
-    vfile.write(funcBuf.getvalue()); funcBuf.close()
-    vfile.write(blockBuf.getvalue()); blockBuf.close()
+        _convertGen(ast, blockBuf, funcBuf)
+    vfile.write(funcBuf.getvalue())
+    vfile.write(blockBuf.getvalue())
+
+def _convertGen(ast, blockBuf, funcBuf):
+    if isinstance(ast, _RenderedGens):
+        ast.write(blockBuf, funcBuf)
+        return
+    if isinstance(ast, _UserVerilog):
+        blockBuf.write(str(ast))
+        return
+    if ast.kind == _kind.ALWAYS:
+        Visitor = _ConvertAlwaysVisitor
+    elif ast.kind == _kind.INITIAL:
+        Visitor = _ConvertInitialVisitor
+    elif ast.kind == _kind.SIMPLE_ALWAYS_COMB:
+        Visitor = _ConvertSimpleAlwaysCombVisitor
+    elif ast.kind == _kind.ALWAYS_DECO:
+        Visitor = _ConvertAlwaysDecoVisitor
+    else: # ALWAYS_COMB
+        Visitor = _ConvertAlwaysCombVisitor
+    v = Visitor(ast, blockBuf, funcBuf)
+    compiler.walk(ast, v)
 
 class _ConvertVisitor(_ConversionMixin):
     
@@ -334,8 +377,7 @@ class _ConvertVisitor(_ConversionMixin):
         self.buf.write("%s" % arg)
 
     def writeline(self, nr=1):
-        for i in range(nr):
-            self.buf.write("\n%s" % self.ind)
+        self.buf.writeline(self.ind, nr)
             
     def indent(self):
         self.ind += ' ' * 4
@@ -0,0 +1,195 @@
+import os
+path = os.path
+import shutil
+import tempfile
+import imp
+import linecache
+import random
+
+from myhdl import *
+from myhdl.conversion import _toVHDL, _toVerilog, _cache
+
+from test_bin2gray import bin2gray
+
+
+class _Counter(object):
+    """ Count the conversions of a convertor module. """
+    def __init__(self, module):
+        self.module = module
+        self.orig = module._analyzeTopFunc
+        self.count = 0
+        module._analyzeTopFunc = self
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.orig(*args, **kwargs)
+    def restore(self):
+        self.module._analyzeTopFunc = self.orig
+
+def _convert(hdl, cache, width=8, files=None):
+    B = Signal(intbv(0)[width:])
+    G = Signal(intbv(0)[width:])
+    hdl.cache = cache
+    hdl.files = files
+    try:
+        return hdl(bin2gray, B, G, width)
+    finally:
+        hdl.cache = None
+
+def _check(hdl, module, outputs):
+    cache = tempfile.mkdtemp()
+    counter = _Counter(module)
+    try:
+        _convert(hdl, cache)
+        assert counter.count == 1
+        assert len(os.listdir(cache)) == 1
+        texts = {}
+        for f in outputs:
+            texts[f] = open(f).read()
+            os.remove(f)
+        inst = _convert(hdl, cache)
+        assert counter.count == 1
+        assert inst is not None
+        for f in outputs:
+            assert open(f).read() == texts[f]
+        files = {}
+        _convert(hdl, cache, files=files)
+        assert counter.count == 1
+        for f in outputs:
+            assert files[f] == texts[f]
+        # a different width is a different design
+        _convert(hdl, cache, width=4)
+        assert counter.count == 2
+        assert len(os.listdir(cache)) == 2
+    finally:
+        counter.restore()
+        shutil.rmtree(cache)
+
+def testVHDLCache():
+    _check(toVHDL, _toVHDL, ["bin2gray.vhd", "pck_myhdl_%s.vhd" % _toVHDL._version])
+
+def testVerilogCache():
+    _check(toVerilog, _toVerilog, ["bin2gray.v", "tb_bin2gray.v"])
+
+
+SOURCE = """
+from myhdl import *
+
+def inv(a, b):
+    @always_comb
+    def logic():
+        b.next = %s
+    return logic
+"""
+
+def testSourceChange():
+    cache = tempfile.mkdtemp()
+    d = tempfile.mkdtemp()
+    counter = _Counter(_toVerilog)
+    try:
+        a, b = [Signal(bool(0)) for i in range(2)]
+        texts = []
+        for expr, count in (("not a", 1), ("not a", 1), ("a", 2)):
+            fn = path.join(d, "inv.py")
+            open(fn, "w").write(SOURCE % expr)
+            # the file may be rewritten within its modification time
+            linecache.clearcache()
+            mod = imp.load_source("inv", fn)
+            toVerilog.cache = cache
+            toVerilog(mod.inv, a, b)
+            toVerilog.cache = None
+            assert counter.count == count
+            texts.append(open("inv.v").read())
+        assert texts[0] == texts[1]
+        assert texts[0] != texts[2]
+    finally:
+        toVerilog.cache = None
+        counter.restore()
+        shutil.rmtree(cache)
+        shutil.rmtree(d)
+
+def testConvertorChange():
+    cache = tempfile.mkdtemp()
+    counter = _Counter(_toVHDL)
+    digest = _cache._myhdlDigest()
+    try:
+        _convert(toVHDL, cache)
+        _convert(toVHDL, cache)
+        assert counter.count == 1
+        # a modified convertor converts the design again
+        _cache._myhdlHash = digest + "-modified"
+        _convert(toVHDL, cache)
+        assert counter.count == 2
+        assert len(os.listdir(cache)) == 2
+    finally:
+        _cache._myhdlHash = digest
+        counter.restore()
+        shutil.rmtree(cache)
+
+def testDesignFiles():
+    # installed packages are part of designs, not the python library
+    assert not _cache._isDesignFile(os.__file__)
+    for d in ("site-packages", "dist-packages"):
+        assert _cache._isDesignFile(path.join(_cache._libDir, d, "ip.py"))
+    assert not _cache._isDesignFile(_toVHDL.__file__)
+    assert _cache._isDesignFile(__file__)
+
+class Config(object):
+    width = 8
+
+def config_bin2gray(B, G, config):
+    return bin2gray(B, G, config.width)
+
+def testUncacheable():
+    cache = tempfile.mkdtemp()
+    counter = _Counter(_toVHDL)
+    try:
+        B = Signal(intbv(0)[8:])
+        G = Signal(intbv(0)[8:])
+        for i in range(2):
+            toVHDL.cache = cache
+            toVHDL(config_bin2gray, B, G, Config())
+            toVHDL.cache = None
+        assert counter.count == 2
+        assert os.listdir(cache) == []
+    finally:
+        toVHDL.cache = None
+        counter.restore()
+        shutil.rmtree(cache)
+
+
+def random_inv(a, b):
+    # elaboration with a side effect
+    v = random.randrange(256)
+    @always_comb
+    def logic():
+        b.next = a ^ v
+    return logic
+
+def _text(files):
+    return dict([(f, "".join([l for l in t.splitlines(True)
+                              if "Date:" not in l]))
+                 for f, t in files.items()])
+
+def testElaboration():
+    # a cached design is elaborated once, as in an uncached conversion
+    cache = tempfile.mkdtemp()
+    try:
+        for hdl in (toVHDL, toVerilog):
+            outputs = []
+            for c in (None, cache, cache):
+                a, b = [Signal(intbv(0)[8:]) for i in range(2)]
+                files = {}
+                random.seed(1)
+                hdl.cache = c
+                hdl.files = files
+                try:
+                    inst = hdl(random_inv, a, b)
+                finally:
+                    hdl.cache = None
+                    hdl.files = None
+                v = _cache._cell_deref(inst.func.func_closure[-1])
+                outputs.append((_text(files), v, random.random()))
+            assert outputs[1] == outputs[0]
+            assert outputs[2] == outputs[0]
+    finally:
+        shutil.rmtree(cache)
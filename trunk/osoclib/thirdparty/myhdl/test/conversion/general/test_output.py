@@ -0,0 +1,63 @@
+import os
+path = os.path
+from cStringIO import StringIO
+
+from myhdl import *
+from myhdl.conversion._misc import _OutputBuffer
+from myhdl.conversion._toVHDL import _version
+
+from test_bin2gray import bin2gray
+
+PCK = "pck_myhdl_%s.vhd" % _version
+
+def _convert(hdl, files=None):
+    B = Signal(intbv(0)[8:])
+    G = Signal(intbv(0)[8:])
+    hdl.files = files
+    hdl(bin2gray, B, G, width=8)
+
+def _strip(text):
+    return [l for l in text.splitlines() if not l.startswith(("//", "--"))]
+
+def testVHDLFiles():
+    for f in ("bin2gray.vhd", PCK):
+        if path.exists(f):
+            os.remove(f)
+    files = {}
+    _convert(toVHDL, files)
+    assert toVHDL.files is None
+    assert sorted(files) == ["bin2gray.vhd", PCK]
+    assert not path.exists("bin2gray.vhd")
+    assert not path.exists(PCK)
+    _convert(toVHDL)
+    for f in files:
+        assert _strip(files[f]) == _strip(open(f).read())
+
+def testVerilogFiles():
+    for f in ("bin2gray.v", "tb_bin2gray.v"):
+        if path.exists(f):
+            os.remove(f)
+    files = {}
+    _convert(toVerilog, files)
+    assert toVerilog.files is None
+    assert sorted(files) == ["bin2gray.v", "tb_bin2gray.v"]
+    assert not path.exists("bin2gray.v")
+    _convert(toVerilog)
+    for f in files:
+        assert _strip(files[f]) == _strip(open(f).read())
+
+def testOutputBuffer():
+    target = StringIO()
+    buf = _OutputBuffer(target)
+    buf.chunksize = 10
+    buf.write("begin")
+    buf.writeline("    ")
+    assert target.getvalue() == ""
+    buf.write("a <= b;")
+    buf.writeline(nr=2)
+    assert target.getvalue() == "begin\n    a <= b;\n\n"
+    print >> buf, "end",
+    print >> buf, "process;"
+    assert buf.getvalue() == "end process;\n"
+    buf.flush()
+    assert target.getvalue() == "begin\n    a <= b;\n\nend process;\n"
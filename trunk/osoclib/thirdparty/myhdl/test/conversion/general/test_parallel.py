@@ -0,0 +1,136 @@
+import re
+import random
+
+from myhdl import *
+from myhdl import ConversionError
+from myhdl.conversion import _parallel
+from myhdl.conversion._misc import _error
+
+from test_fsm import FramerCtrl, FSMBench, t_State_b, t_State_oh
+from test_loops import (LoopBench, FunctionCall, ForBreakContinueLoop,
+                        NestedForLoop1, WhileBreakContinueLoop)
+
+
+def parallelBench():
+    fsm_b = FSMBench(FramerCtrl, t_State_b)
+    fsm_oh = FSMBench(FramerCtrl, t_State_oh)
+    func = LoopBench(FunctionCall)
+    loop_fbc = LoopBench(ForBreakContinueLoop)
+    nested = LoopBench(NestedForLoop1)
+    loop_wbc = LoopBench(WhileBreakContinueLoop)
+    func_2 = LoopBench(FunctionCall)
+    return fsm_b, func, fsm_oh, loop_fbc, nested, loop_wbc, func_2
+
+t_Phase = enum("IDLE", "RUN", "DONE")
+
+def phases(clk, start, done):
+
+    @instance
+    def first():
+        phase = t_Phase.IDLE
+        while 1:
+            yield clk.posedge
+            if phase == t_Phase.IDLE:
+                if start:
+                    phase = t_Phase.RUN
+            else:
+                phase = t_Phase.IDLE
+
+    @always(clk.posedge)
+    def second():
+        done.next = 0
+        if start:
+            done.next = 1
+
+    return first, second
+
+def multipleDriven(a, b, c):
+
+    @always_comb
+    def first():
+        b.next = a
+
+    @always_comb
+    def second():
+        c.next = a
+
+    @always_comb
+    def third():
+        b.next = not a
+
+    return first, second, third
+
+
+def _convert(hdl, workers, func, *args):
+    files = {}
+    hdl.files = files
+    hdl.workers = workers
+    # the loop benches use random data
+    random.seed(1)
+    try:
+        hdl(func, *args)
+    finally:
+        hdl.files = None
+        hdl.workers = 1
+    return files
+
+def _normalize(text):
+    """ Number the labels from the first one, and remove the date. """
+    text = "".join([l for l in text.splitlines(True) if "Date:" not in l])
+    numbers = [int(n) for n in re.findall(r"MYHDL(\d+)", text)]
+    if not numbers:
+        return text
+    first = min(numbers)
+    return re.sub(r"MYHDL(\d+)",
+                  lambda m: "MYHDL%d" % (int(m.group(1)) - first), text)
+
+def _check(hdl):
+    ref = _convert(hdl, 1, parallelBench)
+    for workers in (2, 3):
+        files = _convert(hdl, workers, parallelBench)
+        assert sorted(files) == sorted(ref)
+        for f in ref:
+            assert _normalize(files[f]) == _normalize(ref[f])
+
+def testVHDL():
+    _check(toVHDL)
+
+def testVerilog():
+    _check(toVerilog)
+
+def testEnumGlobal():
+    # the enum type is only found in the generator namespace
+    for hdl in (toVHDL, toVerilog):
+        outputs = []
+        for workers in (1, 2):
+            clk, start, done = [Signal(bool(0)) for i in range(3)]
+            outputs.append(_convert(hdl, workers, phases, clk, start, done))
+        ref, files = outputs
+        assert sorted(files) == sorted(ref)
+        for f in ref:
+            assert _normalize(files[f]) == _normalize(ref[f])
+
+def testEnumTypeNotFound():
+    r = _parallel._RangeResult()
+    r.enums = [(0, (0, 0), 0, "t_State")]
+    try:
+        _parallel._mergeEnums([r], {})
+    except ConversionError, e:
+        assert e.kind == _error.EnumTypeNotFound
+        assert e.msg == "t_State"
+    else:
+        assert False
+
+def testMultipleDriven():
+    for hdl in (toVHDL, toVerilog):
+        errors = []
+        for workers in (1, 3):
+            a, b, c = [Signal(bool(0)) for i in range(3)]
+            try:
+                _convert(hdl, workers, multipleDriven, a, b, c)
+            except ConversionError, e:
+                assert e.kind == _error.SigMultipleDriven
+                errors.append(str(e))
+            else:
+                assert False
+        assert errors[0] == errors[1]
@@ -0,0 +1,107 @@
+""" Conversion performance benchmark of a replicated design
+
+A register file with N identical channels, each with a clocked process,
+a combinational process and a function call. The converted files are
+written in the current directory. The VHDL conversion is run a second
+time with toVHDL.reuse set, which emits the channel entity only once,
+and a third time with a conversion cache filled by a first run.
+Usage: python perf_replicated.py [N]
+
+"""
+
+import sys
+import time
+import shutil
+import tempfile
+
+from myhdl import *
+
+def parity(v):
+    p = intbv(0)[1:]
+    for i in range(8):
+        p[0] = p[0] ^ v[i]
+    return p
+
+def channel(clk, rst, we, din, dout, par):
+
+    reg = Signal(intbv(0)[8:])
+
+    @always(clk.posedge)
+    def write():
+        if rst:
+            reg.next = 0
+        elif we:
+            reg.next = din
+
+    @always_comb
+    def read():
+        dout.next = reg
+        par.next = parity(reg)
+
+    return write, read
+
+def regfile(clk, rst, we, sel, din, dout, par, N):
+
+    wes = [Signal(bool(0)) for i in range(N)]
+    douts = [Signal(intbv(0)[8:]) for i in range(N)]
+    pars = [Signal(bool(0)) for i in range(N)]
+    channels = []
+    for i in range(N):
+        channels.append(channel(clk, rst, wes[i], din, douts[i], pars[i]))
+
+    @always_comb
+    def decode():
+        for i in range(N):
+            wes[i].next = we[i]
+
+    @always_comb
+    def mux():
+        dout.next = douts[sel]
+        par.next = pars[sel]
+
+    return channels, decode, mux
+
+def convert(hdl, N, reuse=False, cache=None, workers=1):
+    clk = Signal(bool(0))
+    rst = Signal(bool(0))
+    we = Signal(intbv(0)[N:])
+    sel = Signal(intbv(0, min=0, max=N))
+    din = Signal(intbv(0)[8:])
+    dout = Signal(intbv(0)[8:])
+    par = Signal(bool(0))
+    start = time.time()
+    if reuse:
+        hdl.reuse = True
+    hdl.cache = cache
+    hdl.workers = workers
+    try:
+        hdl(regfile, clk, rst, we, sel, din, dout, par, N)
+    finally:
+        hdl.cache = None
+        hdl.workers = 1
+    return time.time() - start
+
+def main():
+    N = 256
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+    for hdl, reuse in ((toVHDL, False), (toVHDL, True), (toVerilog, False)):
+        name = hdl.__class__.__name__[3:-9]
+        if reuse:
+            name += " reuse"
+        print "%-16s %d channels: %.2f s" % (name, N, convert(hdl, N, reuse))
+    cache = tempfile.mkdtemp()
+    try:
+        convert(toVHDL, N, cache=cache)
+        print "%-16s %d channels: %.2f s" % ("VHDL cached", N,
+                                             convert(toVHDL, N, cache=cache))
+    finally:
+        shutil.rmtree(cache)
+    for hdl in (toVHDL, toVerilog):
+        name = hdl.__class__.__name__[3:-9] + " parallel"
+        print "%-16s %d channels: %.2f s" % (name, N,
+                                             convert(hdl, N, workers=None))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import os
+path = os.path
+import re
+
+from myhdl import *
+
+
+def counter(count, enable, clock, reset, step):
+
+    @always(clock.posedge, reset.negedge)
+    def logic():
+        if reset == 0:
+            count.next = 0
+        else:
+            if enable:
+                count.next = (count + step) % 16
+
+    return logic
+
+def pair(a, b, enable, clock, reset):
+    c_a = counter(a, enable, clock, reset, step=1)
+    c_b = counter(b, enable, clock, reset, step=3)
+    return c_a, c_b
+
+def counters(a, b, c, d, e, enable, clock, reset):
+    p_0 = pair(a, b, enable, clock, reset)
+    p_1 = pair(c, d, enable, clock, reset)
+    c_e = counter(e, enable, clock, reset, step=1)
+    return p_0, p_1, c_e
+
+def pairs(a, b, c, d, enable, clock, reset):
+    p_0 = pair(a, b, enable, clock, reset)
+    p_1 = pair(c, d, enable, clock, reset)
+    return p_0, p_1
+
+
+def reuseBench():
+
+    a, b, c, d, e = [Signal(intbv(0)[4:]) for i in range(5)]
+    enable = Signal(bool(0))
+    clock, reset = [Signal(bool(1)) for i in range(2)]
+
+    dut = counters(a, b, c, d, e, enable, clock, reset)
+
+    @instance
+    def clockGen():
+        clock.next = 1
+        while 1:
+            yield delay(10)
+            clock.next = not clock
+
+    @instance
+    def stimulus():
+        reset.next = 1
+        yield clock.negedge
+        reset.next = 0
+        yield clock.negedge
+        reset.next = 1
+        for i in range(40):
+            enable.next = 1
+            if i % 3 == 0:
+                enable.next = 0
+            yield clock.negedge
+            print a
+            print b
+            print c
+            print d
+            print e
+        raise StopSimulation
+
+    return dut, clockGen, stimulus
+
+
+def testReuse():
+    toVHDL.reuse = True
+    assert conversion.verify(reuseBench) == 0
+
+def testReuseEntities():
+    a, b, c, d, e = [Signal(intbv(0)[4:]) for i in range(5)]
+    enable = Signal(bool(0))
+    clock, reset = [Signal(bool(1)) for i in range(2)]
+    toVHDL.reuse = True
+    toVHDL(counters, a, b, c, d, e, enable, clock, reset)
+    assert not toVHDL.reuse
+    s = open("counters.vhd").read()
+    # pair, counter with step 1 and counter with step 3
+    assert len(re.findall(r"^entity \w+ is", s, re.M)) == 4
+    assert len(re.findall(r"entity work\.", s)) == 5
+    assert len(re.findall(r": process", s)) == 2
+
+def testReuseNames():
+    a, b, c, d, e = [Signal(intbv(0)[4:]) for i in range(5)]
+    enable = Signal(bool(0))
+    clock, reset = [Signal(bool(1)) for i in range(2)]
+    toVHDL.reuse = True
+    toVHDL(counters, a, b, c, d, e, enable, clock, reset)
+    toVHDL.reuse = True
+    toVHDL(pairs, a, b, c, d, enable, clock, reset)
+    names = {}
+    for top in ("counters", "pairs"):
+        s = open("%s.vhd" % top).read()
+        names[top] = sorted(re.findall(r"^entity (\w+) is", s, re.M))
+    # both designs can be compiled in the same library
+    assert names["counters"] == ["counters", "counters_counter",
+                                 "counters_counter_1", "counters_pair"]
+    assert names["pairs"] == ["pairs", "pairs_counter", "pairs_counter_1",
+                              "pairs_pair"]
+
+def testNoReuse():
+    a, b, c, d, e = [Signal(intbv(0)[4:]) for i in range(5)]
+    enable = Signal(bool(0))
+    clock, reset = [Signal(bool(1)) for i in range(2)]
+    toVHDL(counters, a, b, c, d, e, enable, clock, reset)
+    s = open("counters.vhd").read()
+    assert len(re.findall(r"^entity \w+ is", s, re.M)) == 1
+    assert s.count("entity work.") == 0
+    assert len(re.findall(r": process", s)) == 5
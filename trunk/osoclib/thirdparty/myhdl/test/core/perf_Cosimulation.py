@@ -0,0 +1,93 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+
+""" Cosimulation exchange performance benchmark
+
+Runs a clocked counter in the stub HDL simulator (stub_Cosimulation.py),
+with text and binary messages. A MyHDL process either waits on the
+counter value, so each time step is exchanged with the simulator, or only
+samples it after each clock edge, so binary mode can batch time steps.
+
+Usage: python perf_Cosimulation.py [N] with N the number of clock cycles.
+
+"""
+
+import sys
+import os
+import time
+
+from myhdl import *
+
+stub = "%s %s" % (sys.executable,
+                  os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "stub_Cosimulation.py"))
+
+def bench(mode, N, sensitive):
+    clk = Signal(bool(0))
+    inc = Signal(intbv(1)[8:])
+    cnt = Signal(intbv(0)[32:])
+    neg = Signal(intbv(0, min=-2**15, max=2**15))
+    cosim = Cosimulation("%s %s" % (stub, mode),
+                         clk=clk, inc=inc, cnt=cnt, neg=neg)
+
+    def clkgen():
+        for i in range(N):
+            yield delay(5)
+            clk.next = 1
+            yield delay(5)
+            clk.next = 0
+        raise StopSimulation
+
+    def monitor():
+        while 1:
+            yield cnt
+
+    def sample():
+        while 1:
+            yield clk.negedge
+            yield delay(2)
+            cnt.val
+
+    procs = [clkgen(), sample()]
+    if sensitive:
+        procs.append(monitor())
+    return cosim, procs
+
+def run(mode, N, sensitive):
+    cosim, procs = bench(mode, N, sensitive)
+    sim = Simulation(cosim, procs)
+    start = time.time()
+    sim.run(quiet=1)
+    elapsed = time.time() - start
+    print "%-6s %-9s: %.2f s, %d frames, %d frames/s" % \
+          (mode, sensitive and "sensitive" or "sampled", elapsed,
+           cosim._frames, cosim._frames / elapsed)
+
+
+def main():
+    N = 5000
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+
+    for sensitive in (True, False):
+        run("text", N, sensitive)
+        run("binary", N, sensitive)
+
+
+if __name__ == '__main__':
+    main()
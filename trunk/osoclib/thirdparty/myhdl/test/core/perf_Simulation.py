@@ -0,0 +1,73 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Future events scheduling performance benchmark
+
+Many clocks with different periods and processes waiting on random delays
+keep a lot of events pending. Usage: python perf_Simulation.py [N [T]]
+with N the number of clocks and delay processes and T the duration.
+
+"""
+
+import sys
+import time
+import random
+from random import randrange
+random.seed(1) # random, but deterministic
+
+from myhdl import *
+
+def bench(N, counter):
+
+    def clkGen(clk, period):
+        while 1:
+            yield delay(period)
+            clk.next = not clk
+            counter[0] += 1
+
+    def delayGen():
+        while 1:
+            yield delay(randrange(1, 50))
+            counter[0] += 1
+
+    clocks = [Signal(bool(0)) for i in range(N)]
+    clkGens = [clkGen(clocks[i], 3 + i % 17) for i in range(N)]
+    delayGens = [delayGen() for i in range(N)]
+    return clkGens, delayGens
+
+
+def main():
+    N = 500
+    T = 2000
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        T = int(sys.argv[2])
+
+    counter = [0]
+    sim = Simulation(bench(N, counter))
+    start = time.time()
+    sim.run(T, quiet=1)
+    elapsed = time.time() - start
+    print "%d events in %.2f s: %d events/s" % (counter[0], elapsed, 
+                                                counter[0] / elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+
+""" always_comb sensitivity performance benchmark
+
+Models a shared bus intercon: a combinational address decoder drives
+one select line per slave, and each slave has a combinational process
+reading the address, data and select signals. The master changes the
+address, data and strobe in the same delta cycle, so each process is
+triggered by several signals at once.
+
+The static sensitivity waiters are compared with the generator based
+waiters. Usage: python perf_always_comb.py [N [T]] with N the number
+of slaves and T the duration.
+
+"""
+
+import sys
+import time
+import random
+from random import randrange
+random.seed(1) # random, but deterministic
+
+from myhdl import *
+from myhdl._Waiter import _SignalWaiter, _SignalTupleWaiter
+
+def decoder(adr, sel, N):
+
+    @always_comb
+    def logic():
+        for i in range(N):
+            sel[i].next = (adr >> 8) == i
+
+    return logic
+
+def slave(adr, dat_i, stb, sel, dat_o, ack, i):
+
+    @always_comb
+    def logic():
+        if stb and sel:
+            dat_o.next = (dat_i + adr + i) & 0xff
+            ack.next = 1
+        else:
+            dat_o.next = 0
+            ack.next = 0
+
+    return logic
+
+def bench(N, T):
+    adr = Signal(intbv(0)[16:])
+    dat = Signal(intbv(0)[8:])
+    stb = Signal(bool(0))
+    sel = [Signal(bool(0)) for i in range(N)]
+    dat_o = [Signal(intbv(0)[8:]) for i in range(N)]
+    ack = [Signal(bool(0)) for i in range(N)]
+
+    combs = [decoder(adr, sel, N)]
+    for i in range(N):
+        combs.append(slave(adr, dat, stb, sel[i], dat_o[i], ack[i], i))
+
+    def master():
+        while 1:
+            yield delay(1)
+            adr.next = randrange(N << 8)
+            dat.next = randrange(256)
+            stb.next = not stb
+
+    return combs, master()
+
+def run(N, T, static):
+    random.seed(1)
+    combs, master = bench(N, T)
+    if static:
+        procs = combs
+    else:
+        procs = []
+        for c in combs:
+            if len(c.senslist) == 1:
+                procs.append(_SignalWaiter(c.gen))
+            else:
+                procs.append(_SignalTupleWaiter(c.gen))
+    sim = Simulation(procs, master)
+    start = time.time()
+    sim.run(T, quiet=1)
+    elapsed = time.time() - start
+    if static:
+        activations = sum([c.activations for c in combs])
+        print "static:    %.2f s, %d activations" % (elapsed, activations)
+    else:
+        print "generator: %.2f s" % elapsed
+
+
+def main():
+    N = 32
+    T = 2000
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        T = int(sys.argv[2])
+
+    run(N, T, False)
+    run(N, T, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+
+""" intbv operations performance benchmark
+
+Measures the number of operations per second of common intbv operations
+in simulation loops. Usage: python perf_intbv.py [N] with N the number of
+repetitions of each operation.
+
+"""
+
+import sys
+import time
+
+from myhdl import intbv, concat, Signal
+from myhdl._simulator import _siglist
+
+def construct(N):
+    for i in xrange(N):
+        intbv(i & 0xff, min=0, max=256)
+
+def sized(N):
+    for i in xrange(N):
+        intbv(i & 0xff)[8:]
+
+def add(N):
+    a = intbv(3)[16:]
+    b = intbv(5)[16:]
+    for i in xrange(N):
+        a + b
+
+def iadd(N):
+    a = intbv(0)[32:]
+    for i in xrange(N):
+        a += 1
+
+def index(N):
+    a = intbv(0x5a5a)[16:]
+    for i in xrange(N):
+        a[i & 0xf]
+
+def slice(N):
+    a = intbv(0x5a5a)[16:]
+    for i in xrange(N):
+        a[12:4]
+
+def concat3(N):
+    a = intbv(5)[4:]
+    b = intbv(3)[4:]
+    c = True
+    for i in xrange(N):
+        concat(a, b, c)
+
+def setbit(N):
+    a = intbv(0)[16:]
+    for i in xrange(N):
+        a[i & 0xf] = i & 1
+
+def setslice(N):
+    a = intbv(0)[16:]
+    for i in xrange(N):
+        a[12:4] = i & 0xff
+
+def iterate(N):
+    a = intbv(0x5a5a)[16:]
+    for i in xrange(N / 16):
+        for b in a:
+            pass
+
+def signalnext(N):
+    s = Signal(intbv(0)[16:])
+    for i in xrange(N):
+        s.next = i & 0xffff
+        s._update()
+    del _siglist[:]
+
+def signalbit(N):
+    s = Signal(intbv(0)[16:])
+    for i in xrange(N):
+        s.next[i & 0xf] = 1
+        s._update()
+    del _siglist[:]
+
+benchmarks = (construct, sized, add, iadd, index, slice, concat3, setbit,
+              setslice, iterate, signalnext, signalbit)
+
+def main():
+    N = 200000
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+
+    for bench in benchmarks:
+        start = time.time()
+        bench(N)
+        elapsed = time.time() - start
+        print "%-12s %10d ops/s" % (bench.__name__, N / elapsed)
+
+
+if __name__ == '__main__':
+    main()
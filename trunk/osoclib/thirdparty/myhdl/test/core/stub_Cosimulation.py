@@ -0,0 +1,154 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Stub HDL simulator for Cosimulation tests and benchmarks
+
+The stub models a counter register without timing of its own: cnt is
+incremented by inc on each rising edge of clk, and neg is -cnt. clk and
+inc come from MyHDL, cnt and neg go to MyHDL. neg is undefined until the
+first clk rising edge.
+
+Usage: python stub_Cosimulation.py text|binary
+
+"""
+
+import sys
+import os
+import struct
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+from myhdl._Cosimulation import _HEADER, _HEADERSIZE, _INDEX, _INDEXSIZE, \
+                                _UNDEFINED, _packValue, _unpackValue
+
+MAXLINE = 4096
+
+fromSignames = ["clk", "inc"]
+fromSizes = [1, 8]
+toSignames = ["cnt", "neg"]
+toSizes = [32, 16]
+
+
+class Stub(object):
+
+    def __init__(self, binary):
+        self.binary = binary
+        self.wt = int(os.environ['MYHDL_TO_PIPE'])
+        self.rf = int(os.environ['MYHDL_FROM_PIPE'])
+        self.buf = ""
+        self.clk = self.inc = 0
+        self.cnt = 0
+        self.neg = None
+        self.changed = [0, 1]
+
+    def command(self, cmd):
+        os.write(self.wt, cmd)
+        os.read(self.rf, MAXLINE)
+
+    def handshake(self):
+        buf = "FROM 0"
+        for n, w in zip(fromSignames, fromSizes):
+            buf += " %s %s" % (n, w)
+        self.command(buf)
+        buf = "TO 0"
+        for n, w in zip(toSignames, toSizes):
+            buf += " %s %s" % (n, w)
+        self.command(buf)
+        if self.binary:
+            self.command("START BINARY")
+        else:
+            self.command("START")
+
+    def recv(self, n):
+        while len(self.buf) < n:
+            data = os.read(self.rf, 65536)
+            if not data:
+                raise EOFError
+            self.buf += data
+        data, self.buf = self.buf[:n], self.buf[n:]
+        return data
+
+    def values(self):
+        """ Return changed (index, value) since last report """
+        vals = (self.cnt, self.neg)
+        changes = [(i, vals[i]) for i in self.changed]
+        self.changed = []
+        return changes
+
+    def report(self, t):
+        if self.binary:
+            entries = []
+            for i, v in self.values():
+                if v is None:
+                    entries.append(struct.pack(_INDEX, i | _UNDEFINED))
+                else:
+                    v &= (1 << toSizes[i]) - 1
+                    entries.append(struct.pack(_INDEX, i) +
+                                   _packValue(v, (toSizes[i] + 7) // 8))
+            os.write(self.wt, struct.pack(_HEADER, t, len(entries)) +
+                     "".join(entries))
+        else:
+            buf = [str(t)]
+            for i, v in self.values():
+                buf.append(toSignames[i])
+                if v is None:
+                    buf.append("X")
+                else:
+                    buf.append("%x" % (v & ((1 << toSizes[i]) - 1)))
+            os.write(self.wt, " ".join(buf))
+
+    def receive(self):
+        """ Return time and from values received from MyHDL """
+        if self.binary:
+            t, n = struct.unpack(_HEADER, self.recv(_HEADERSIZE))
+            vals = [None] * len(fromSignames)
+            for i in range(n):
+                index, = struct.unpack(_INDEX, self.recv(_INDEXSIZE))
+                data = self.recv((fromSizes[index] + 7) // 8)
+                vals[index] = _unpackValue(data)
+            return t, vals
+        buf = os.read(self.rf, MAXLINE)
+        if not buf:
+            raise EOFError
+        e = buf.split()
+        vals = [None] * len(fromSignames)
+        if len(e) > 1:
+            vals = [int(v, 16) for v in e[1:]]
+        return int(e[0]), vals
+
+    def run(self):
+        self.handshake()
+        self.report(0)
+        while 1:
+            try:
+                t, (clk, inc) = self.receive()
+            except EOFError:
+                return
+            if inc is not None:
+                self.inc = inc
+            if clk is not None:
+                if clk and not self.clk:
+                    self.cnt += self.inc
+                    self.neg = -self.cnt
+                    self.changed = [0, 1]
+                self.clk = clk
+            self.report(t)
+
+
+if __name__ == '__main__':
+    Stub(sys.argv[1] == "binary").run()
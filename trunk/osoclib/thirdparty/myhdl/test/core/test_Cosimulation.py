@@ -31,8 +31,10 @@ random.seed(1) # random, but deterministic
 
 MAXLINE = 4096
 
-from myhdl import Signal
+from myhdl import Signal, Simulation, StopSimulation, intbv, delay, now, \
+                  always, instance
 
+from myhdl import _simulator
 from myhdl._Cosimulation import Cosimulation, CosimulationError, _error
 
 exe = "python test_Cosimulation.py CosimulationTest"
@@ -279,8 +281,79 @@ class CosimulationTest(TestCase):
             buf += " "
         os.write(wt, buf)
 
+
+stub = "%s %s" % (sys.executable,
+                  os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "stub_Cosimulation.py"))
+
+class BinaryCosimulationTest(TestCase):
+
+    """ Cosimulation with the stub simulator, in text and binary modes """
+
+    def setUp(self):
+        # a cosimulation of an earlier test may still be alive
+        _simulator._cosim = 0
+
+    def bench(self, mode, sensitive, cycles=50):
+        clk = Signal(bool(0))
+        inc = Signal(intbv(0)[8:])
+        cnt = Signal(intbv(0)[32:])
+        neg = Signal(intbv(0, min=-2**15, max=2**15))
+        cosim = Cosimulation("%s %s" % (stub, mode),
+                             clk=clk, inc=inc, cnt=cnt, neg=neg)
+        trace = []
+        @instance
+        def clkgen():
+            for i in range(cycles):
+                yield delay(5)
+                clk.next = not clk
+                yield delay(5)
+                clk.next = not clk
+            raise StopSimulation
+        @instance
+        def stimulus():
+            for i in range(cycles):
+                yield clk.negedge
+                inc.next = i % 7 + 1
+        @always(cnt)
+        def monitor():
+            trace.append((now(), int(cnt), int(neg)))
+        @instance
+        def poll():
+            while 1:
+                yield clk.negedge
+                yield delay(2)
+                trace.append((now(), int(cnt), int(neg)))
+        if sensitive:
+            Simulation(cosim, clkgen, stimulus, monitor, poll).run(quiet=1)
+        else:
+            Simulation(cosim, clkgen, stimulus, poll).run(quiet=1)
+        return cosim, trace
+
+    def testHandshake(self):
+        cosim, trace = self.bench("text", True, cycles=1)
+        self.assert_(not cosim._binary)
+        cosim, trace = self.bench("binary", True, cycles=1)
+        self.assert_(cosim._binary)
+
+    def testValues(self):
+        cosim, expected = self.bench("text", True)
+        cosim, trace = self.bench("binary", True)
+        self.assertEqual(trace, expected)
+        total = sum([i % 7 + 1 for i in range(49)])
+        self.assert_((495, total, -total) in trace)
+
+    def testBatch(self):
+        textCosim, expected = self.bench("text", False)
+        binaryCosim, trace = self.bench("binary", False)
+        self.assertEqual(trace, expected)
+        self.assert_(binaryCosim._frames < textCosim._frames // 2)
+
+
 def suite():
-    return unittest.makeSuite(CosimulationTest, 'test')
+    s = unittest.makeSuite(CosimulationTest, 'test')
+    s.addTest(unittest.makeSuite(BinaryCosimulationTest, 'test'))
+    return s
         
 if __name__ == "__main__":
     unittest.main()
@@ -241,6 +241,36 @@ class SigTest(TestCase):
         self.assertEqual(s1._posedgeWaiters, self.posedgeWaiters)
         self.assertEqual(s1._negedgeWaiters, self.negedgeWaiters)
     
+    def testNextBounds(self):
+        """ out of bounds next values are rejected """
+        for init in (intbv(5)[4:], intbv(5, min=-8, max=8),
+                     intbv(5, min=2, max=12)):
+            s = Signal(init)
+            for v in (init.min - 1, init.max, intbv(init.max)):
+                try:
+                    s.next = v
+                except ValueError:
+                    pass
+                else:
+                    self.fail()
+            s.next = init.max - 1
+            self.assertEqual(s._next, init.max - 1)
+            self.assertEqual(s._val, 5)
+        del _siglist[:]
+
+    def testNextUnsignedBounds(self):
+        """ unsigned next values are checked before next is modified """
+        s = Signal(intbv(5)[4:])
+        for v in (-1, 16, 100):
+            try:
+                s.next = v
+            except ValueError:
+                pass
+            else:
+                self.fail()
+            self.assertEqual(s._next, 5)
+        del _siglist[:]
+
     def testNextAccess(self):
         """ each next attribute access puts a sig in a global siglist """
         del _siglist[:]
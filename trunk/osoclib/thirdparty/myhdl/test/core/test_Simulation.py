@@ -28,7 +28,7 @@ random.seed(1) # random, but deterministic
 
 from myhdl import Simulation, SimulationError, now, delay, StopSimulation, join
 from myhdl import Signal, intbv
-from myhdl._Simulation import _error
+from myhdl._Simulation import _error, _run, _simrunc
 
 from myhdl._simulator import _siglist
 
@@ -614,6 +614,117 @@ class DelayLine(TestCase):
         Simulation(bench).run(quiet=QUIET)
 
 
+class FutureEventsOrder(TestCase):
+
+    """ Check future events ordering """
+
+    def bench(self, N, resumed):
+
+        def waiter(i, dt):
+            yield delay(dt)
+            resumed.append((now(), i))
+
+        return [waiter(i, randrange(1, 20)) for i in range(N)]
+
+    def testTimeOrder(self):
+        """ Events are run in time order """
+        resumed = []
+        Simulation(self.bench(200, resumed)).run(quiet=QUIET)
+        self.assertEqual(len(resumed), 200)
+        times = [t for (t, i) in resumed]
+        self.assertEqual(times, sorted(times))
+
+    def testSameTimeOrder(self):
+        """ Same time events are run in scheduling order """
+        scheduled = []
+        resumed = []
+
+        def waiter(i):
+            scheduled.append(i)
+            yield delay(10)
+            resumed.append(i)
+
+        Simulation([waiter(i) for i in range(50)]).run(quiet=QUIET)
+        # waiters run at a given time are popped from a stack
+        scheduled.reverse()
+        self.assertEqual(resumed, scheduled)
+
+
+
+class SimulationKernels(TestCase):
+
+    """ Check that accelerated kernel gives the same results """
+
+    def bench(self, trace):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[4:])
+        done = Signal(bool(0))
+
+        def clkGen():
+            while 1:
+                yield delay(5)
+                clk.next = not clk
+
+        def counter():
+            while 1:
+                yield clk.posedge
+                count.next = (count + 1) % 16
+                if count == 14:
+                    done.next = 1
+
+        def monitor():
+            while 1:
+                yield count, done
+                trace.append((now(), int(count), bool(done)))
+
+        def edges():
+            while 1:
+                yield clk.negedge, done.posedge
+                trace.append((now(), "edge"))
+
+        def joined():
+            while 1:
+                yield join(done.posedge, delay(33)), delay(100)
+                trace.append((now(), "join"))
+                yield delay(7), None
+                trace.append((now(), "delay"))
+
+        def stimulus():
+            yield delay(1000)
+            raise StopSimulation()
+
+        return clkGen(), counter(), monitor(), edges(), joined(), stimulus()
+
+    def simulate(self, kernel):
+        trace = []
+        sim = Simulation(self.bench(trace))
+        while sim._run(kernel, 37, QUIET):
+            trace.append((now(), "suspend"))
+        return trace
+
+    def testSameResults(self):
+        """ Same results with both kernels """
+        expected = self.simulate(_run)
+        self.assert_(len(expected) > 100)
+        if _simrunc is not None:
+            self.assertEqual(self.simulate(_simrunc.run), expected)
+
+    def testRunc(self):
+        """ runc requires accelerated kernel """
+        def g():
+            yield delay(10)
+        sim = Simulation(g())
+        if _simrunc is None:
+            try:
+                sim.runc(quiet=QUIET)
+            except SimulationError, e:
+                self.assertEqual(e.kind, _error.NoAccelerator)
+            else:
+                self.fail()
+        else:
+            self.assertEqual(sim.runc(quiet=QUIET), 0)
+            self.assertEqual(now(), 10)
+
 
 def initSignal(waveform):
     interval, val, sigdelay = waveform[0]
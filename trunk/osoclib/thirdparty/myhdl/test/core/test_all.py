@@ -22,11 +22,14 @@
 
 import test_Simulation, test_Signal, test_intbv, test_Cosimulation, test_misc, \
        test_always_comb, test_bin, test_traceSignals, test_enum, test_concat, \
-       test_unparse, test_inferWaiter, test_always, test_instance, test_signed
+       test_unparse, test_inferWaiter, test_always, test_instance, test_signed, \
+       test_waveform, test_batch, test_profile, test_checkpoint
 
 modules = (test_Simulation, test_Signal, test_intbv, test_misc, test_always_comb,
            test_bin, test_traceSignals, test_enum, test_concat,
-           test_unparse, test_inferWaiter, test_always, test_instance, test_signed
+           test_unparse, test_inferWaiter, test_always, test_instance, test_signed,
+           test_waveform, test_batch, test_profile,
+           test_checkpoint
           )
 
 import unittest
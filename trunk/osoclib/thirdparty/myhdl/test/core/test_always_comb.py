@@ -34,7 +34,7 @@ from myhdl import Signal, Simulation, instances, AlwaysCombError, \
 
 from myhdl._always_comb import always_comb, _AlwaysComb, _error
 
-from myhdl._Waiter import _Waiter,_SignalWaiter,_SignalTupleWaiter
+from myhdl._Waiter import _Waiter, _StaticWaiter
 
 
 QUIET=1
@@ -416,14 +416,87 @@ class InferWaiterTest(TestCase):
         return inst_r, _Waiter(inst_s.gen), _Waiter(stimulus()), _Waiter(check())
 
     def testSignal1(self):
-        sim = Simulation(self.bench(SignalGen1, _SignalWaiter))
+        sim = Simulation(self.bench(SignalGen1, _StaticWaiter))
         sim.run()
         
     def testSignalTuple1(self):
-        sim = Simulation(self.bench(SignalTupleGen1, _SignalTupleWaiter))
+        sim = Simulation(self.bench(SignalTupleGen1, _StaticWaiter))
         sim.run()
 
 
+class StaticSensitivityTest(TestCase):
+
+    def bench(self, a, b, c, r):
+
+        @always_comb
+        def logic():
+            r.next = a + b + c
+
+        def stimulus():
+            yield delay(10)
+            a.next = 1
+            b.next = 2
+            c.next = 3
+            yield delay(10)
+            self.assertEqual(r, 6)
+            a.next = 4
+            yield delay(10)
+            self.assertEqual(r, 9)
+            c.next = 3
+            yield delay(10)
+            self.assertEqual(r, 9)
+            raise StopSimulation
+
+        return logic, stimulus()
+
+    def testActivations(self):
+        """ Changes in the same delta cycle run the function once """
+        a, b, c, r = [Signal(intbv(0)) for i in range(4)]
+        logic, stimulus = self.bench(a, b, c, r)
+        Simulation(logic, stimulus).run(quiet=QUIET)
+        # initial run, then a, b and c changes, then a change
+        self.assertEqual(logic.activations, 3)
+
+    def testRerun(self):
+        """ Sensitivity is registered again in a new simulation """
+        a, b, c, r = [Signal(intbv(0)) for i in range(4)]
+        logic, stimulus = self.bench(a, b, c, r)
+        Simulation(logic, stimulus).run(quiet=QUIET)
+        for s in (a, b, c):
+            self.assertEqual(s._staticWaiters, [])
+        logic, stimulus = self.bench(a, b, c, r)
+        Simulation(logic, stimulus).run(quiet=QUIET)
+        self.assertEqual(logic.activations, 3)
+
+    def testChain(self):
+        """ Chained functions settle in successive delta cycles """
+        a, b, c, d = [Signal(intbv(0)) for i in range(4)]
+
+        @always_comb
+        def first():
+            b.next = a + 1
+
+        @always_comb
+        def second():
+            c.next = a + b
+
+        @always_comb
+        def third():
+            d.next = b + c
+
+        def stimulus():
+            for i in range(10):
+                yield delay(10)
+                a.next = i
+                yield delay(1)
+                self.assertEqual(d, 3 * i + 2)
+            raise StopSimulation
+
+        Simulation(first, second, third, stimulus()).run(quiet=QUIET)
+        # initial run, then a changes for i = 1 .. 9
+        self.assertEqual(first.activations, 10)
+
+
 
 if __name__ == "__main__":
     unittest.main()
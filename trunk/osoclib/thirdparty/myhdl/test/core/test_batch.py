@@ -0,0 +1,126 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+""" Run the unit tests for the batch simulation runner """
+
+
+import unittest
+from unittest import TestCase
+
+from myhdl import delay, Signal, intbv, instance, always, now, \
+                  StopSimulation, runBatch, _simulator
+from myhdl._batch import PASSED, FAILED, ERROR
+
+
+def counter(width, step=1):
+    """ Count until overflow, collect the final count """
+    clk = Signal(bool(0))
+    cnt = Signal(intbv(0)[width:])
+    final = []
+    @instance
+    def clkgen():
+        while 1:
+            yield delay(5)
+            clk.next = not clk
+    @always(clk.posedge)
+    def count():
+        if cnt + step >= cnt.max:
+            final.append((int(cnt), now()))
+            raise StopSimulation
+        cnt.next = cnt + step
+    def collect():
+        return final[0]
+    return (clkgen, count), collect
+
+def check(limit):
+    """ Fail when the count reaches limit """
+    @instance
+    def bench():
+        for i in range(10):
+            yield delay(1)
+            assert i < limit, "count %d" % i
+    return bench
+
+def broken(n):
+    @instance
+    def bench():
+        yield delay(n)
+        raise ValueError("broken at %d" % now())
+    return bench
+
+
+class BatchTest(TestCase):
+
+    def testResults(self):
+        params = [(4,), (6,), (4, 3)]
+        summary = runBatch(counter, params, workers=2)
+        self.assert_(summary.ok())
+        values = [r.value for r in summary.results]
+        self.assertEqual(values, [(15, 155), (63, 635), (15, 55)])
+        self.assertEqual([r.index for r in summary.results], [0, 1, 2])
+        self.assertEqual([r.params for r in summary.results], params)
+        self.assertEqual([r.time for r in summary.results], [155, 635, 55])
+
+    def testSequential(self):
+        params = [{'width': 4}, {'width': 6}, {'width': 4, 'step': 3}]
+        parallel = runBatch(counter, params, workers=3)
+        # the simulator state of the caller is kept
+        sig = Signal(0)
+        sig.next = 1
+        signals = _simulator._signals[:]
+        try:
+            sequential = runBatch(counter, params, workers=1)
+            self.assertEqual(_simulator._signals, signals)
+        finally:
+            _simulator._signals.remove(sig)
+        self.assertEqual([r.value for r in sequential.results],
+                         [r.value for r in parallel.results])
+
+    def testFailures(self):
+        summary = runBatch(check, [20, 3, 5], workers=2)
+        self.assert_(not summary.ok())
+        self.assertEqual([r.status for r in summary.results],
+                         [PASSED, FAILED, FAILED])
+        self.assertEqual(summary.failed, summary.results[1:])
+        self.assert_("count 3" in summary.results[1].error)
+        self.assertEqual(summary.results[1].time, 4)
+        self.assert_("2 failed" in str(summary))
+
+    def testErrors(self):
+        summary = runBatch(broken, [7], workers=1)
+        result = summary.results[0]
+        self.assertEqual(result.status, ERROR)
+        self.assert_("broken at 7" in result.error)
+        self.assertEqual(summary.errors, [result])
+
+    def testDuration(self):
+        summary = runBatch(check, [20, 20], duration=5, workers=2)
+        self.assert_(summary.ok())
+        self.assertEqual([r.time for r in summary.results], [5, 5])
+
+    def testCallback(self):
+        seen = []
+        summary = runBatch(counter, range(2, 6), workers=2,
+                           callback=seen.append)
+        self.assertEqual(sorted([r.index for r in seen]), [0, 1, 2, 3])
+        self.assert_(summary.elapsed > 0)
+        self.assert_(summary.cputime > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+""" Run the unit tests for simulation checkpoints """
+
+
+import os
+import tempfile
+
+import unittest
+from unittest import TestCase
+
+from myhdl import delay, Signal, intbv, enum, instance, always, always_comb, \
+                  now, Simulation, StopSimulation, SimulationError
+from myhdl._checkpoint import _error
+
+t_State = enum("IDLE", "RUN", "FULL")
+
+WARMUP = 103
+
+def design(trace):
+    clk = Signal(bool(0))
+    rst = Signal(bool(1))
+    we = Signal(bool(0))
+    addr = Signal(intbv(0)[2:])
+    din = Signal(intbv(0)[8:])
+    dout = Signal(intbv(0)[8:])
+    cnt = Signal(intbv(0)[8:])
+    dbl = Signal(intbv(0)[9:])
+    dly = Signal(intbv(0)[8:], delay=3)
+    state = Signal(t_State.IDLE)
+    mem = [intbv(0)[8:] for i in range(4)]
+
+    @always(delay(5))
+    def clkgen():
+        clk.next = not clk
+
+    @always(clk.posedge)
+    def seq():
+        if rst:
+            cnt.next = 0
+            state.next = t_State.IDLE
+        else:
+            cnt.next = (cnt + 1) % 256
+            if cnt > 20:
+                state.next = t_State.FULL
+            else:
+                state.next = t_State.RUN
+            if we:
+                mem[int(addr)] = din.val
+            dout.next = mem[int(addr)]
+            dly.next = cnt
+
+    @always_comb
+    def comb():
+        dbl.next = 2 * cnt
+
+    @always(clk.negedge)
+    def monitor():
+        trace.append((now(), int(cnt), int(dbl), int(dly), int(dout),
+                      str(state)))
+
+    ports = rst, we, addr, din
+    return (clkgen, seq, comb, monitor), ports
+
+def warmup(rst, we, addr, din):
+    yield delay(22)
+    rst.next = 0
+    for i in range(4):
+        yield delay(10)
+        we.next = 1
+        addr.next = i
+        din.next = 0x11 * (i + 1)
+    yield delay(10)
+    we.next = 0
+
+def experiment(wait, rst, we, addr, din):
+    if wait:
+        yield delay(wait)
+    for i in (3, 1, 2, 0, 3):
+        addr.next = i
+        yield delay(10)
+    raise StopSimulation
+
+
+class CheckpointTest(TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(".ckpt")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def reference(self):
+        trace = []
+        insts, ports = design(trace)
+        Simulation(insts, warmup(*ports), experiment(WARMUP, *ports)).run()
+        return trace
+
+    def warm(self):
+        trace = []
+        insts, ports = design(trace)
+        sim = Simulation(insts, warmup(*ports))
+        sim.run(WARMUP, quiet=1)
+        sim.checkpoint(self.filename)
+        return sim, trace
+
+    def testRestore(self):
+        expected = self.reference()
+        sim, warmTrace = self.warm()
+        self.assertEqual(warmTrace, expected[:len(warmTrace)])
+        trace = []
+        insts, ports = design(trace)
+        sim = Simulation(insts, experiment(0, *ports))
+        sim.restore(self.filename)
+        sim.run()
+        self.assert_(len(trace) > 3)
+        self.assertEqual(trace, expected[len(warmTrace):])
+
+    def testRestoreTwice(self):
+        self.warm()
+        traces = []
+        for i in range(2):
+            trace = []
+            insts, ports = design(trace)
+            sim = Simulation(insts, experiment(0, *ports))
+            sim.restore(self.filename)
+            sim.run()
+            traces.append(trace)
+        self.assertEqual(traces[0], traces[1])
+
+    def testStarted(self):
+        sim, trace = self.warm()
+        try:
+            sim.restore(self.filename)
+        except SimulationError, e:
+            self.assertEqual(e.kind, _error.Started)
+        else:
+            self.fail()
+
+    def testMismatch(self):
+        self.warm()
+        clk = Signal(bool(0))
+        @always(delay(5))
+        def clkgen():
+            clk.next = not clk
+        sim = Simulation(clkgen)
+        try:
+            sim.restore(self.filename)
+        except SimulationError, e:
+            self.assertEqual(e.kind, _error.Mismatch)
+        else:
+            self.fail()
+
+    def testMixedDelay(self):
+        clk = Signal(bool(0))
+        cnt = Signal(0)
+        @always(delay(5))
+        def clkgen():
+            clk.next = not clk
+        @always(clk, delay(7))
+        def count():
+            cnt.next = cnt + 1
+        sim = Simulation(clkgen, count)
+        sim.run(20, quiet=1)
+        try:
+            sim.checkpoint(self.filename)
+        except SimulationError, e:
+            self.assertEqual(e.kind, _error.Delay)
+        else:
+            self.fail()
+
+
+if __name__ == "__main__":
+    unittest.main()
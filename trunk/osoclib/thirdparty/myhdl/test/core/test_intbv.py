@@ -31,6 +31,7 @@ import operator
 from copy import copy, deepcopy
 
 from myhdl._intbv import intbv
+from myhdl._bin import bin
 
 class TestIntbvInit(TestCase):
     def testDefaultValue(self):
@@ -459,6 +460,26 @@ class TestIntbvBounds(TestCase):
         else:
             self.fail()
 
+    def testWidth(self):
+        for lo in range(-300, 300, 7):
+            for hi in range(lo + 1, 300, 11):
+                if lo >= 0:
+                    ref = len(bin(hi-1))
+                elif hi <= 1:
+                    ref = len(bin(lo))
+                else:
+                    ref = max(len(bin(hi-1))+1, len(bin(lo)))
+                self.assertEqual(len(intbv(lo, min=lo, max=hi)), ref)
+
+    def testSliceBounds(self):
+        a = intbv(-5, min=-8, max=8)
+        for i, j in ((4, 0), (3, 1), (2, 0), (7, 3)):
+            s = a[i:j]
+            self.assertEqual(s, (-5 >> j) & (2**(i-j) - 1))
+            self.assertEqual(s.min, 0)
+            self.assertEqual(s.max, 2**(i-j))
+            self.assertEqual(len(s), i-j)
+
     def testSliceAssign(self):
         a = intbv(min=-24, max=34)
         for i in (-24, -2, 13, 33):
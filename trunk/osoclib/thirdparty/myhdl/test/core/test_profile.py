@@ -0,0 +1,163 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+""" Run the unit tests for the simulation profile """
+
+
+import os
+import gc
+import weakref
+import tempfile
+from StringIO import StringIO
+
+import unittest
+from unittest import TestCase
+
+from myhdl import delay, Signal, intbv, instance, always, always_comb, \
+                  Simulation, StopSimulation
+
+
+def bench(n):
+    clk = Signal(bool(0))
+    cnt = Signal(intbv(0)[8:])
+    dbl = Signal(intbv(0)[9:])
+    regs = [Signal(intbv(0)[8:]) for i in range(2)]
+    @instance
+    def clkgen():
+        for i in range(2 * n):
+            yield delay(5)
+            clk.next = not clk
+    @always(clk.posedge)
+    def counter():
+        cnt.next = cnt + 1
+        regs[1].next = regs[0]
+        regs[0].next = cnt
+    @always_comb
+    def double():
+        dbl.next = 2 * cnt
+    return clkgen, counter, double, cnt, dbl
+
+
+def subgen(n):
+    calls = []
+    def wait(t):
+        yield delay(t)
+    @instance
+    def caller():
+        for i in range(n):
+            g = wait(3)
+            calls.append(weakref.ref(g))
+            yield g
+    return caller, calls
+
+
+class ProfileTest(TestCase):
+
+    def processes(self, profile):
+        return dict([(p[0].split()[0], p[1]) for p in profile.processes])
+
+    def testCounts(self):
+        clkgen, counter, double, cnt, dbl = bench(10)
+        sim = Simulation(clkgen, counter, double)
+        sim.runProfiled(quiet=1)
+        profile = sim.profile
+        procs = self.processes(profile)
+        self.assertEqual(procs["clkgen"], 21)
+        self.assertEqual(procs["counter"], 11)
+        self.assertEqual(procs["double"], 11)
+        toggles = dict(profile.toggles)
+        self.assertEqual(toggles["clk"], 20)
+        self.assertEqual(toggles["cnt"], 10)
+        self.assertEqual(toggles["dbl"], 10)
+        self.assertEqual(toggles["regs[0]"], 9)
+        self.assertEqual(toggles["regs[1]"], 8)
+        # time 0 and 20 clock edges
+        self.assertEqual(profile.timesteps, 21)
+        self.assertEqual(profile.deltas, {2: 11, 4: 10})
+        self.assertEqual(profile.maxQueue, 1)
+        self.assertEqual(int(cnt), 0)
+
+    def testResume(self):
+        sim = Simulation(bench(10)[:3])
+        sim.runProfiled(quiet=1)
+        expected = sim.profile
+        sim = Simulation(bench(10)[:3])
+        for i in range(4):
+            sim.runProfiled(20, quiet=1)
+        sim.runProfiled(quiet=1)
+        profile = sim.profile
+        self.assertEqual(profile.timesteps, expected.timesteps)
+        self.assertEqual(profile.deltas, expected.deltas)
+        self.assertEqual(self.processes(profile), self.processes(expected))
+        self.assertEqual(sorted(profile.toggles), sorted(expected.toggles))
+
+    def testSubGenerator(self):
+        caller, calls = subgen(10)
+        sim = Simulation(caller)
+        sim.runProfiled(quiet=1)
+        procs = self.processes(sim.profile)
+        # the calls of a sub-generator are reported together
+        self.assertEqual(len(sim.profile.processes), 2)
+        self.assertEqual(procs["wait"], 20)
+        self.assertEqual(procs["caller"], 11)
+        # the profile doesn't keep the sub-generators alive
+        gc.collect()
+        self.assertEqual([r() for r in calls], [None] * 10)
+
+    def testNotProfiled(self):
+        sim = Simulation(bench(3)[:3])
+        sim.run(quiet=1)
+        self.assertEqual(sim.profile, None)
+
+    def testReport(self):
+        sim = Simulation(bench(10)[:3])
+        sim.runProfiled(quiet=1)
+        f = StringIO()
+        sim.profile.report(sort="name", limit=2, stream=f)
+        lines = f.getvalue().splitlines()
+        self.assert_(lines[0].startswith("21 timesteps"))
+        self.assert_(lines[3].endswith(")") and "clkgen" in lines[3])
+        self.assert_("counter" in lines[4])
+        self.assert_("double" not in f.getvalue())
+        self.assert_("future events queue: max 1" in lines[-1])
+        for key in ("time", "activations", "mean"):
+            sim.profile.report(sort=key, stream=StringIO())
+        self.assertRaises(ValueError, sim.profile.report, sort="bad")
+
+    def testDump(self):
+        try:
+            import json
+        except ImportError:
+            return
+        sim = Simulation(bench(10)[:3])
+        sim.runProfiled(quiet=1)
+        fd, filename = tempfile.mkstemp(".json")
+        os.close(fd)
+        try:
+            sim.profile.dump(filename)
+            d = json.load(open(filename))
+        finally:
+            os.remove(filename)
+        self.assertEqual(d["timesteps"], 21)
+        self.assertEqual(len(d["processes"]), 3)
+        self.assertEqual(dict(d["deltas"]), {2: 11, 4: 10})
+        self.assertEqual(d, json.loads(json.dumps(sim.profile.toDict())))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -155,6 +155,87 @@ class TestTraceSigs(TestCase):
         self.assert_(path.getsize(pbak) == size)
         self.assert_(path.getsize(p) < size)
 
+    def _traceOptions(self, **kwargs):
+        saved = {}
+        for k, v in kwargs.items():
+            saved[k] = getattr(traceSignals, k)
+            setattr(traceSignals, k, v)
+        return saved
+
+    def _restoreOptions(self, saved):
+        for k, v in saved.items():
+            setattr(traceSignals, k, v)
+
+    def _vars(self, content):
+        return [l.split()[4] for l in content.splitlines()
+                if l.startswith("$var")]
+
+    def testBufferedOutputComplete(self):
+        p = "%s.vcd" % fun.func_name
+        saved = self._traceOptions(bufsize=64)
+        try:
+            dut = traceSignals(fun)
+        finally:
+            self._restoreOptions(saved)
+        Simulation(dut).run(1000, quiet=QUIET)
+        _simulator._tf.close()
+        _simulator._tracing = 0
+        content = open(p).read()
+        self.assert_("#1000\n" in content)
+        self.assertEqual(content.count("#"), 100)
+
+    def testCompressionGzip(self):
+        import gzip
+        p = "%s.vcd.gz" % fun.func_name
+        saved = self._traceOptions(compression="gzip")
+        try:
+            dut = traceSignals(fun)
+        finally:
+            self._restoreOptions(saved)
+        Simulation(dut).run(100, quiet=QUIET)
+        _simulator._tf.close()
+        _simulator._tracing = 0
+        self.assert_(path.exists(p))
+        content = gzip.open(p).read()
+        self.assert_("$enddefinitions $end" in content)
+        self.assert_("#100\n" in content)
+
+    def testCompressionUnknown(self):
+        saved = self._traceOptions(compression="zip")
+        try:
+            try:
+                traceSignals(fun)
+            except TraceSignalsError, e:
+                self.assertEqual(e.kind, _error.Compression)
+            else:
+                self.fail()
+        finally:
+            self._restoreOptions(saved)
+
+    def testFilter(self):
+        p = "%s.vcd" % top.func_name
+        saved = self._traceOptions(filter=["top.inst.inst.clk"])
+        try:
+            dut = traceSignals(top)
+        finally:
+            self._restoreOptions(saved)
+        _simulator._tf.close()
+        _simulator._tracing = 0
+        self.assertEqual(self._vars(open(p).read()), ["clk"])
+
+    def testDepth(self):
+        p = "%s.vcd" % top.func_name
+        saved = self._traceOptions(depth=1)
+        try:
+            dut = traceSignals(top)
+        finally:
+            self._restoreOptions(saved)
+        _simulator._tf.close()
+        _simulator._tracing = 0
+        content = open(p).read()
+        self.assertEqual(self._vars(content), [])
+        self.assert_(not "$scope module inst $end" in content)
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the waveform database """
+
+
+import os
+path = os.path
+import glob
+
+import unittest
+from unittest import TestCase
+
+from myhdl import delay, Signal, Simulation, _simulator, instance, intbv, \
+                  enum, traceSignals, WaveReader, waveToVcd, WaveformError, \
+                  TraceSignalsError
+from myhdl._waveform import _error
+from myhdl._traceSignals import _error as _traceError
+
+QUIET=1
+
+t_State = enum("IDLE", "RUN", "DONE")
+
+def gen(clk, count, state):
+    @instance
+    def logic():
+        while 1:
+            yield delay(10)
+            clk.next = not clk
+            if clk:
+                if count > -100:
+                    count.next = count - 3
+                else:
+                    count.next = 100
+                if state == t_State.IDLE:
+                    state.next = t_State.RUN
+                else:
+                    state.next = t_State.IDLE
+    return logic
+
+def wave():
+    clk = Signal(bool(0))
+    count = Signal(intbv(0, min=-128, max=128))
+    state = Signal(t_State.IDLE)
+    inst = gen(clk, count, state)
+    return inst
+
+def expected(t):
+    """ Return count changes up to time t """
+    changes = [(0, 0)]
+    count = 0
+    for step in range(20, t + 1, 20):
+        if count > -100:
+            count -= 3
+        else:
+            count = 100
+        changes.append((step, count))
+    return changes
+
+def vcdChanges(filename):
+    """ Return the value changes of a VCD file, by time step """
+    lines = open(filename).read().splitlines()
+    lines = lines[lines.index("$enddefinitions $end") + 1:]
+    changes = {}
+    t = 0
+    for line in lines:
+        if line.startswith("#"):
+            t = int(line[1:])
+        elif not line.startswith("$"):
+            changes.setdefault(t, []).append(line)
+    for step in changes.values():
+        step.sort()
+    return changes
+
+
+class TestWaveform(TestCase):
+
+    def setUp(self):
+        self.format = traceSignals.format
+        self.chunksize = traceSignals.chunksize
+        self.tearDown()
+
+    def tearDown(self):
+        traceSignals.format = self.format
+        traceSignals.chunksize = self.chunksize
+        if _simulator._tracing:
+            _simulator._tf.close()
+            _simulator._tracing = 0
+        paths = glob.glob("wave.*")
+        for p in paths:
+            os.remove(p)
+
+    def trace(self, format="wdb", chunksize=1 << 16, duration=1000):
+        traceSignals.format = format
+        traceSignals.chunksize = chunksize
+        dut = traceSignals(wave)
+        Simulation(dut).run(duration, quiet=QUIET)
+        _simulator._tf.close()
+        _simulator._tracing = 0
+
+    def testNames(self):
+        self.trace()
+        r = WaveReader("wave.wdb")
+        names = r.names[:]
+        names.sort()
+        self.assertEqual(names, ["wave.clk", "wave.count", "wave.inst.clk",
+                                 "wave.inst.count", "wave.inst.state",
+                                 "wave.state"])
+        self.assertEqual(r.width("wave.count"), 8)
+        self.assertEqual(r.width("wave.clk"), 1)
+        r.close()
+
+    def testChanges(self):
+        self.trace()
+        r = WaveReader("wave.wdb")
+        self.assertEqual(r.changes("wave.count"), expected(1000))
+        self.assertEqual(r.changes("wave.inst.count"), expected(1000))
+        clk = r.changes("wave.clk")
+        self.assertEqual(clk[:3], [(0, 0), (10, 1), (20, 0)])
+        self.assertEqual(len(clk), 101)
+        state = r.changes("wave.state", 10, 40)
+        self.assertEqual(state, [(20, "RUN"), (40, "IDLE")])
+        r.close()
+
+    def testWindow(self):
+        for chunksize in (1, 5, 1 << 16):
+            self.trace(chunksize=chunksize)
+            r = WaveReader("wave.wdb")
+            changes = [c for c in expected(1000) if 95 <= c[0] <= 300]
+            self.assertEqual(r.changes("wave.count", 95, 300), changes)
+            self.assertEqual(r.changes("wave.count", 100, 100),
+                             [(100, -15)])
+            self.assertEqual(r.changes("wave.count", 101, 119), [])
+            self.assertEqual(r.value("wave.count", 0), 0)
+            self.assertEqual(r.value("wave.count", 119), -15)
+            self.assertEqual(r.value("wave.count", 2000), expected(1000)[-1][1])
+            r.close()
+
+    def testChunks(self):
+        self.trace(chunksize=5)
+        r = WaveReader("wave.wdb")
+        self.assert_(len(r._chunks) > 10)
+        self.assertEqual(r.changes("wave.count"), expected(1000))
+        r.close()
+
+    def testToVcd(self):
+        self.trace(format="vcd")
+        os.rename("wave.vcd", "wave.ref")
+        self.trace(chunksize=7)
+        self.assertEqual(waveToVcd("wave.wdb"), "wave.vcd")
+        self.assertEqual(vcdChanges("wave.vcd"), vcdChanges("wave.ref"))
+
+    def testUnknownSignal(self):
+        self.trace()
+        r = WaveReader("wave.wdb")
+        try:
+            r.changes("wave.foo")
+        except WaveformError, e:
+            self.assertEqual(e.kind, _error.UnknownSignal)
+        else:
+            self.fail()
+        r.close()
+
+    def testBadFile(self):
+        f = open("wave.bad", "w")
+        f.write("$date\n")
+        f.close()
+        try:
+            WaveReader("wave.bad")
+        except WaveformError, e:
+            self.assertEqual(e.kind, _error.BadFile)
+        else:
+            self.fail()
+
+    def testFormat(self):
+        traceSignals.format = "fst"
+        try:
+            traceSignals(wave)
+        except TraceSignalsError, e:
+            self.assertEqual(e.kind, _traceError.Format)
+        else:
+            self.fail()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,12 @@
 # -*- coding: utf-8 -*-
 
 from entity import Entity, Instance, InstanceError, EntityError
+from cache import EntityCache, ENTITY_CACHE
 from syscon import make_syscon, SysconError
 from intercon import make_intercon, InterconError
 from top import make_top, TopError
 from utils import combine_type, to_bit_vector, signal_name, to_comment
-from utils import port_declaration, make_header
+from utils import port_declaration, port_definition, combine_port_type
+from utils import to_subtype, make_header, open_output
 from arbiter import make_arbiter, ArbiterError
 from testbench import make_testbench, make_simulation, TestbenchError
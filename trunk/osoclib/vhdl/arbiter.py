@@ -113,10 +113,9 @@ end architecture;
 """
 
 import os.path as path
-from StringIO import StringIO
 from entity import Entity, Instance
 from utils import make_header, _VHDL_ARCHITECTURE, to_bit_vector
-from utils import to_comment, signal_name, port_declaration
+from utils import to_comment, signal_name, port_declaration, open_output
 
 
 class ArbiterError(Exception):
@@ -135,7 +134,7 @@ class ArbiterError(Exception):
     def __str__(self):
         return self.message
 
-def make_arbiter(name, base_dir, masters, slave=None):
+def make_arbiter(name, base_dir, masters, slave=None, manifest=None):
     """Arbiter module generation.
     
     The arbiter module is used to generate all the necessary logic glue to
@@ -145,6 +144,7 @@ def make_arbiter(name, base_dir, masters, slave=None):
         @param base_dir: destination directory
         @param masters: master interfaces signals
         @param slave: slave interface signals
+        @param manifest: build manifest used to write file (core.BuildManifest)
         @return: vhdl.Entity instance from Arbiter module.
         
         master[0] = InstanceInterface object
@@ -154,7 +154,7 @@ def make_arbiter(name, base_dir, masters, slave=None):
     filename = path.join(base_dir, ("%s.vhd" % base_name))
 
     try:
-        vhdl_fd = open(filename, "w")
+        vhdl_fd = open_output(filename, manifest)
     except IOError:
         raise ArbiterError("Can't create %s.vhd file." % base_name)
 
@@ -167,6 +167,9 @@ def make_arbiter(name, base_dir, masters, slave=None):
     entity += "    -- Global signals\n"
     entity += "    clk : in std_logic;\n"
     entity += "    reset : in std_logic;\n\n"
+    declaration = [("clk", ["IN", ["std_logic"]]),
+                   ("reset", ["IN", ["std_logic"]])
+                  ]
     
 
     entity += "\n  );"
@@ -188,7 +191,7 @@ def make_arbiter(name, base_dir, masters, slave=None):
     vhdl_fd.close()
     
     # 8. Create vhdl.Entity object
-    entity = Entity(StringIO(entity))
+    entity = Entity.fromDeclaration(base_name, ports=declaration)
     instance = Instance(entity, base_name)
     
     # 9. Adding signals interconnection
@@ -0,0 +1,159 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     cache.py
+# Purpose:  VHDL tools for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""VHDL entity declarations cache.
+
+Parsed entities are stored by hash of the VHDL source, so a file already
+analyzed is never parsed again. Cache can be saved on disk to be shared
+between sessions.
+"""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+if __name__ == "__main__":
+    import os.path as path
+    import sys
+
+    dirname, base = path.split(path.dirname(path.realpath(__file__)))
+    sys.path.append(dirname)
+
+import cPickle
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
+from thirdparty.PyDbLite import Base
+
+# Increment CACHE_VERSION each time entity extraction result changes.
+CACHE_VERSION = "1"
+
+# CACHE_FIELDS define disk cache record fields
+CACHE_FIELDS = ("key", "entity")
+
+# CACHE_ERRORS are raised when disk cache is unreadable or obsolete
+CACHE_ERRORS = (IOError, OSError, EOFError, ValueError, IndexError, KeyError,
+                AttributeError, cPickle.UnpicklingError)
+
+class EntityCache(object):
+    """Parsed VHDL entities cache.
+
+    Entities are stored as tuple (identifier, generics, ports, globals).
+    New entities are saved on disk by commit().
+
+    Attributes:
+        hits -- number of entities found in cache
+        misses -- number of entities not found in cache
+    """
+
+    def __init__(self):
+        self._entities = {}
+        self._db = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self, filename):
+        """Use disk file to save cache content.
+
+        @param filename: cache file name
+        """
+        db = Base(filename)
+        try:
+            db.create(*CACHE_FIELDS, **{"mode" : "open"})
+            if db.fields != list(CACHE_FIELDS):
+                raise ValueError("Cache fields mismatch")
+        except CACHE_ERRORS:
+            # Cache is unreadable or obsolete, build a new one.
+            try:
+                db.create(*CACHE_FIELDS, **{"mode" : "override"})
+            except (IOError, OSError):
+                return
+        db.create_index("key")
+
+        for record in db:
+            self._entities[record["key"]] = record["entity"]
+        self._db = db
+
+    def clear(self):
+        """Remove all entities and reset counters."""
+        self._entities = {}
+        self.hits = 0
+        self.misses = 0
+        if not self._db is None:
+            self._db.delete(list(self._db))
+            self._dirty = True
+            self.commit()
+
+    def commit(self):
+        """Save cache to disk if modified, errors are silently ignored."""
+        if self._db is None or not self._dirty:
+            return
+        try:
+            self._db.commit()
+        except (IOError, OSError):
+            return
+        self._dirty = False
+
+    @staticmethod
+    def key(source):
+        """Compute cache key of a VHDL source."""
+        return md5(CACHE_VERSION + source).hexdigest()
+
+    def get(self, source):
+        """Search entity extracted from VHDL source.
+
+        @param source: VHDL source string
+        @return: entity tuple or None if not in cache.
+        """
+        entity = self._entities.get(self.key(source))
+        if entity is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entity
+
+    def put(self, source, entity):
+        """Store entity extracted from VHDL source.
+
+        A source already stored is updated, its record is not duplicated.
+
+        @param source: VHDL source string
+        @param entity: entity tuple
+        """
+        key = self.key(source)
+        if self._entities.has_key(key) and self._entities[key] == entity:
+            return
+        self._entities[key] = entity
+        if not self._db is None:
+            records = self._db._key[key]
+            if records:
+                self._db.update(records, entity=entity)
+            else:
+                self._db.insert(key=key, entity=entity)
+            self._dirty = True
+
+    def __contains__(self, source):
+        return self._entities.has_key(self.key(source))
+
+    def __len__(self):
+        return len(self._entities)
+
+    def __str__(self):
+        return "%d entities, %d hits, %d misses" % (len(self), self.hits,
+                                                     self.misses)
+
+# Entity cache shared by all Entity objects
+ENTITY_CACHE = EntityCache()
@@ -61,6 +61,8 @@ from thirdparty.pyparsing import alphas, alphanums, matchPreviousLiteral
 from thirdparty.pyparsing import nums, hexnums, downcaseTokens
 
 from utils import combine_type
+from cache import ENTITY_CACHE
+from scanner import scan_entity
 
 # VHDL Entity cleaners. Used in parsing, but doesn't clutter up results
 SEMI = Literal(";").suppress()
@@ -126,6 +128,53 @@ entityDecl = (SkipTo(entityHeader) + entityHeader +
               Optional(matchPreviousLiteral(entityIdent).suppress()) + SEMI
               ).ignore(comment) + SkipTo(StringEnd()).suppress()
 
+def parse_entity(source, filename=None):
+    """Extract entity declaration from VHDL source.
+    
+    Source is first analyzed by fast entity scanner, pyparsing grammar is
+    only used when scanner gives up.
+    
+    @param source: VHDL source string
+    @param filename: file name, only used for error message
+    @return: tuple (identifier, generics, ports, globals), generics, ports
+             and globals are (name, value) lists in declaration order.
+    """
+    entity = scan_entity(source)
+    if entity is None:
+        entity = grammar_entity(source, filename)
+    return entity
+
+def grammar_entity(source, filename=None):
+    """Extract entity declaration from VHDL source with pyparsing grammar.
+    
+    @param source: VHDL source string
+    @param filename: file name, only used for error message
+    @return: same tuple as parse_entity()
+    """
+    try:
+        entity = entityDecl.parseString(source)
+    except:
+        raise EntityError("*** No valid entity declaration founded in file %s!" % filename)
+
+    # Extract port information
+    ports = [(port[0], [port[1], port[2].asList()]) for port in entity.ports]
+
+    # Extract generics information
+    generics = [(gen[0], [gen[1].asList()] + list(gen[2:])) 
+                  for gen in entity.generics]
+
+    return (entity.identifier, generics, ports, generics_globals(generics))
+
+def generics_globals(generics):
+    """Extract generic configuration settings.
+    
+    @param generics: (name, [subtype, default]) list
+    @return: (name, value) list of integer generics with default value
+    """
+    return [(name.lower(), int(generic[1])) for (name, generic) in generics
+              if generic[0][0].lower() == "integer" and len(generic) > 1
+           ]
+
 def combine_generic(name, arg):
     """Generate VHDL generic declaration."""
     
@@ -204,23 +253,42 @@ class Entity(object):
             except IOError:
                 raise EntityError("*** File %s not found!" % filename)
 
-        try:
-            entity = entityDecl.parseFile(fd)
-        except:
-            raise EntityError("*** No valid entity declaration founded in file %s!" % filename)
-
-        self._identifier = entity.identifier
+        source = fd.read()
+        entity = ENTITY_CACHE.get(source)
+        if entity is None:
+            entity = parse_entity(source, filename)
+            ENTITY_CACHE.put(source, entity)
+
+        self.__setup(entity)
+
+    def __setup(self, entity):
+        """Set entity settings from (identifier, generics, ports, globals)."""
+        (identifier, generics, ports, env) = entity
+        self._identifier = identifier
+        self._generics = dict(generics)
+        self._ports = dict(ports)
+        self._globals = dict(env)
+
+    @classmethod
+    def fromDeclaration(cls, identifier, generics=(), ports=()):
+        """Build entity from declaration settings, without VHDL parsing.
         
-        # Extract port information
-        self._ports = dict([port[0], port[1:]] for port in entity.ports)
-
-        # Extract generics information
-        self._generics = dict([gen[0], gen[1:]] for gen in entity.generics)
-
-        # Extract generic configuration settings
-        self._globals = dict([g[0].lower(), int(g[2])] for g in entity.generics
-                               if g[1][0].lower() == "integer" and len(g)>1
-                            )
+        Settings have the same format as entity parser result, so entity is
+        the same as the one extracted from the equivalent VHDL declaration.
+        
+        @param identifier: entity name
+        @param generics: (name, [subtype, default]) list in declaration order
+        @param ports: (name, [mode, subtype]) list in declaration order
+        @return: Entity object
+        """
+        generics = [(name.lower(), generic) for (name, generic) in generics]
+        ports = [(name.lower(), [port[0].upper(), port[1]]) 
+                  for (name, port) in ports]
+
+        entity = cls.__new__(cls)
+        entity.__setup((identifier.lower(), generics, ports, 
+                        generics_globals(generics)))
+        return entity
 
     def __toString(self, as_component=False):
         """Generate entity or component declaration string."""
@@ -25,10 +25,10 @@ __license__ = "GPLv3"
 __copyright__ = "Copyright 2008 Fabrice MOUSSET"
 
 import os.path as path
-from StringIO import StringIO
 from entity import Entity, Instance
 from utils import make_header, _VHDL_ARCHITECTURE, to_bit_vector
-from utils import to_comment, signal_name, port_declaration
+from utils import to_comment, signal_name, port_definition, combine_port_type
+from utils import open_output
 
 def mk_signal_bit(name, idx):
     if name == 1:
@@ -331,11 +331,11 @@ class InterconMemoryIface(InterconRegisterIface):
 def port_matrix(iface, signal, defname = None):
     """Generate port signal settings.
     """
-    port_name, port_type = port_declaration(iface, signal, defname)
+    port_name, definition = port_definition(iface, signal, defname)
     port_cnx = iface.getPortCnx(signal[0].name)
-    return (port_name, [port_type, port_cnx])
+    return (port_name, [definition, port_cnx])
 
-def make_intercon(name, base_dir, master, slaves):
+def make_intercon(name, base_dir, master, slaves, manifest=None):
     """Intercon module generation.
     
     The intercon module is used to generate all the necessary logic glue to
@@ -345,6 +345,7 @@ def make_intercon(name, base_dir, master, slaves):
         @param base_dir: destination directory
         @param masters: master interfaces signals
         @param slaves: slave interfaces signals
+        @param manifest: build manifest used to write file (core.BuildManifest)
         @return: vhdl.Entity instance from Intercom module.
         
         master[0] = InstanceInterface object
@@ -362,7 +363,7 @@ def make_intercon(name, base_dir, master, slaves):
                  ]
     
     try:
-        vhdl_fd = open(filename, "w")
+        vhdl_fd = open_output(filename, manifest)
     except IOError:
         raise InterconError("Can't create %s.vhd file." % base_name)
 
@@ -381,10 +382,11 @@ def make_intercon(name, base_dir, master, slaves):
     entity_ports =  dict(port_matrix(master, signal, "wbs_master") 
                             for _, signal in master.signals.iteritems()
                             )
-    ports = ["    %s : %s" % (key, value[0]) 
+    ports = ["    %s : %s" % (key, combine_port_type(value[0])) 
                 for key, value in entity_ports.iteritems()
             ]
     entity += ";\n".join(ports)
+    declaration = [(key, value[0]) for key, value in entity_ports.iteritems()]
 
     slaves_max_width = 8
     for slave in slaves:
@@ -399,9 +401,12 @@ def make_intercon(name, base_dir, master, slaves):
                                 for _, signal in slave.signals.iteritems()
                                 )
         entity_ports.update(slave_ports)
-        entity += ";\n".join(["    %s : %s" % (key, value[0]) 
+        entity += ";\n".join(["    %s : %s" % (key, 
+                                                combine_port_type(value[0])) 
                               for key, value in slave_ports.iteritems()
                               ])
+        declaration.extend((key, value[0]) 
+                           for key, value in slave_ports.iteritems())
 
     entity += "\n  );"
     entity += "\nend entity;\n"
@@ -517,7 +522,7 @@ def make_intercon(name, base_dir, master, slaves):
     vhdl_fd.close()
     
     # 8. Create vhdl.Entity object
-    entity = Entity(StringIO(entity))
+    entity = Entity.fromDeclaration(base_name, ports=declaration)
     instance = Instance(entity, "CP_" + base_name)
     
     # 9. Adding signals interconnection
@@ -0,0 +1,317 @@
+#! /usr/bin/python
+# -*- coding: utf-8 -*-
+#=============================================================================
+# Name:     scanner.py
+# Purpose:  VHDL tools for Orchestra
+#
+# License:  GPLv3 or newer
+#=============================================================================
+# Revision list :
+#
+# Date       By        Changes
+#
+#=============================================================================
+
+"""Fast VHDL entity declaration scanner.
+
+The scanner only handles the entity declarations accepted by the entity.py
+grammar and produces the same result. Entity header is searched like the
+grammar does, then the declaration is tokenized until END keyword, the
+architecture text is never read.
+
+Each time the scanner can't be sure to get the same result as the grammar,
+it gives up and returns None, the pyparsing grammar has to be used instead.
+"""
+__version__ = "$Id$"
+__license__ = "GPLv3"
+
+if __name__ == "__main__":
+    import os.path as path
+    import sys
+
+    dirname, base = path.split(path.dirname(path.realpath(__file__)))
+    sys.path.append(dirname)
+
+import re
+
+# Entity header search, comments are skipped like grammar does.
+_HEADER = re.compile(r"""
+    --[^\n]*(?![^\n])
+  | entity (?:[ \t\r\n]+|--[^\n]*(?![^\n]))*
+    ([a-z][a-z0-9_]*)(?![a-z0-9_])
+    (?:[ \t\r\n]+|--[^\n]*(?![^\n]))* is
+""", re.IGNORECASE | re.VERBOSE)
+
+# Entity declaration tokens
+_TOKEN = re.compile(r"""
+    (?P<space>[ \t\r\n]+)
+  | (?P<comment>--[^\n]*)
+  | (?P<ident>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<integer>[0-9]+)
+  | (?P<vector>"[01X]+")
+  | (?P<bit>'[01X]')
+  | (?P<symbol>:=|[-+*/():;])
+""", re.VERBOSE)
+
+# Port modes
+_MODES = ("IN", "OUT", "INOUT", "BUFFER", "LINKAGE")
+
+class _ScanError(Exception):
+    """Raised when scanner gives up."""
+    pass
+
+class _Scanner(object):
+    """Entity declaration tokenizer and parser."""
+
+    __slots__ = ("_source", "_pos", "_token", "_comment")
+
+    def __init__(self, source, pos):
+        self._source = source
+        self._pos = pos
+        self._token = None
+        self._comment = False
+        self._next()
+
+    def _next(self):
+        """Read next token, white spaces and comments are skipped."""
+        source = self._source
+        while True:
+            match = _TOKEN.match(source, self._pos)
+            if match is None:
+                if self._pos < len(source):
+                    raise _ScanError()
+                self._token = (None, None)
+                return
+
+            self._pos = match.end()
+            kind = match.lastgroup
+            if kind == "comment":
+                self._comment = True
+            elif kind != "space":
+                self._token = (kind, match.group(kind))
+                return
+
+    def _keyword(self, name):
+        """Consume token if it is the given keyword."""
+        (kind, value) = self._token
+        if kind == "ident" and value.upper() == name:
+            self._next()
+            return True
+        return False
+
+    def _symbol(self, symbol):
+        """Consume token if it is the given symbol."""
+        if self._token == ("symbol", symbol):
+            self._next()
+            return True
+        return False
+
+    def _expect(self, symbol):
+        """Consume symbol or give up."""
+        if not self._symbol(symbol):
+            raise _ScanError()
+
+    def _identifier(self):
+        """Consume identifier, returned in lower case."""
+        (kind, value) = self._token
+        if kind != "ident":
+            raise _ScanError()
+        self._next()
+        return value.lower()
+
+    def _expression(self):
+        """Consume arithmetic expression, returned without white spaces."""
+        items = []
+        while True:
+            (kind, value) = self._token
+            if kind == "integer":
+                items.append(value)
+                self._next()
+            elif kind == "ident":
+                items.append(value.lower())
+                self._next()
+            elif self._symbol("("):
+                items.append("(" + self._expression())
+                self._expect(")")
+                items.append(")")
+            else:
+                raise _ScanError()
+
+            (kind, value) = self._token
+            if kind == "symbol" and value in "+-*/":
+                items.append(value)
+                self._next()
+            else:
+                return "".join(items)
+
+    def _subtype(self):
+        """Consume subtype indication."""
+        subtype = [self._identifier()]
+        if self._symbol("("):
+            # Grammar doesn't allow comments inside range
+            self._comment = False
+            subtype.append(self._expression())
+            if self._keyword("TO"):
+                subtype.append("TO")
+            elif self._keyword("DOWNTO"):
+                subtype.append("DOWNTO")
+            else:
+                raise _ScanError()
+            subtype.append(self._expression())
+            if self._comment or self._token != ("symbol", ")"):
+                raise _ScanError()
+            self._next()
+        return subtype
+
+    def _value(self):
+        """Consume generic default value."""
+        (kind, value) = self._token
+        if kind == "integer":
+            value = int(value)
+        elif kind == "ident":
+            value = value.lower()
+        elif not kind in ("vector", "bit"):
+            raise _ScanError()
+        self._next()
+        return value
+
+    def _generic(self):
+        """Consume generic declaration."""
+        name = self._identifier()
+        self._expect(":")
+        generic = [self._subtype()]
+        if self._symbol(":="):
+            generic.append(self._value())
+        return (name, generic)
+
+    def _port(self):
+        """Consume port declaration."""
+        name = self._identifier()
+        self._expect(":")
+        (kind, value) = self._token
+        if kind != "ident" or not value.upper() in _MODES:
+            raise _ScanError()
+        self._next()
+        return (name, [value.upper(), self._subtype()])
+
+    def _list(self, declaration):
+        """Consume declarations list, between parenthesis."""
+        self._expect("(")
+        items = [declaration()]
+        while self._symbol(";"):
+            items.append(declaration())
+        self._expect(")")
+        self._expect(";")
+        return items
+
+    def entity(self, identifier):
+        """Consume entity declaration, following header."""
+        generics = []
+        ports = []
+        if self._keyword("GENERIC"):
+            generics = self._list(self._generic)
+        if self._keyword("PORT"):
+            ports = self._list(self._port)
+
+        if not self._keyword("END"):
+            raise _ScanError()
+        self._keyword("ENTITY")
+        # Grammar only accepts closing identifier written in lower case
+        if self._token == ("ident", identifier):
+            self._next()
+        elif self._token[0] == "ident":
+            raise _ScanError()
+        if self._token != ("symbol", ";"):
+            raise _ScanError()
+
+        try:
+            env = [(name, int(generic[1])) for (name, generic) in generics
+                     if generic[0][0].lower() == "integer" and len(generic) > 1
+                  ]
+        except ValueError:
+            raise _ScanError()
+        return (identifier, generics, ports, env)
+
+def scan_entity(source):
+    """Extract entity declaration from VHDL source.
+
+    @param source: VHDL source string
+    @return: tuple (identifier, generics, ports, globals) like
+             entity.parse_entity(), or None if source can't be scanned.
+    """
+    for match in _HEADER.finditer(source):
+        if match.group(1) is None:
+            continue
+
+        try:
+            scanner = _Scanner(source, match.end())
+            return scanner.entity(match.group(1).lower())
+        except _ScanError:
+            return None
+
+    return None
+
+def _sources(names):
+    """Get VHDL sources from component archives, VHDL files and directories.
+
+    @param names: list of file or directory names
+    @return: list of (name, source)
+    """
+    import os
+    import os.path as path
+    from core import ZipFile, is_zipfile
+
+    sources = []
+    for name in names:
+        if path.isdir(name):
+            files = [path.join(name, f) for f in os.listdir(name)]
+            files.sort()
+            sources.extend(_sources([f for f in files if path.isfile(f)]))
+        elif is_zipfile(name):
+            zfp = ZipFile(name, "r")
+            for member in zfp.namelist():
+                if member.lower().endswith((".vhd", ".vhdl")):
+                    sources.append(("%s:%s" % (name, member), 
+                                    zfp.read(member)))
+            zfp.close()
+        elif name.lower().endswith((".vhd", ".vhdl")):
+            fd = open(name, "r")
+            sources.append((name, fd.read()))
+            fd.close()
+    return sources
+
+def main():
+    """
+    Compare scanner and pyparsing grammar results on component archives and
+    VHDL files (e.g. MyHDL conversion tests outputs) given as arguments.
+    Bundled components are used when no argument is given.
+    """
+    import sys
+    import os.path as path
+    from entity import grammar_entity, EntityError
+
+    names = sys.argv[1:]
+    if not names:
+        names = [path.join(path.dirname(path.realpath(__file__)), 
+                           "..", "..", "components")]
+
+    errors = 0
+    for (name, source) in _sources(names):
+        try:
+            expected = grammar_entity(source, name)
+        except EntityError:
+            expected = None
+
+        result = scan_entity(source)
+        if result is None:
+            print "FALLBACK  %s" % name
+        elif result == expected:
+            print "OK        %s" % name
+        else:
+            print "MISMATCH  %s" % name
+            errors += 1
+
+    return errors
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -86,9 +86,16 @@ begin
 end architecture;
 """
 
+# Syscon ports, as declared in __SYSCON_VHDL entity
+__SYSCON_PORTS = [("clk", ["IN", ["std_logic"]]),
+                  ("reset_sync", ["OUT", ["std_logic"]]),
+                  ("reset_ext", ["IN", ["std_logic"]])
+                 ]
+
 import os.path as path
 from StringIO import StringIO
 from entity import Entity
+from utils import open_output
 
 class SysconError(Exception):
     """Exception raised when errors detected during Syscon manipulation.
@@ -113,19 +120,20 @@ class SysconInstance(object):
         self.ports = ports
         self.generics = None
 
-def make_syscon(base_dir):
+def make_syscon(base_dir, manifest=None):
     """Create a Syscon VHDL module in specified directory.
     
     @param base_dir: destination directory.
+    @param manifest: build manifest used to write file (core.BuildManifest)
     @return: vhdl.Entity instance from syscon definition. 
     """
     hdl = StringIO(__SYSCON_VHDL)
     try:
-        vhdl_file = open(path.join(base_dir, "syscon.vhd"), "w")
+        vhdl_file = open_output(path.join(base_dir, "syscon.vhd"), manifest)
     except IOError:
         raise SysconError("Can't create %s file." % 
                           path.join(base_dir, "syscon.vhd"))
     vhdl_file.write(hdl.getvalue())
     vhdl_file.close()
 
-    return Entity(hdl), "syscon.vhd"
+    return Entity.fromDeclaration("syscon", ports=__SYSCON_PORTS), "syscon.vhd"
@@ -24,7 +24,7 @@ __license__ = "GPLv3"
 __copyright__ = "Copyright 2009 Fabrice MOUSSET"
 
 import os.path as path
-from utils import make_header, _VHDL_ARCHITECTURE, to_comment
+from utils import make_header, _VHDL_ARCHITECTURE, to_comment, open_output
 
 class TestbenchError(Exception):
     """Exception raised when errors detected during test bench creation.
@@ -51,7 +51,7 @@ def make_simulation(project):
     filename = path.join(project.path, base_name)
 
     try:
-        simu_fd = open(filename, "w")
+        simu_fd = open_output(filename, project.manifest)
     except IOError:
         raise TestbenchError("Can't create %s file." % base_name)
 
@@ -74,7 +74,7 @@ def make_testbench(project):
     filename = path.join(project.path, ("%s.vhd" % base_name))
 
     try:
-        vhdl_fd = open(filename, "w")
+        vhdl_fd = open_output(filename, project.manifest)
     except IOError:
         raise TestbenchError("Can't create %s.vhd file." % base_name)
 
@@ -25,10 +25,11 @@ __license__ = "GPLv3"
 __copyright__ = "Copyright 2009 Fabrice MOUSSET"
 
 import os.path as path
-from StringIO import StringIO
 from entity import Entity, Instance
 from utils import make_header, _VHDL_ARCHITECTURE, to_bit_vector
-from utils import to_comment, signal_name, combine_type
+from utils import to_comment, signal_name, combine_type, to_subtype
+from utils import open_output
+from core import run_parallel
 from syscon import make_syscon, SysconError
 from intercon import make_intercon, InterconError
 
@@ -88,8 +89,8 @@ def port_matrix(iface, signal):
     iface.setPortCnx(name, port_name)    
 
     # Returning value
-    port_type = combine_type(signal[1][1], iface.port_width(signal[0].name))
-    return (port_name.lower(), (signal[1][0], port_type.lower()))
+    subtype = to_subtype(signal[1][1], iface.port_width(signal[0].name))
+    return (port_name.lower(), [signal[1][0], subtype])
 
 def mk_signal(iface, signal, vhdl):
     name = "_".join([iface._parent.name, signal])
@@ -103,19 +104,7 @@ def make_top(project):
         @return: vhdl.Entity instance from top module
     """
 
-    # 1. Create RESET synchronization module
-    hdl_files = []
-    try:
-        clk_hdl, fname = make_syscon(project.path)
-        hdl_files.append(fname)
-    except SysconError, e:
-        raise TopError(e.message)
-    
-    # 1.1 Create Clock synchronization instance and connect RESET signal
-    clk_ip = Instance(clk_hdl)
-    clk_ip.setPort("reset_ext", "reset")
-    
-    # 2. Create IP connection signals
+    # 1. Create IP connection signals
     elmts = []
     for _, iface in project.wires.iteritems():
         elmts.extend(iface[0])
@@ -124,7 +113,7 @@ def make_top(project):
     signals = dict(mk_signal(iface, sig, vhdl) for iface in elmts
                         for sig, vhdl in iface.signals.iteritems())
         
-    # 2.1 Add reset/clock signals
+    # 1.1 Add reset/clock signals
     for name, ifaces in project.clocks.iteritems():
         clk_name = name
         rst_name = name + "_sync_reset"
@@ -137,26 +126,34 @@ def make_top(project):
                 if xml.type == "RST":
                     iface.setPortCnx(xml.name, rst_name)
 
-    # 3. Create address decoder module for each wishbone master interface
-    intercons = []
+    # 2. Create RESET synchronization module and address decoder module for
+    #    each wishbone master interface, all written in parallel
+    tasks = [(make_syscon, (project.path, project.manifest))]
+    for (name, ifaces) in project.wires.iteritems():
+        masters, slaves = ifaces[0], ifaces[1]
+        if len(masters) > 1:
+            raise TopError("Cannot generate multi-master '%s' bus." % name)
+        tasks.append((make_intercon, (name, project.path, masters[0], slaves,
+                                      project.manifest)))
+
     try:
-        for (name, ifaces) in project.wires.iteritems():
-            masters, slaves = ifaces[0], ifaces[1]
-            if len(masters) > 1:
-                raise TopError("Cannot generate multi-master '%s' bus." % name)
-            master = masters[0]
-            entity, fname = make_intercon(name, project.path, master, slaves)
-            intercons.append(entity)
-            hdl_files.append(fname)
-            
-    except InterconError, e:
+        results = run_parallel(tasks, project.workers)
+    except (SysconError, InterconError), e:
         raise TopError(e.message)
 
-    # 4. Now we create top file
+    hdl_files = [fname for (_, fname) in results]
+    intercons = [entity for (entity, _) in results[1:]]
+    
+    # 2.1 Create Clock synchronization instance and connect RESET signal
+    clk_ip = Instance(results[0][0])
+    clk_ip.setPort("reset_ext", "reset")
+
+    # 3. Now we create top file
     fname = ("%s.vhd" % project.name)
     hdl_files.append(fname)
     try:
-        top_file = open(path.join(project.path, fname), "w")
+        top_file = open_output(path.join(project.path, fname), 
+                               project.manifest)
     except IOError:
         raise TopError("Can't create output files '%s'." % fname)
     
@@ -177,20 +174,25 @@ def make_top(project):
     entity_ports = {}
     entity += "    reset : in std_logic;\n"
     entity += "\n".join(ports)
+    declaration = [("reset", ["IN", ["std_logic"]])]
+    declaration.extend((key, ["IN", [value]]) 
+                       for key, value in entity_clocks.iteritems())
     
     for iface in project.externals:
         entity += ";\n\n    -- External signals for %s\n" % iface.name
         iface_ports =  dict(port_matrix(iface, signal) 
                                 for _, signal in iface.signals.iteritems()
                                 )
-        ports = ["    %s : %s %s" % (key, value[0], value[1]) 
+        ports = ["    %s : %s %s" % (key, value[0], 
+                                         combine_type(value[1]).lower()) 
                     for key, value in iface_ports.iteritems()
                 ]
        
         entity += ";\n".join(ports)
+        declaration.extend(iface_ports.iteritems())
         
         # Add port signals to port list
-        entity_ports.update(dict((key, value[1]) 
+        entity_ports.update(dict((key, combine_type(value[1]).lower()) 
                     for key, value in iface_ports.iteritems()))
         
     entity += "\n  );"
@@ -247,7 +249,7 @@ def make_top(project):
     top_file.write("\nend architecture;\n")
     top_file.close()
     
-    entity = Entity(StringIO(entity))
+    entity = Entity.fromDeclaration(project.name, ports=declaration)
 
     # 4 Saving settings into project
     project.port_list = entity_ports
@@ -110,26 +110,67 @@ def to_bit_vector(value, size):
     bv = '0'*size + bv
     return bv[-size:]
 
-def port_declaration(iface, signal, name=None):
-    """Generate VHDL port signal declaration for entity.
+def to_subtype(vhdl_type, width=None):
+    """Generate VHDL subtype indication, as extracted by entity parser.
+    
+        @param vhdl_type: list containing VHDL type elements
+        @param width: signal width 
+    """
+    if len(vhdl_type) > 1 and width:
+        return [vhdl_type[0].lower(), str(width-1), "DOWNTO", "0"]
+    return list(vhdl_type)
+
+def port_definition(iface, signal, name=None):
+    """Generate VHDL port signal definition for entity.
     
         @param iface: Wishbone interface settings (vhdl.Interface)
         @param signal: VHDL signal declaration sequence
         @param name: default port name
+        @return: tuple (port_name, [mode, subtype]), like entity parser. 
     """
     if signal[1][0].upper() == "IN":
         pdir = "_o"
-        port_type = "out "
+        mode = "OUT"
     else:
         pdir = "_i"
-        port_type = "in "
+        mode = "IN"
     
     if name == None:
         name = iface
 
     port_name = signal_name(name, signal[0].type + pdir)
-    port_type += combine_type(signal[1][1], iface.port_width(signal[0].name))
-    return (port_name.lower(), port_type.lower())
+    subtype = to_subtype(signal[1][1], iface.port_width(signal[0].name))
+    return (port_name.lower(), [mode, subtype])
+
+def combine_port_type(definition):
+    """Generate VHDL port type string from port definition.
+    
+        @param definition: port definition [mode, subtype]
+    """
+    mode, subtype = definition
+    return ("%s %s" % (mode, combine_type(subtype))).lower()
+
+def port_declaration(iface, signal, name=None):
+    """Generate VHDL port signal declaration for entity.
+    
+        @param iface: Wishbone interface settings (vhdl.Interface)
+        @param signal: VHDL signal declaration sequence
+        @param name: default port name
+    """
+    port_name, definition = port_definition(iface, signal, name)
+    return (port_name, combine_port_type(definition))
+
+def open_output(filename, manifest=None):
+    """Open generated file for writing.
+    
+        @param filename: generated file name
+        @param manifest: build manifest (core.BuildManifest), if defined file
+                         is only written when its content changed.
+        @raise IOError: if file can't be created
+    """
+    if manifest is None:
+        return open(filename, "w")
+    return manifest.open(filename)
 
 def make_header(description, filename):
     """Create VHDL description header.